@@ -1,6 +1,7 @@
 from backtestTools.util import createPortfolio, calculateDailyReport, limitCapital, generateReportFile
 from backtestTools.algoLogic import baseAlgoLogic, equityOverNightAlgoLogic
 from backtestTools.histData import getEquityBacktestData
+from backtestUtils.lookback import fetchLookback
 from backtestTools.histData import getEquityHistData
 from backtestTools.util import setup_logger
 from datetime import datetime, timedelta
@@ -44,7 +45,7 @@ class rsi_Aniket(baseAlgoLogic):
         logger.propagate = False
 
         try:
-            df = getEquityBacktestData(stockName, startTimeEpoch-7776000, endTimeEpoch, "1H")
+            df = fetchLookback(getEquityBacktestData, stockName, startTimeEpoch, endTimeEpoch, "1H", warmupBars=420)
         except Exception as e:
             print(stockName)
             raise Exception(e)
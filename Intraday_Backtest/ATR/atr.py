@@ -1,6 +1,7 @@
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
 from backtestTools.algoLogic import optOverNightAlgoLogic
 from backtestTools.histData import getFnoBacktestData
+from backtestUtils.lookback import fetchLookback
 import numpy as np
 import talib as ta
 import pandas_ta as taa
@@ -19,7 +20,7 @@ class algoLogic(optOverNightAlgoLogic):
 
         try:
             df = getFnoBacktestData(indexSym, startEpoch, endEpoch, "1Min")
-            df_5min = getFnoBacktestData(indexSym, startEpoch-886400, endEpoch, "5Min")
+            df_5min = fetchLookback(getFnoBacktestData, indexSym, startEpoch, endEpoch, "5Min", warmupBars=500)
         except Exception as e:
             self.strategyLogger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}")
             raise Exception(e)
@@ -3,6 +3,7 @@ import talib as ta
 from datetime import datetime, time, timedelta
 from backtestTools.algoLogic import optIntraDayAlgoLogic
 from backtestTools.histData import getFnoBacktestData
+from backtestUtils.lookback import fetchLookback
 from backtestTools.expiry import getExpiryData
 import multiprocessing as mp
 from backtestTools.util import setup_logger
@@ -13,7 +14,7 @@ class BollingerBandStrategy(optIntraDayAlgoLogic):
         endepoch = endDate.timestamp()
 
         try:
-            df = getFnoBacktestData(indexSym, startepoch - (86400 * 30), endepoch, '5Min')
+            df = fetchLookback(getFnoBacktestData, indexSym, startepoch, endepoch, '5Min', warmupBars=1500)
             df_1min=getFnoBacktestData(indexSym, startepoch , endepoch, '1Min')
         except Exception as e:
             self.strategyLogger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}: {e}") #if data not found
@@ -1,25 +1,30 @@
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
-from backtestTools.algoLogic import optOverNightAlgoLogic
+from backtestUtils.prefetch import prefetchOptOverNightAlgoLogic
 from backtestTools.histData import getFnoBacktestData
+from backtestUtils.lookback import fetchLookback
 import numpy as np
 import talib as ta
 import pandas_ta as taa
 from backtestTools.expiry import getExpiryData
 from datetime import datetime, time, timedelta
+from backtestUtils.positionBook import PositionBook
+from backtestUtils.eventClock import EventClock
+from backtestUtils.tradingCalendar import nseCalendar
 
-class algoLogic(optOverNightAlgoLogic):
+class algoLogic(prefetchOptOverNightAlgoLogic):
 
     def run(self, startDate, endDate, baseSym, indexSym):
 
         col = ["Target", "Stoploss", "Expiry"]
         self.addColumnsToOpenPnlDf(col)
+        self.book = PositionBook(col, engine=self)
 
         startEpoch = startDate.timestamp()
         endEpoch = endDate.timestamp()
 
         try:
             df = getFnoBacktestData(indexSym, startEpoch, endEpoch, "1Min")
-            df_5min = getFnoBacktestData(indexSym, startEpoch-886400, endEpoch, "5Min")
+            df_5min = fetchLookback(getFnoBacktestData, indexSym, startEpoch, endEpoch, "5Min", warmupBars=500)
         except Exception as e:
             self.strategyLogger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}")
             raise Exception(e)
@@ -41,50 +46,45 @@ class algoLogic(optOverNightAlgoLogic):
         expiryEpoch= expiryDatetime.timestamp()
         lotSize = int(getExpiryData(self.timeData, baseSym)["LotSize"])
 
-        for timeData in df.index: 
+        # Strikes around spot load in the background from 09:16 so the 10:15 entry does not wait on them
+        self.startPrefetch(baseSym, endEpoch, strikeBand=4)
+
+        # Flat periods only need the 09:16 prefetch bar, the 10:15 entry bar and the 15:15 exit bar
+        clock = EventClock(df.index, time(9, 16), time(15, 25), nseCalendar)
+        clock.addTimeOfDay(time(9, 16))
+        clock.addTimeOfDay(time(10, 15))
+        clock.addTimeOfDay(time(15, 15))
+
+        for timeData in clock.run(lambda: self.book.empty): 
 
             self.timeData = float(timeData)
             self.humanTime = datetime.fromtimestamp(timeData)
-            print(self.humanTime)
-
-            if (self.humanTime.time() < time(9, 16)) | (self.humanTime.time() > time(15, 30)):
-                continue
 
+            # The clock only stops inside 09:16-15:25 of trading sessions, no per-bar time check needed
             lastIndexTimeData.pop(0)
             lastIndexTimeData.append(timeData-60)
             if (timeData-300) in df_5min.index:
                 last5MinIndexTimeData.pop(0)
                 last5MinIndexTimeData.append(timeData-300)
 
-            if (self.humanTime.time() < time(9, 16)) | (self.humanTime.time() > time(15, 25)):
-                continue
-
             if (timeData-300) in df_5min.index:
                 self.strategyLogger.info(f"Datetime: {self.humanTime}\tClose: {df.at[lastIndexTimeData[1],'c']}")
 
-            if not self.openPnl.empty:
-                for index, row in self.openPnl.iterrows():
-                    try:
-                        data = self.fetchAndCacheFnoHistData(row["Symbol"], lastIndexTimeData[1])
-                        self.openPnl.at[index, "CurrentPrice"] = data["c"]
-                    except Exception as e:
-                        self.strategyLogger.info(e)
+            self.prefetch(df.at[lastIndexTimeData[1], 'c'] if lastIndexTimeData[1] in df.index else np.nan)
 
-            self.pnlCalculator()
+            if not self.book.empty:
+                self.book.refresh(lastIndexTimeData[1], self.fetchAndCacheFnoHistData, self.strategyLogger)
 
-           
-            if not self.openPnl.empty:
-                for index, row in self.openPnl.iterrows():
+            self.pnlCalculator()
 
-                    if self.humanTime.time() == time(15, 15):
-                        exitType = "TimeUp"
-                        self.exitOrder(index, exitType)
+            if not self.book.empty and self.humanTime.time() == time(15, 15):
+                self.book.exitAll(self.timeData, "TimeUp")
 
             # tradecount = self.openPnl['Symbol'].str[-2:].value_counts()
             # callCounter= tradecount.get('CE',0)
             # putCounter= tradecount.get('PE',0)
 
-            if ((timeData-300) in df_5min.index) and self.openPnl.empty and self.humanTime.time() == time(10, 15):
+            if ((timeData-300) in df_5min.index) and self.book.empty and self.humanTime.time() == time(10, 15):
                 
                 #Call Entry
                 callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"],expiry= Currentexpiry)
@@ -94,7 +94,7 @@ class algoLogic(optOverNightAlgoLogic):
                 except Exception as e:
                     self.strategyLogger.info(e)
 
-                self.entryOrder(data["c"], callSym, lotSize, "SELL")
+                self.book.entry(self.timeData, data["c"], callSym, lotSize, "SELL")
                 
                 #callHedge Entry
                 callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"],expiry= Currentexpiry, otmFactor=2)
@@ -104,7 +104,7 @@ class algoLogic(optOverNightAlgoLogic):
                 except Exception as e:
                     self.strategyLogger.info(e)
 
-                self.entryOrder(data["c"], callSym, lotSize, "SELL")
+                self.book.entry(self.timeData, data["c"], callSym, lotSize, "SELL")
 
                 #Put Entry
                 putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"],expiry= Currentexpiry)
@@ -114,7 +114,7 @@ class algoLogic(optOverNightAlgoLogic):
                 except Exception as e:
                     self.strategyLogger.info(e)
 
-                self.entryOrder(data["c"], putSym, lotSize, "SELL")
+                self.book.entry(self.timeData, data["c"], putSym, lotSize, "SELL")
 
                 #Put Hedge Entry
                 putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"],expiry= Currentexpiry,otmFactor=2)
@@ -124,8 +124,9 @@ class algoLogic(optOverNightAlgoLogic):
                 except Exception as e:
                     self.strategyLogger.info(e)
 
-                self.entryOrder(data["c"], putSym, lotSize, "BUY")
+                self.book.entry(self.timeData, data["c"], putSym, lotSize, "BUY")
 
+        self.stopPrefetch()
         self.pnlCalculator()
         self.combinePnlCsv()
 
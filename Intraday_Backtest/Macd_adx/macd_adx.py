@@ -1,11 +1,12 @@
 import numpy as np
 import talib as ta
 # import ta
-from backtestTools.expiry import getExpiryData
+from backtestUtils.expiryCalendar import getExpiryData
 from datetime import datetime, time, timedelta
 from backtestTools.algoLogic import optOverNightAlgoLogic, optIntraDayAlgoLogic
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
 from backtestTools.histData import getFnoBacktestData
+from backtestUtils.lookback import fetchLookback
 import multiprocessing as mp
 
 class algoLogic(optIntraDayAlgoLogic):
@@ -40,7 +41,7 @@ class algoLogic(optIntraDayAlgoLogic):
 
         try:
             df = getFnoBacktestData(indexSym, startEpoch, endEpoch, "1Min")
-            df_5min = getFnoBacktestData(indexSym, startEpoch - 432000, endEpoch, "5Min")#fetching 15min data of nifty
+            df_5min = fetchLookback(getFnoBacktestData, indexSym, startEpoch, endEpoch, "5Min", warmupBars=250)#fetching 15min data of nifty
             df_5min['adx'] = ta.ADX(df_5min['h'], df_5min['l'], df_5min['c'], timeperiod=14)
             df_5min['macd'], df_5min['macdsignal'], df_5min['macdhist'] = ta.MACD(df_5min['c'], fastperiod=12, slowperiod=26, signalperiod=9)#adding columns for macd
             df_5min.dropna(inplace=True)
@@ -6,6 +6,7 @@ from datetime import datetime, time, timedelta
 from backtestTools.algoLogic import optOverNightAlgoLogic, optIntraDayAlgoLogic
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
 from backtestTools.histData import getFnoBacktestData
+from backtestUtils.lookback import fetchLookback
 import multiprocessing as mp
 
 class algoLogic(optIntraDayAlgoLogic):
@@ -44,7 +45,7 @@ class algoLogic(optIntraDayAlgoLogic):
         #creating a dataframe of nifty and nifty 15min
         try:
             df = getFnoBacktestData(indexSym, startEpoch, endEpoch, "1Min")#fetching 1min data of nifty
-            df_15min = getFnoBacktestData(indexSym, startEpoch - 432000, endEpoch, "15Min")#fetching 15min data of nifty
+            df_15min = fetchLookback(getFnoBacktestData, indexSym, startEpoch, endEpoch, "15Min", warmupBars=100)#fetching 15min data of nifty
         except Exception as e:
             self.strategyLogger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}")
             raise Exception(e) #raising exception if data is not found
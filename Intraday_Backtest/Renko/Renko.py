@@ -1,3 +1,4 @@
+import os
 import numpy as np
 import talib as ta
 from datetime import datetime, time
@@ -5,86 +6,90 @@ from backtestTools.algoLogic import optIntraDayAlgoLogic
 from backtestTools.histData import getFnoBacktestData
 from backtestTools.expiry import getExpiryData    # use groupby to group current-renko for log,CSV issue
 import pandas_ta as pta
-import multiprocessing as mp
 from datetime import datetime, timedelta, time
 from backtestTools.util import setup_logger
 import indicators as indicators
+from backtestUtils.tradingCalendar import nseCalendar
 import pandas as pd 
 
 class Renko(optIntraDayAlgoLogic):
+    warmupDays = 30
+
     def __init__(self, devName, strategyName, version):
         super().__init__(devName, strategyName, version)
         self.max_loss = 8000
         self.daily_pnl = 0
         self.last_pnl_checkpoints = [0]  #  profit checkpoints for trailing stop adjustment
 
-    def run(self, startDate, endDate, baseSym, indexSym):
+    def renkoFrame(self, bricks):
+        # Bricks in the strategy's o/h/l/c format, indexed by the epoch of the bar that formed them
+        renkoData = bricks.rename(
+            columns={
+                "open": "o",
+                "high": "h",
+                "low": "l",
+                "close": "c",
+                "date": "datetime",
+            }
+        )
+        renkoData.index = renkoData["datetime"].values.astype("datetime64[s]").astype(np.int64) - 19800
+        renkoData.insert(loc=0, column="ti", value=renkoData.index)
+        renkoData['signal'] = np.where(renkoData['uptrend'] == True, 1, -1)
+        return renkoData
+
+    def renkoBars(self, df):
+        # Column names indicators.Renko works on
+        return df.rename(columns={"o": "open", "h": "high", "l": "low", "c": "close", "datetime": "date"})
+
+    def run(self, startDate, endDate, baseSym, indexSym, resumeState=None):
+        """
+        Backtests every day from startDate to endDate in this process.
+
+        The Renko chart is built once and carried from day to day: it starts
+        from the warmupDays of bars before startDate (or from resumeState, the
+        state file an earlier run saved for the session before startDate),
+        each day's bars are added to it with that day's brick size, and its
+        state is saved at the end of every day. Every minute is read and
+        turned into bricks only once. Only the bricks carry over: signals
+        start afresh each day and trade from that day's first brick, as when
+        every day was run on its own.
+        """
         startepoch = startDate.timestamp()
         endepoch = endDate.timestamp()
 
-        #SetUp Logger
-        date = startDate.strftime('%Y-%m-%d')
-        daily_strategy_logger = setup_logger(
-            f"strategyLogger_{str(date)}", f"{self.fileDir['backtestResultsStrategyLogs']}/backTest_{str(date)}.log",)
-
-
         try:
-            df = getFnoBacktestData(indexSym, startepoch - (86400 * 30), endepoch, '1Min')
+            df = getFnoBacktestData(indexSym, startepoch, endepoch, '1Min')
         except Exception as e:
-            daily_strategy_logger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}: {e}")
+            self.strategyLogger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}: {e}")
             raise Exception(e)
 
         if df is None:
             self.strategyLogger.info(f"Data fetch returned None for {baseSym} between {startDate} and {endDate}.")
             raise Exception(f"Data not available for {baseSym} between {startDate} and {endDate}.")
 
-
-        def getRenkoData(df, renkoSize):
-                
-
-            df = df.rename(
-                columns={
-                    "o": "open",
-                    "h": "high",
-                    "l": "low",
-                    "c": "close",
-                    "datetime": "date",
-                }
-            ) #convert open high low close for Renko
-            renko = indicators.Renko(df)
-            renko.brick_size = renkoSize
-            renko.chart_type = indicators.Renko.PERIOD_CLOSE
-            renkoData = renko.get_ohlc_data()
-
-            renkoData = renkoData.rename(
-                columns={
-                    "open": "o",
-                    "high": "h",
-                    "low": "l",
-                    "close": "c",
-                    "date": "datetime",
-                }
-            ) #convert back to ohlc format
-            
-            renkoData["datetime2"] = renkoData["datetime"]
-            renkoData.set_index("datetime2", inplace=True)
-            renkoData = renkoData.reset_index().set_index("datetime2").sort_index()
-
-            renkoData.index = (renkoData.index.values.astype(
-                np.int64) // 10**9) - 19800  # type: ignore
-            renkoData.insert(loc=0, column="ti", value=renkoData.index)
-
-            renkoSize = renkoSize
-
-            return renkoData
-
-        df = df[df.index >= startepoch]
         df.dropna(inplace=True)
-       
-
-        df.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexName}_1Min.csv")
-      # df_renko.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexName}_Renko.csv")
-
+        df.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexSym}_1Min.csv")
+
+        renko = None
+        if resumeState is not None:
+            renko = indicators.Renko(self.renkoBars(df))
+            state = renko.load_state(resumeState)
+            startDay = startepoch - (startepoch + 19800) % 86400
+            previousDay = str(np.datetime64(int(nseCalendar.tradingDays(startDay - 86400 * 15, startDay - 1)[-1]), "D"))
+            if state.get('day') != previousDay:
+                raise ValueError(f"resumeState {resumeState} is for {state.get('day')}, expected {previousDay}, the session before {startDate.date()}")
+        else:
+            warmup = getFnoBacktestData(indexSym, startepoch - (86400 * self.warmupDays), startepoch - 1, '1Min')
+            if warmup is not None:
+                warmup = warmup.dropna()
+            if warmup is not None and len(warmup) > 1:
+                renko = indicators.Renko(self.renkoBars(warmup))
+                renko.brick_size = round(df['c'].iloc[0] * 0.0015)
+                renko.chart_type = indicators.Renko.PERIOD_CLOSE
+                renko.get_ohlc_data()
+
+        stateDir = os.path.join(self.fileDir['backtestResultsCandleData'], "renkoState")
+        os.makedirs(stateDir, exist_ok=True)
 
         col = ['Target', 'Stoploss', 'Expiry']
         self.addColumnsToOpenPnlDf(col)
@@ -94,7 +99,6 @@ class Renko(optIntraDayAlgoLogic):
         current_renko=None
         callTradeCounter=0
         putTradeCounter=0
-        lotSize = int(getExpiryData(startDate.timestamp(), baseSym)["LotSize"])
 
         lastindextimeData = [0, 0]
         lastindextimeData_r=[0,0]
@@ -107,15 +111,41 @@ class Renko(optIntraDayAlgoLogic):
 
             #Updating Renko
             if current_day != new_day:
+                if current_day is not None:
+                    renko.save_state(os.path.join(stateDir, f"{current_day}.json"), day=str(current_day))
                 current_day=new_day
-                day_close=df.loc[df.index[0],'c']
+
+                # Signals start afresh every day, only the bricks carry over
+                previous_renko = None
+                current_renko = None
+                lastindextimeData = [0, 0]
+                lastindextimeData_r = [0, 0]
+
+                #SetUp Logger
+                daily_strategy_logger = setup_logger(
+                    f"strategyLogger_{str(current_day)}", f"{self.fileDir['backtestResultsStrategyLogs']}/backTest_{str(current_day)}.log",)
+                lotSize = int(getExpiryData(self.timeData, baseSym)["LotSize"])
+
+                # Daily loss limit and its trail start over every day
+                self.max_loss = 8000
+                self.last_pnl_checkpoints = [0]
+                day_start_pnl = None
+
+                dayStart = timeData - (timeData + 19800) % 86400
+                dayBars = self.renkoBars(df[(df.index >= dayStart) & (df.index < dayStart + 86400)])
+                day_close=dayBars['close'].iloc[0]
                 renkoSize=round(day_close * 0.0015)
                 daily_strategy_logger.info(f"Datetime:{self.humanTime}\tRenkoSize:{renkoSize}\tDayClose:{day_close}")
-                df_renko=getRenkoData(df,renkoSize)
-                # df_renko['uptrend'] = df_renko['uptrend']
-                df_renko['signal']=np.where(df_renko['uptrend']==True,1,-1)
-                df_renko.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexName}_Renko.csv")
 
+                if renko is None:
+                    # Nothing before the first day to start from
+                    renko = indicators.Renko(dayBars)
+                    renko.brick_size = renkoSize
+                    renko.chart_type = indicators.Renko.PERIOD_CLOSE
+                    df_renko = self.renkoFrame(renko.get_ohlc_data())
+                else:
+                    renko.brick_size = renkoSize
+                    df_renko = self.renkoFrame(renko.extend_bricks(dayBars))
 
             # Skip time periods outside trading hours
             if self.humanTime.time() < time(9, 16) or self.humanTime.time() > time(15, 15):
@@ -147,9 +177,11 @@ class Renko(optIntraDayAlgoLogic):
                         self.strategyLogger.info(e)
 
             self.pnlCalculator()
+            if day_start_pnl is None:
+                day_start_pnl = self.netPnl
           
             # Trail MaxLoss
-            self.daily_pnl = self.netPnl
+            self.daily_pnl = self.netPnl - day_start_pnl
             if self.daily_pnl - self.last_pnl_checkpoints[-1] >= 500:
                 self.max_loss = max(8000 - (len(self.last_pnl_checkpoints) * 500), 0)
                 self.last_pnl_checkpoints.append(self.daily_pnl)
@@ -224,6 +256,10 @@ class Renko(optIntraDayAlgoLogic):
             lastindextimeData_r.append(timeData)
 
         
+        if renko is not None:
+            renko.save_state(os.path.join(stateDir, f"{current_day}.json"), day=str(current_day))
+            self.renkoFrame(renko.cdf).to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexSym}_Renko.csv")
+
         self.pnlCalculator()
         self.combinePnlCsv()
 
@@ -248,27 +284,9 @@ if __name__ == "__main__":
     baseSym = "NIFTY"
     indexName = "NIFTY 50"
 
-    # Configure number of processes to be created
-    maxConcurrentProcesses = 4
-    processes = []
-
-    # Start a loop from Start Date to End Date
-    currentDate = startDate
-    while currentDate <= endDate:
-        # Define trading period for Current day
-        startTime = datetime(currentDate.year, currentDate.month, currentDate.day, 9, 15, 0)
-        endTime = datetime(currentDate.year, currentDate.month, currentDate.day, 15, 30, 0)
-
-        p = mp.Process(target=algo.run, args=(startTime, endTime, baseSym, indexName))
-        p.start()
-        processes.append(p)
-
-        if len(processes) >= maxConcurrentProcesses:
-            for p in processes:
-                p.join()
-            processes = []
-
-        currentDate += timedelta(days=1)
+    # Days run in order in one process: each day's bricks carry on from the day before.
+    # To continue a later run from here, pass the last day's renkoState file as resumeState.
+    algo.run(startDate, endDate, baseSym, indexName)
 
     end = datetime.now()
     print(f"Done. Ended in {end-start}.")
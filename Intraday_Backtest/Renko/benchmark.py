@@ -0,0 +1,71 @@
+import time
+import pandas as pd
+from datetime import datetime
+from backtestUtils.histCache import getFnoBacktestData
+import indicators as indicators
+
+
+def loadMinutes(indexSym, startDate, endDate):
+    # 1-min index bars renamed to the open/high/low/close/date columns the charts expect
+    df = getFnoBacktestData(indexSym, startDate.timestamp(), endDate.timestamp(), "1Min")
+    df = df.dropna(subset=["c"])
+    return df.rename(columns={"o": "open", "h": "high", "l": "low", "c": "close", "datetime": "date"})
+
+
+def charts(df):
+    # One chart of each kind, sized for NIFTY like Renko.py sizes its bricks
+    renko = indicators.Renko(df)
+    renko.brick_size = round(df["close"].iloc[0] * 0.0015)
+    lineBreak = indicators.LineBreak(df)
+    pnf = indicators.PnF(df)
+    pnf.box_size = 10
+    return {
+        "Renko": (renko, renko.get_ohlc_data, renko.extend_bricks),
+        "LineBreak": (lineBreak, lineBreak.get_ohlc_data, lineBreak.extend_lines),
+        "PnF": (pnf, pnf.get_ohlc_data, pnf.extend_bricks),
+        "PnF bars": (pnf, pnf.get_bar_ohlc_data, None),
+    }
+
+
+def timeBatch(df):
+    results = {}
+    for name, (chart, build, _) in charts(df).items():
+        start = time.perf_counter()
+        out = build()
+        results[name] = (time.perf_counter() - start, len(out))
+    return results
+
+
+def timeStreaming(df):
+    # Seed on the first day, then extend one session at a time as a daily run would
+    days = pd.to_datetime(df.index, unit="s").normalize()
+    firstDay = days == days[0]
+    results = {}
+    for name, (chart, build, extend) in charts(df[firstDay]).items():
+        if extend is None:
+            continue
+        build()
+        start = time.perf_counter()
+        rows = 0
+        for _, session in df[~firstDay].groupby(days[~firstDay]):
+            rows += len(extend(session))
+        results[name] = (time.perf_counter() - start, rows)
+    return results
+
+
+if __name__ == "__main__":
+    startNow = datetime.now()
+
+    indexSym = "NIFTY 50"
+    startDate = datetime(2021, 1, 1, 9, 15)
+    endDate = datetime(2024, 12, 31, 15, 30)
+
+    df = loadMinutes(indexSym, startDate, endDate)
+    print(f"{indexSym} 1Min bars: {len(df)} from {startDate.date()} to {endDate.date()}")
+
+    for mode, results in (("batch", timeBatch(df)), ("streaming by day", timeStreaming(df))):
+        for name, (seconds, rows) in results.items():
+            print(f"{mode:>16}  {name:<10} {rows:>8} rows  {seconds:8.3f} s  {seconds / len(df) * 1e6:6.2f} us/bar")
+
+    endNow = datetime.now()
+    print(f"Done. Ended in {endNow-startNow}")
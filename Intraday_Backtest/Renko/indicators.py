@@ -1,8 +1,109 @@
+import json
 import numpy as np
 import pandas as pd
+from collections import deque
 # import ray.dataframe as pd
 
 
+def period_close_levels(close, brick_size, close_p1, uptrend):
+    """
+    Renko bricks formed by a series of closes, continuing from a brick that
+    closed at close_p1 in the given direction.
+
+    A bar adds bricks when its close is a whole brick beyond the last brick
+    close in the trend direction, or two bricks against it (a reversal,
+    whose first brick starts one brick back). Bars between those are skipped
+    in numpy chunks, so the Python loop runs once per bar that adds bricks.
+    Brick prices are built by repeated addition like a row-by-row walk would,
+    so they come out bit for bit the same.
+
+    Returns the index of the bar that formed each brick, and the brick
+    opens, closes and uptrend flags.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    bars, opens, closes, trends = [], [], [], []
+
+    pos, size = 0, 16
+    while pos < n:
+        end = min(pos + size, n)
+        with np.errstate(invalid='ignore'):
+            bricks = np.trunc((close[pos:end] - close_p1) / brick_size)
+        if uptrend:
+            hits = np.flatnonzero((bricks >= 1) | (bricks <= -2))
+        else:
+            hits = np.flatnonzero((bricks <= -1) | (bricks >= 2))
+        if not len(hits):
+            pos, size = end, size * 2
+            continue
+
+        i = pos + int(hits[0])
+        bricks = int(bricks[hits[0]])
+        if (bricks < 0) == uptrend:
+            # Reversal: the first brick opens one brick behind the last close
+            uptrend = not uptrend
+            count, skip = abs(bricks) - 1, 1
+        else:
+            count, skip = abs(bricks), 0
+        step = brick_size if uptrend else -brick_size
+        levels = np.add.accumulate(np.concatenate(([close_p1], np.full(count + skip, step))))[skip:]
+
+        bars.append(np.full(count, i))
+        opens.append(levels[:-1])
+        closes.append(levels[1:])
+        trends.append(np.full(count, uptrend))
+        close_p1 = levels[-1]
+        pos, size = i + 1, 16
+
+    if not bars:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0), np.empty(0, dtype=bool)
+    return np.concatenate(bars), np.concatenate(opens), np.concatenate(closes), np.concatenate(trends)
+
+
+class ChartRows:
+    """
+    Rows of a Renko, line break or point and figure chart in preallocated
+    columns that double in size when full, so adding bars a few at a time
+    stays linear instead of growing a DataFrame row by row.
+    """
+
+    columns = ['date', 'open', 'high', 'low', 'close', 'uptrend']
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.capacity = capacity
+        self.date = None
+        self.ohlc = None
+        self.uptrend = np.empty(capacity, dtype=bool)
+
+    def append(self, dates, ohlc, uptrend):
+        ohlc = np.asarray(ohlc)
+        if self.ohlc is None:
+            self.date = np.empty(self.capacity, dtype=np.asarray(dates).dtype)
+            self.ohlc = np.empty((self.capacity, 4), dtype=ohlc.dtype)
+        k = len(ohlc)
+        if self.size + k > self.capacity:
+            while self.size + k > self.capacity:
+                self.capacity *= 2
+            self.date = np.resize(self.date, self.capacity)
+            self.ohlc = np.resize(self.ohlc, (self.capacity, 4))
+            self.uptrend = np.resize(self.uptrend, self.capacity)
+        self.date[self.size:self.size + k] = dates
+        self.ohlc[self.size:self.size + k] = ohlc
+        self.uptrend[self.size:self.size + k] = uptrend
+        self.size += k
+
+    def frame(self, start=0):
+        end = self.size
+        if self.ohlc is None:
+            return pd.DataFrame(columns=self.columns)
+        data = {'date': self.date[start:end]}
+        for n, col in enumerate(self.columns[1:5]):
+            data[col] = self.ohlc[start:end, n]
+        data['uptrend'] = self.uptrend[start:end]
+        return pd.DataFrame(data)
+
+
 class Instrument:
 
     def __init__(self, df):
@@ -48,66 +149,69 @@ class Renko(Instrument):
         columns = ['date', 'open', 'high', 'low', 'close']
         self.df = self.df[columns]
 
-        self.cdf = pd.DataFrame(
-            columns=columns,
-            data=[],
-        )
-
-        # self.cdf.loc[0] = self.df.loc[0]
-        self.cdf.loc[0] = self.df.iloc[1]
+        # Seed brick: the first close floored to the brick grid, dated like the second bar
         close = self.df.iloc[0]['close'] // brick_size * brick_size
-        self.cdf.iloc[0, 1:] = [close - brick_size, close, close - brick_size, close]
-        self.cdf['uptrend'] = True
-
-        columns = ['date', 'open', 'high', 'low', 'close', 'uptrend']
-
-        for index, row in self.df.iterrows():
+        self.bricks = ChartRows()
+        seed = np.array([[close - brick_size, close, close - brick_size, close]], dtype=np.float64)
+        self.bricks.append(self.df['date'].values[1:2], seed, True)
 
-            close = row['close']
-            date = row['date']
-
-            row_p1 = self.cdf.iloc[-1]
-            uptrend = row_p1['uptrend']
-            close_p1 = row_p1['close']
-
-            bricks = int((close - close_p1) / brick_size)
-            data = []
-
-            if uptrend and bricks >= 1:
-                for i in range(bricks):
-                    r = [date, close_p1, close_p1 + brick_size, close_p1, close_p1 + brick_size, uptrend]
-                    data.append(r)
-                    close_p1 += brick_size
-            elif uptrend and bricks <= -2:
-                uptrend = not uptrend
-                bricks += 1
-                close_p1 -= brick_size
-                for i in range(abs(bricks)):
-                    r = [date, close_p1, close_p1, close_p1 - brick_size, close_p1 - brick_size, uptrend]
-                    data.append(r)
-                    close_p1 -= brick_size
-            elif not uptrend and bricks <= -1:
-                for i in range(abs(bricks)):
-                    r = [date, close_p1, close_p1, close_p1 - brick_size, close_p1 - brick_size, uptrend]
-                    data.append(r)
-                    close_p1 -= brick_size
-            elif not uptrend and bricks >= 2:
-                uptrend = not uptrend
-                bricks -= 1
-                close_p1 += brick_size
-                for i in range(abs(bricks)):
-                    r = [date, close_p1, close_p1 + brick_size, close_p1, close_p1 + brick_size, uptrend]
-                    data.append(r)
-                    close_p1 += brick_size
-            else:
-                continue
-
-            sdf = pd.DataFrame(data=data, columns=columns)
-            self.cdf = pd.concat([self.cdf, sdf])
-
-        self.cdf.reset_index(inplace=True, drop=True)
+        self.extend_bricks(self.df)
         return self.cdf
 
+    @property
+    def cdf(self):
+        return self.bricks.frame()
+
+    def extend_bricks(self, df):
+        """
+        Appends the bricks formed by the closes in df after the last brick,
+        and returns only the new ones. Feeding the bars in pieces gives the
+        same bricks as one period_close_bricks() over all of them.
+        """
+        start = self.bricks.size
+        bars, opens, closes, uptrend = period_close_levels(
+            df['close'].values, self.brick_size, self.bricks.ohlc[start - 1, 3], bool(self.bricks.uptrend[start - 1]))
+
+        if len(bars):
+            ohlc = np.column_stack((opens, np.where(uptrend, closes, opens), np.where(uptrend, opens, closes), closes))
+            self.bricks.append(df['date'].values[bars], ohlc, uptrend)
+        return self.bricks.frame(start)
+
+    def get_state(self):
+        """
+        The last brick and the brick size, which is all extend_bricks() needs
+        to carry on. Plain types, so it can be saved between sessions.
+        """
+        last = self.bricks.size - 1
+        open_, high, low, close = self.bricks.ohlc[last].tolist()
+        return {
+            'brick_size': self.brick_size,
+            'date': str(self.bricks.date[last]),
+            'open': open_,
+            'high': high,
+            'low': low,
+            'close': close,
+            'uptrend': bool(self.bricks.uptrend[last]),
+        }
+
+    def set_state(self, state):
+        # Restart the chart at a get_state() brick; bricks added later continue from it
+        self.brick_size = state['brick_size']
+        self.bricks = ChartRows()
+        ohlc = np.array([[state['open'], state['high'], state['low'], state['close']]], dtype=np.float64)
+        self.bricks.append(np.array([np.datetime64(state['date'])]), ohlc, state['uptrend'])
+
+    def save_state(self, path, **meta):
+        # meta (e.g. the session the state closes) is saved alongside, set_state ignores it
+        with open(path, 'w') as f:
+            json.dump({**meta, **self.get_state()}, f)
+
+    def load_state(self, path):
+        with open(path) as f:
+            state = json.load(f)
+        self.set_state(state)
+        return state
+
     def shift_bricks(self):
         shift = self.df['close'].iloc[-1] - self.bdf['close'].iloc[-1]
         if abs(shift) < self.brick_size:
@@ -121,57 +225,71 @@ class LineBreak(Instrument):
     line_number = 3
 
     def uptrend_reversal(self, close):
-        lows = [self.cdf.iloc[i]['low'] for i in range(-1, -self.line_number - 1, -1)]
-        least = min(lows)
-        return close < least
+        return close < min(self.lows)
 
     def downtrend_reversal(self, close):
-        highs = [self.cdf.iloc[i]['high'] for i in range(-1, -self.line_number - 1, -1)]
-        highest = max(highs)
-        return close > highest
+        return close > max(self.highs)
+
+    @property
+    def cdf(self):
+        return self._lines_frame(self.lines.frame())
+
+    def _lines_frame(self, df, start=0):
+        # The seed lines keep their row numbers and every later line 0, as
+        # the row-by-row concat left them before reset_index
+        index = np.arange(start, start + len(df))
+        df.insert(0, 'index', np.where(index < self.line_number, index, 0))
+        return df
 
     def get_ohlc_data(self):
         columns = ['date', 'open', 'high', 'low', 'close']
         self.df = self.df[columns]
 
-        self.cdf = pd.DataFrame(columns=columns, data=[])
-
-        for i in range(self.line_number):
-            self.cdf.loc[i] = self.df.iloc[i]
-
-        self.cdf['uptrend'] = True
-
-        columns = ['date', 'open', 'high', 'low', 'close', 'uptrend']
-
-        for index, row in self.df.iterrows():
-
-            close = row['close']
+        # The first line_number bars are the seed lines, all counted as uptrend
+        seed = self.df.iloc[:self.line_number]
+        self.lines = ChartRows()
+        self.lines.append(seed['date'].values, seed[columns[1:]].values, True)
+        self.lows = deque(seed['low'].tolist(), maxlen=self.line_number)
+        self.highs = deque(seed['high'].tolist(), maxlen=self.line_number)
+        self.uptrend = True
 
-            row_p1 = self.cdf.iloc[-1]
-
-            uptrend = row_p1['uptrend']
-
-            open_p1 = row_p1['open']
-            close_p1 = row_p1['close']
+        self.extend_lines(self.df)
+        return self.cdf
 
+    def extend_lines(self, df):
+        """
+        Streaming form of get_ohlc_data(): adds the lines the closes in df
+        draw after the current last line and returns just those lines.
+        """
+        start = self.lines.size
+        uptrend = self.uptrend
+        open_p1, _, _, close_p1 = self.lines.ohlc[start - 1].tolist()
+
+        rows, ohlc, trend = [], [], []
+        for i, close in enumerate(df['close'].tolist()):
             if uptrend and close > close_p1:
-                r = [close_p1, close, close_p1, close]
+                r = (close_p1, close, close_p1, close)
             elif uptrend and self.uptrend_reversal(close):
                 uptrend = not uptrend
-                r = [open_p1, open_p1, close, close]
+                r = (open_p1, open_p1, close, close)
             elif not uptrend and close < close_p1:
-                r = [close_p1, close_p1, close, close]
+                r = (close_p1, close_p1, close, close)
             elif not uptrend and self.downtrend_reversal(close):
                 uptrend = not uptrend
-                r = [open_p1, close, open_p1, close]
+                r = (open_p1, close, open_p1, close)
             else:
                 continue
+            rows.append(i)
+            ohlc.append(r)
+            trend.append(uptrend)
+            open_p1, close_p1 = r[0], r[3]
+            self.highs.append(r[1])
+            self.lows.append(r[2])
 
-            sdf = pd.DataFrame(data=[[row['date']] + r + [uptrend]], columns=columns)
-            self.cdf = pd.concat([self.cdf, sdf])
-
-        self.cdf.reset_index(inplace=True)
-        return self.cdf
+        self.uptrend = uptrend
+        if rows:
+            self.lines.append(df['date'].values[rows], ohlc, trend)
+        return self._lines_frame(self.lines.frame(start), start)
 
 
 class PnF(Instrument):
@@ -182,6 +300,10 @@ class PnF(Instrument):
     def brick_size(self):
         return self.box_size
 
+    @property
+    def cdf(self):
+        return self.bricks.frame(1)
+
     def get_state(self, uptrend_p1, bricks):
         state = None
         if uptrend_p1 and bricks > 0:
@@ -199,96 +321,108 @@ class PnF(Instrument):
 
     def get_ohlc_data(self, source='close'):
         source = source.lower()
-        box_size = self.box_size
-        data = self.df.itertuples()
+        if source not in ('close', 'hl'):
+            raise ValueError("source should be 'close' or 'hl'")
+        self.source = source
 
-        uptrend_p1 = True
+        # Seed box the first bricks count from; it is not part of the output
         if source == 'close':
-            open_ = self.df.iloc[0]['open']
-            close = self.roundit(open_, base=self.box_size)
-            pnf_data = [[0, 0, 0, 0, close, True]]
+            close = self.roundit(self.df.iloc[0]['open'], base=self.box_size)
+            seed = [0, 0, 0, close]
         else:
-            low = self.df.iloc[0]['low']
-            open_ = self.roundit(low, base=self.box_size)
-            pnf_data = [[0, 0, open_, open_, open_, True]]
+            open_ = self.roundit(self.df.iloc[0]['low'], base=self.box_size)
+            seed = [0, open_, open_, open_]
+        # Integer boxes on the rounded seed stay integers, as in the row-by-row build
+        dtype = np.int64 if isinstance(self.box_size, (int, np.integer)) else np.float64
+        self.bricks = ChartRows()
+        self.bricks.append(self.df['date'].values[:1], np.array([seed], dtype=dtype), True)
+        self.uptrend = True
+
+        self.extend_bricks(self.df)
+        return self.cdf
 
-        for row in data:
-            date = row.date
-            close = row.close
+    def extend_bricks(self, df):
+        """
+        Streaming form of get_ohlc_data(): adds the boxes the bars in df
+        make after the current last box and returns just those boxes.
+        """
+        box_size = self.box_size
+        start = self.bricks.size
+        uptrend_p1 = self.uptrend
+        _, high_p1, low_p1, close_p1 = self.bricks.ohlc[start - 1].tolist()
 
-            open_p1 = pnf_data[-1][1]
-            high_p1 = pnf_data[-1][2]
-            low_p1 = pnf_data[-1][3]
-            close_p1 = pnf_data[-1][4]
+        closes = df['close'].tolist()
+        if self.source == 'hl':
+            highs, lows = df['high'].tolist(), df['low'].tolist()
 
-            if source == 'close':
+        rows, data, trend = [], [], []
+        for i, close in enumerate(closes):
+            if self.source == 'close':
                 bricks = int((close - close_p1) / box_size)
-            elif source == 'hl':
-                if uptrend_p1:
-                    bricks = int((row.high - high_p1) / box_size)
-                else:
-                    bricks = int((row.low - low_p1) / box_size)
+            elif uptrend_p1:
+                bricks = int((highs[i] - high_p1) / box_size)
+            else:
+                bricks = int((lows[i] - low_p1) / box_size)
             state = self.get_state(uptrend_p1, bricks)
 
             if state is None:
                 continue
 
-            day_data = []
-
-            if state == self.UPTREND_CONTINUAL:
-                for i in range(bricks):
-                    r = [date, close_p1, close_p1 + box_size, close_p1, close_p1 + box_size, uptrend_p1]
-                    day_data.append(r)
-                    close_p1 += box_size
-            elif state == self.UPTREND_REVERSAL:
-                uptrend_p1 = not uptrend_p1
-                bricks += 1
-                close_p1 -= box_size
-                for i in range(abs(bricks)):
-                    r = [date, close_p1, close_p1, close_p1 - box_size, close_p1 - box_size, uptrend_p1]
-                    day_data.append(r)
-                    close_p1 -= box_size
-            elif state == self.DOWNTREND_CONTINUAL:
-                for i in range(abs(bricks)):
-                    r = [date, close_p1, close_p1, close_p1 - box_size, close_p1 - box_size, uptrend_p1]
-                    day_data.append(r)
-                    close_p1 -= box_size
-            elif state == self.DOWNTREND_REVERSAL:
+            level = close_p1
+            if state == self.UPTREND_REVERSAL or state == self.DOWNTREND_REVERSAL:
+                # The first box of a reversal starts one box back
                 uptrend_p1 = not uptrend_p1
-                bricks -= 1
-                close_p1 += box_size
-                for i in range(abs(bricks)):
-                    r = [date, close_p1, close_p1 + box_size, close_p1, close_p1 + box_size, uptrend_p1]
-                    day_data.append(r)
-                    close_p1 += box_size
-
-            pnf_data.extend(day_data)
-        self.cdf = pd.DataFrame(pnf_data[1:])
-        self.cdf.columns = ['date', 'open', 'high', 'low', 'close', 'uptrend']
-        return self.cdf
-
-    def get_bar_ohlc_data(self, source='close'):
-        df = self.get_ohlc_data(source=source)
-
-        df['trend_change'] = df['uptrend'].ne(df['uptrend'].shift().bfill()).astype(int)
-        df['trend_change_-1'] = df['trend_change'].shift(-1)
-
-        start = df.iloc[0].values
-        df = df[(df['trend_change'] == 1) | (df['trend_change_-1'] == 1)]
-        data = np.vstack([start, df.values])
-        df = pd.DataFrame(data)
-        df.columns = ['date', 'open', 'high', 'low', 'close', 'uptrend', 'tc', 'tc1']
-
-        bopen = df[['date', 'open']][df.index%2 == 0]
-        bclose = df[['date', 'close']][df.index%2 == 1]
+                level += -box_size if bricks < 0 else box_size
+                bricks = abs(bricks) - 1
+            else:
+                bricks = abs(bricks)
 
-        bopen.reset_index(inplace=True, drop=True)
-        bclose.reset_index(inplace=True, drop=True)
-        bopen['close'] = bclose['close']
-        df = bopen
+            for _ in range(bricks):
+                if uptrend_p1:
+                    data.append((level, level + box_size, level, level + box_size))
+                    level += box_size
+                else:
+                    data.append((level, level, level - box_size, level - box_size))
+                    level -= box_size
+            # The next bar counts from the last box drawn
+            if bricks:
+                _, high_p1, low_p1, close_p1 = data[-1]
+            rows.extend([i] * bricks)
+            trend.extend([uptrend_p1] * bricks)
+
+        self.uptrend = uptrend_p1
+        if rows:
+            self.bricks.append(df['date'].values[rows], np.array(data, dtype=self.bricks.ohlc.dtype), trend)
+        return self.bricks.frame(start)
 
-        df['high'] = df[['open', 'close']].max(axis=1)
-        df['low'] = df[['open', 'close']].min(axis=1)
-        df.dropna(inplace=True)
-        df[['open', 'close']] = df[['open', 'close']].astype(float)
-        return df
+    def get_bar_ohlc_data(self, source='close'):
+        self.get_ohlc_data(source=source)
+        return self.brick_bars()
+
+    def brick_bars(self):
+        """
+        One bar per column of boxes built so far: dated at and opening with
+        its first box, closing with its last. Pairs the first box and the
+        boxes either side of every trend change, as get_bar_ohlc_data always
+        has; the column still being drawn has no close yet and is left out.
+        """
+        df = self.cdf
+        if df.empty:
+            return pd.DataFrame(columns=['date', 'open', 'close', 'high', 'low'])
+        uptrend = df['uptrend'].values
+        change = uptrend != np.concatenate((uptrend[:1], uptrend[:-1]))
+        # A lone box has nothing to back-fill its shifted trend from and counts as a change
+        change[0] = len(uptrend) == 1
+        before_change = np.concatenate((change[1:], [False]))
+        rows = np.concatenate(([0], np.flatnonzero(change | before_change)))
+
+        first, last = rows[0::2], rows[1::2]
+        first = first[:len(last)]
+        bars = pd.DataFrame({
+            'date': df['date'].values[first],
+            'open': df['open'].values[first].astype(float),
+            'close': df['close'].values[last].astype(float),
+        })
+        bars['high'] = bars[['open', 'close']].max(axis=1)
+        bars['low'] = bars[['open', 'close']].min(axis=1)
+        return bars
@@ -1,7 +1,7 @@
 import numpy as np
 import talib as ta
 # import ta
-from backtestTools.expiry import getExpiryData
+from backtestUtils.expiryCalendar import getExpiryData
 from datetime import datetime, time, timedelta
 from backtestTools.algoLogic import optOverNightAlgoLogic, optIntraDayAlgoLogic
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
@@ -3,6 +3,7 @@ from backtestTools.algoLogic import optOverNightAlgoLogic
 from backtestTools.histData import getFnoBacktestData
 from datetime import datetime, time, timedelta
 from backtestTools.expiry import getExpiryData
+from backtestUtils.instruments import strikeOf
 import talib as ta
 import numpy as np
 import pandas as pd
@@ -61,7 +62,7 @@ class algoLogic(optOverNightAlgoLogic):
                     callSym = self.getCallSym(self.timeData, baseSym, df.at[lastIndexTimeData[1], "c"], MonthlyExpiry)
                     data_put = None
                     data_call = None
-                    strikePrice = putSym[-7:-2]
+                    strikePrice = strikeOf(putSym)
                     try:
                         data_put = self.fetchAndCacheFnoHistData(putSym, lastIndexTimeData[1])
                         data_call = self.fetchAndCacheFnoHistData(callSym, lastIndexTimeData[1])
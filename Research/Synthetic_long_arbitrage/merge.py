@@ -8,15 +8,15 @@ file2 = '/root/aniket/Research/Synthetic_long_arbitrage/synthetic.csv'
 df1 = pd.read_csv(file1)
 df2 = pd.read_csv(file2)
 
-# Select columns "c" and "symbol" from the first file
-df1_selected = df1[['c', 'symbol']]
+# Select columns "c" and "symbol" from the first file, keyed by the same
+# naive IST minute as synthetic.csv (ti is epoch seconds, IST is UTC+5:30)
+df1['Datetime'] = pd.to_datetime(df1['ti'] + 19800, unit='s')
+df1_selected = df1.set_index('Datetime')[['c', 'symbol']]
 
-# If you want to merge on index (row-wise), reset index to align
-df1_selected = df1_selected.reset_index(drop=True)
-df2 = df2.reset_index(drop=True)
-
-# Concatenate the columns to the second dataframe
-df_merged = pd.concat([df2, df1_selected], axis=1)
+# Join on the minute rather than the row position, so a missing bar on
+# either side cannot shift every row after it
+df2['Datetime'] = pd.to_datetime(df2['Datetime'])
+df_merged = df2.join(df1_selected, on='Datetime', how='left')
 
 # Save the result
 df_merged.to_csv('/root/aniket/Research/Synthetic_long_arbitrage/synthetic_with_c_symbol.csv', index=False)
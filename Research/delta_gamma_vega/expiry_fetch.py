@@ -1,4 +1,5 @@
 from backtestTools.histData import getFnoBacktestData
+from backtestUtils.bulkFetch import fetchMany
 from datetime import datetime
 import pandas as pd
 
@@ -29,11 +30,13 @@ if __name__ == "__main__":
     spot_df['datetime_min'] = spot_df['datetime'].dt.floor('5T')
     spot_df['date'] = spot_df['datetime_min'].dt.date
 
-    for option_type in option_types:
-        sym = get_option_symbol(baseSym, expiry_str, strike, option_type)
-        df = getFnoBacktestData(sym, startDate.timestamp(), endDate.timestamp(), "5Min")
-        if df is not None and not df.empty:
-            df['symbol'] = sym
+    symbols = [get_option_symbol(baseSym, expiry_str, strike, option_type) for option_type in option_types]
+    options_df = fetchMany(symbols, startDate.timestamp(), endDate.timestamp(), "5Min")
+
+    for symbolId, sym in enumerate(symbols):
+        df = options_df[options_df['symbolId'] == symbolId].drop(columns=['symbolId'])
+        if not df.empty:
+            df = df.astype({'symbol': str})
             # Convert option timestamps to IST
             if 't' in df.columns:
                 df['datetime'] = pd.to_datetime(df['t'], unit='s', utc=True).dt.tz_convert('Asia/Kolkata')
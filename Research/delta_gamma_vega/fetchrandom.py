@@ -1,4 +1,5 @@
 from backtestTools.histData import getFnoBacktestData
+from backtestUtils.bulkFetch import fetchMany
 from backtestTools.expiry import getExpiryData
 from datetime import datetime, timedelta
 import pandas as pd
@@ -58,12 +59,14 @@ if __name__ == "__main__":
     chosen_day = match_dates[0]
     print(f"Using date: {chosen_day}")
 
-    for option_type in option_types:
-        sym = get_option_symbol(baseSym, expiry_str, strike, option_type)
-        df = getFnoBacktestData(sym, startDate.timestamp(), endDate.timestamp(), "1Min")
+    symbols = [get_option_symbol(baseSym, expiry_str, strike, option_type) for option_type in option_types]
+    options_df = fetchMany(symbols, startDate.timestamp(), endDate.timestamp(), "1Min")
 
-        if df is not None and not df.empty:
-            df['symbol'] = sym
+    for symbolId, sym in enumerate(symbols):
+        df = options_df[options_df['symbolId'] == symbolId].drop(columns=['symbolId'])
+
+        if not df.empty:
+            df = df.astype({'symbol': str})
 
             # Prepare option data datetime and date columns
             if 't' in df.columns:
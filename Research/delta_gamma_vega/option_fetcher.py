@@ -1,20 +1,14 @@
 from backtestTools.histData import getFnoBacktestData
-from backtestTools.expiry import getExpiryData
+from backtestUtils.expiryCalendar import getCalendar
+from backtestUtils.bulkFetch import fetchMany
 from datetime import datetime, timedelta
 import pandas as pd
 
 def get_expiry_list(baseSym, startDate, endDate):
-    # Collect all unique expiry strings between startDate and endDate
-    expiry_set = set()
-    current = startDate
-    while current <= endDate:
-        expiry_info = getExpiryData(current.timestamp(), baseSym)
-        if expiry_info is not None:
-            expiry_str = expiry_info.get('CurrentExpiry')
-            if expiry_str:
-                expiry_set.add(expiry_str)
-        current += timedelta(days=1)
-    return sorted(expiry_set)
+    # Collect all unique expiry strings between startDate and endDate from the cached calendar
+    calendar = getCalendar(baseSym)
+    calendar.load(startDate, endDate)
+    return calendar.expiries(startDate, endDate)
 
 def get_option_symbol(baseSym, expiry_str, strike, option_type):
     # Correct format: NIFTY30JAN2524750CE
@@ -57,31 +51,34 @@ if __name__ == "__main__":
 
     print(f"Dates where index close == strike {strike}: {match_dates}")
 
-    for expiry_str in expiry_list:
-        for option_type in option_types:
-            sym = get_option_symbol(baseSym, expiry_str, strike, option_type)
-            df = getFnoBacktestData(sym, startDate.timestamp(), endDate.timestamp(), "1Min")
-
-            if df is not None and not df.empty:
-                df['symbol'] = sym
-
-                # Prepare option data datetime and date columns
-                if 't' in df.columns:
-                    df['datetime'] = pd.to_datetime(df['t'], unit='s')
-                else:
-                    df['datetime'] = pd.to_datetime(df.index, unit='s')
-                df['date'] = df['datetime'].dt.date
-
-                # For each matching date, save option data for that day
-                for day in match_dates:
-                    day_df = df[df['date'] == day]
-                    if not day_df.empty:
-                        outname = f"{sym}_{day}_1min.csv"
-                        day_df.to_csv(outname, index=False)
-                        print(f"Saved {sym} 1-min data for {day} to {outname}")
-                        found_any = True
-            else:
-                print(f"No data found for {sym}")
+    # Fetch every expiry x CE/PE symbol in one batched call
+    symbols = [get_option_symbol(baseSym, expiry_str, strike, option_type)
+               for expiry_str in expiry_list for option_type in option_types]
+    options_df = fetchMany(symbols, startDate.timestamp(), endDate.timestamp(), "1Min")
+
+    # Prepare option data datetime and date columns
+    if 't' in options_df.columns:
+        options_df['datetime'] = pd.to_datetime(options_df['t'], unit='s')
+    else:
+        options_df['datetime'] = pd.to_datetime(options_df.index, unit='s')
+    options_df['date'] = options_df['datetime'].dt.date
+
+    for symbolId, sym in enumerate(symbols):
+        df = options_df[options_df['symbolId'] == symbolId]
+
+        if not df.empty:
+            df = df.drop(columns=['symbolId']).astype({'symbol': str})
+
+            # For each matching date, save option data for that day
+            for day in match_dates:
+                day_df = df[df['date'] == day]
+                if not day_df.empty:
+                    outname = f"{sym}_{day}_1min.csv"
+                    day_df.to_csv(outname, index=False)
+                    print(f"Saved {sym} 1-min data for {day} to {outname}")
+                    found_any = True
+        else:
+            print(f"No data found for {sym}")
 
     if not found_any:
         print("No option data found for any expiry/strike/date combination where index == strike.")
\ No newline at end of file
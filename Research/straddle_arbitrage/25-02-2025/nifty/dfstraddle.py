@@ -1,12 +1,15 @@
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
 from backtestTools.algoLogic import optOverNightAlgoLogic
 from backtestTools.histData import getFnoBacktestData
+from backtestUtils.lookback import fetchLookback
 import numpy as np
 import talib as ta
 import pandas_ta as taa
 from backtestTools.expiry import getExpiryData
 from datetime import datetime, time, timedelta
 import pandas as pd
+from backtestUtils.eventClock import minuteOfDay
+from backtestUtils.strikeSelect import selectStrikes, buildSymbols, fetchSeries
 
 class algoLogic(optOverNightAlgoLogic):
 
@@ -23,7 +26,7 @@ class algoLogic(optOverNightAlgoLogic):
             if df is None:
                 raise ValueError(f"No data returned for {indexSym} in the range {startDate} to {endDate}")
             
-            df_5min = getFnoBacktestData(indexSym, startEpoch - 886400, endEpoch, "5Min")
+            df_5min = fetchLookback(getFnoBacktestData, indexSym, startEpoch, endEpoch, "5Min", warmupBars=500)
             if df_5min is None:
                 raise ValueError(f"No 5Min data returned for {indexSym} in the range {startDate} to {endDate}")
         except Exception as e:
@@ -146,48 +149,29 @@ class algoLogic(optOverNightAlgoLogic):
         return self.closedPnl, self.fileDir["backtestResultsStrategyUid"]
 
 def create_combined_premium_dataframe(algo, df, baseSym, Currentexpiry):
-    data_list = []
-
-    for timeData in df.index:
-        try:
-            # Convert timestamp to human-readable datetime
-            humanTime = datetime.fromtimestamp(timeData)
-
-            # Skip rows outside trading hours
-            if (humanTime.time() < time(9, 16)) or (humanTime.time() > time(15, 00)):
-                continue
-
-            # Get call and put symbols with otmFactor=0
-            callSym = algo.getCallSym(timeData, baseSym, df.at[timeData, "c"], expiry=Currentexpiry, otmFactor=0)
-            putSym = algo.getPutSym(timeData, baseSym, df.at[timeData, "c"], expiry=Currentexpiry, otmFactor=0)
-
-            # Fetch premium data for call and put symbols
-            call_data = algo.fetchAndCacheFnoHistData(callSym, timeData)
-            put_data = algo.fetchAndCacheFnoHistData(putSym, timeData)
-
-            # Extract premium values
-            premium_call = call_data["c"]
-            premium_put = put_data["c"]
-
-            # Calculate combined premium
-            combined_premium = premium_call + premium_put
-
-            # Append data to the list
-            data_list.append({
-                "Datetime": humanTime,
-                "callSym": callSym,
-                "PremiumcallSym": premium_call,
-                "putSym": putSym,
-                "PremiumputSym": premium_put,
-                "Combined_Premium": combined_premium
-            })
-
-        except Exception as e:
-            algo.strategyLogger.info(f"Error processing timeData {timeData}: {e}")
-            continue
-
-    # Create DataFrame from the collected data
-    df_combined = pd.DataFrame(data_list)
+    # Skip rows outside trading hours
+    minutes = df.index.values.astype(np.float64)
+    mod = minuteOfDay(minutes)
+    inSession = (mod >= 9 * 60 + 16) & (mod <= 15 * 60)
+    minutes = minutes[inSession]
+
+    # ATM strikes (otmFactor=0) for every minute at once, symbols built once per strike
+    strikes = selectStrikes(df["c"].values[inSession], baseSym, otmFactor=0)
+    callSyms = buildSymbols(baseSym, Currentexpiry, strikes["CE"], "CE")
+    putSyms = buildSymbols(baseSym, Currentexpiry, strikes["PE"], "PE")
+
+    # Premium series for call and put symbols, one fetch per unique symbol
+    premium_call = fetchSeries(callSyms, minutes)
+    premium_put = fetchSeries(putSyms, minutes)
+
+    df_combined = pd.DataFrame({
+        "Datetime": [datetime.fromtimestamp(t) for t in minutes],
+        "callSym": callSyms,
+        "PremiumcallSym": premium_call,
+        "putSym": putSyms,
+        "PremiumputSym": premium_put,
+        "Combined_Premium": premium_call + premium_put,
+    })
     df_combined['Put-Call Ratio'] = df_combined['PremiumcallSym'] / df_combined['PremiumputSym']
 
     # Drop any rows with missing data
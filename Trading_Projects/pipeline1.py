@@ -3,10 +3,9 @@ import numpy as np
 import os
 import logging
 from datetime import datetime, timedelta
-from ta.momentum import RSIIndicator
-from ta.trend import MACD, ADXIndicator, EMAIndicator, SMAIndicator
-from ta.volatility import BollingerBands, AverageTrueRange
 from backtestTools.histData import getEquityBacktestData
+from backtestUtils.lookback import fetchLookback
+from backtestUtils.streamIndicators import EMA, RSI, MACD, ADX, ATR, Bollinger
 from multiprocessing import Pool
 from concurrent.futures import ThreadPoolExecutor
 
@@ -32,88 +31,66 @@ def load_stock_names(file_path):
                 stocks.append(ticker)
     return stocks
 
-def get_buffer_days(std_window, interval_minutes):
+def get_buffer_bars(std_window):
     """
-    Calculate buffer days needed for indicator calculation.
-    For intraday data, buffer is std_window * interval.
-    For daily data, buffer is std_window days.
+    Bars of buffer calculate_indicators needs before start_date.
+    The longest lookback among the indicators (MACD 12/26/9 needs 33 bars,
+    ADX(14) 27, Bollinger(20) 19, the std_window SMA/EMA/STD of log returns
+    std_window) is multiplied by 4 so the EMA based ones have converged
+    by start_date, not just produced a first value.
     """
-    # For 30min interval, 1 day = 13 bars (assuming 6.5h trading)
-    if interval_minutes >= 1440:
-        return std_window
-    else:
-        # Add 2 days buffer for safety for intraday
-        return std_window // (13 if interval_minutes == 30 else 1) + 2
+    longest = max(26 + 9 - 2, 2 * 14 - 1, 20 - 1, std_window)
+    return 4 * longest
 
 def fetch_data_with_buffer(stock, start_date, end_date, std_window, interval):
     """
-    Fetch data with enough buffer before start_date to ensure indicators can be calculated.
-    Uses UNIX epochs for date calculations.
-    If data is not available, keep shifting start date backward until enough buffer is found.
-    Logs if buffer data is not found and tries earlier dates until data is found.
+    Fetch data with get_buffer_bars(std_window) bars before start_date so indicators can be calculated.
+    The buffer start comes from the NSE trading calendar and the data index,
+    so the range is read in one query instead of stepping back a day at a time.
     """
     # Convert start and end dates to datetime and then to epoch
-    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-    start_epoch = int(start_dt.timestamp())
-    end_epoch = int(end_dt.timestamp())
-
-    # Calculate buffer in seconds (1 day = 86400 seconds)
-    buffer_days = std_window + 2  # Minimum buffer for indicators
-    seconds_in_day = 86400
-
-    # Try to find earliest available buffer date using epochs
-    for extra_days in range(buffer_days, buffer_days + 30):  # Try up to 30 more days back
-        buffer_start_epoch = start_epoch - (extra_days * seconds_in_day)
-        buffer_start_dt = datetime.fromtimestamp(buffer_start_epoch)
-        df = getEquityBacktestData(stock, buffer_start_dt, end_dt, interval)
-        if df is not None and not df.empty:
-            # Check if we have at least some data before start_date
-            df.index = pd.to_datetime(df.index)
-            if (df.index < start_dt).any():
-                return df
-            else:
-                logging.warning(f"No buffer data before {start_date} for {stock}, trying earlier epoch {buffer_start_dt.date()}...")
-        else:
-            logging.warning(f"No data found for {stock} from {buffer_start_dt.date()} to {end_dt.date()}, trying earlier epoch...")
+    start_epoch = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp())
+    end_epoch = int(datetime.strptime(end_date, "%Y-%m-%d").timestamp())
+
+    buffer_bars = get_buffer_bars(std_window)
+    df = fetchLookback(getEquityBacktestData, stock, start_epoch, end_epoch, interval, buffer_bars)
+    if df is None or df.empty:
+        logging.error(f"No data found for {stock} from {start_date} to {end_date}")
+        return None
 
-    # If no buffer data found after all attempts, log and return None
-    logging.error(f"Insufficient buffer data for {stock} even after checking 30 extra days before {start_date}")
-    return None
+    if df.attrs["warmupBars"] < buffer_bars:
+        logging.warning(f"Only {df.attrs['warmupBars']} of {buffer_bars} buffer bars before {start_date} for {stock}")
+    return df
 
 def calculate_indicators(df, std_window):
     """
     Calculate all technical indicators sequentially (no multi-threading).
+    Values follow talib (backtestUtils.streamIndicators batch mode).
     """
+    close, high, low = df['Close'].values, df['High'].values, df['Low'].values
+
     # RSI
-    df['RSI_14'] = RSIIndicator(df['Close'], window=14).rsi()
+    df['RSI_14'] = RSI(14).batch(close)
 
     # EMA and SMA with std_window
-    df[f'EMA_{std_window}'] = EMAIndicator(df['Close'], window=std_window).ema_indicator()
-    df[f'SMA_{std_window}'] = SMAIndicator(df['Close'], window=std_window).sma_indicator()
+    df[f'EMA_{std_window}'] = EMA(std_window).batch(close)
+    df[f'SMA_{std_window}'] = df['Close'].rolling(window=std_window).mean()
 
     # MACD
-    macd = MACD(df['Close'])
-    df['MACD'] = macd.macd()
-    df['MACD_Signal'] = macd.macd_signal()
-    df['MACD_Hist'] = macd.macd_diff()
+    df['MACD'], df['MACD_Signal'], df['MACD_Hist'] = MACD(12, 26, 9).batch(close)
 
     # ADX
-    adx = ADXIndicator(df['High'], df['Low'], df['Close'], window=14)
-    df['ADX'] = adx.adx()
-    df['ADX_Pos'] = adx.adx_pos()
-    df['ADX_Neg'] = adx.adx_neg()
+    adx = ADX(14)
+    df['ADX'] = adx.batch(high, low, close)
+    df['ADX_Pos'] = adx.plusDIs
+    df['ADX_Neg'] = adx.minusDIs
 
     # Bollinger Bands
-    bb = BollingerBands(df['Close'], window=20, window_dev=2)
-    df['BB_Upper'] = bb.bollinger_hband()
-    df['BB_Mid'] = bb.bollinger_mavg()
-    df['BB_Lower'] = bb.bollinger_lband()
+    df['BB_Upper'], df['BB_Mid'], df['BB_Lower'] = Bollinger(20, 2, 2).batch(close)
     df['BB_Width'] = (df['BB_Upper'] - df['BB_Lower']) / df['BB_Mid']
 
     # ATR
-    atr = AverageTrueRange(df['High'], df['Low'], df['Close'], window=14)
-    df['ATR'] = atr.average_true_range()
+    df['ATR'] = ATR(14).batch(high, low, close)
 
     # Log Return STD
     df[f'LogRet_STD_{std_window}'] = df['Log_Return'].rolling(window=std_window).std()
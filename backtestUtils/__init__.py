@@ -0,0 +1,10 @@
+"""
+Shared helpers layered on top of backtestTools.
+
+Strategy scripts import from here the same way they import from backtestTools,
+with the repository root on PYTHONPATH (see cmd.md).
+"""
+import os
+
+# Root folder for everything backtestUtils persists locally (expiry calendar, caches)
+cacheRoot = os.environ.get("BACKTEST_CACHE_ROOT", os.path.expanduser("~/backtestCache"))
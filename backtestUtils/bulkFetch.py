@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from backtestTools import histData
+from backtestUtils.chainPreload import strikeDist, sides
+
+
+def chainSymbols(baseSym, expiries, strikeLow, strikeHigh, optionSides=sides):
+    """Every listed option symbol of baseSym for the given expiries, strike range (inclusive) and sides."""
+    step = strikeDist.get(baseSym, 50)
+    if isinstance(expiries, str):
+        expiries = [expiries]
+    strikes = np.arange(int(np.ceil(strikeLow / step)) * step, strikeHigh + 1, step)
+    return [f"{baseSym}{expiry}{int(strike)}{side}" for expiry in expiries for strike in strikes for side in optionSides]
+
+
+def fetchMany(symbols, startEpoch, endEpoch, interval="1Min", workers=8, kind="fno", logger=None):
+    """
+    One long-format frame with the candles of every symbol over the same range.
+
+    This is a threaded fan-out, not a single multi-symbol query: histData only
+    reads one symbol per call, so there is still one database round trip per
+    symbol. They are issued together from a thread pool, since the time goes
+    into waiting on the database rather than into Python. Rows keep the epoch
+    index and gain symbolId (position in symbols) and a categorical symbol
+    column, replacing any symbol/symbolId column the reads already carry.
+    Symbols with no data are left out; df.attrs["symbols"] holds the full list
+    so ids can always be mapped back.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    fetch = histData.getFnoBacktestData if kind == "fno" else histData.getEquityBacktestData
+
+    def read(symbol):
+        try:
+            return fetch(symbol, startEpoch, endEpoch, interval)
+        except Exception as e:
+            if logger is not None:
+                logger.info(f"Bulk fetch skipped {symbol}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(symbols)))) as pool:
+        frames = list(pool.map(read, symbols))
+
+    parts = []
+    for symbolId, df in enumerate(frames):
+        if df is None or df.empty:
+            continue
+        df = df.drop(columns=["symbol", "symbolId"], errors="ignore")
+        df.insert(0, "symbolId", np.int32(symbolId))
+        parts.append(df)
+
+    if not parts:
+        out = pd.DataFrame(columns=["symbolId", "symbol"])
+    else:
+        out = pd.concat(parts)
+        out.insert(1, "symbol", pd.Categorical.from_codes(out["symbolId"].values, categories=symbols))
+    out.attrs["symbols"] = symbols
+    return out
+
+
+def fetchChain(baseSym, expiries, strikeLow, strikeHigh, startEpoch, endEpoch, interval="1Min",
+               optionSides=sides, workers=8, logger=None):
+    """fetchMany over the chain selected by chainSymbols."""
+    symbols = chainSymbols(baseSym, expiries, strikeLow, strikeHigh, optionSides)
+    return fetchMany(symbols, startEpoch, endEpoch, interval, workers, logger=logger)
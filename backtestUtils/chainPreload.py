@@ -0,0 +1,188 @@
+import numpy as np
+from datetime import datetime
+from backtestUtils.optionCache import budgetOptOverNightAlgoLogic
+from backtestTools.expiry import getExpiryData
+from backtestUtils.instruments import instruments
+from backtestUtils.histStore import SymbolStore, monthOf
+
+
+# Distance between listed strikes for each underlying
+strikeDist = {
+    "NIFTY": 50,
+    "BANKNIFTY": 100,
+    "FINNIFTY": 50,
+    "MIDCPNIFTY": 25,
+    "SENSEX": 100,
+}
+
+sides = ("CE", "PE")
+fields = ("o", "h", "l", "c")
+
+
+def expiryToEpoch(expiry):
+    # Expiry strings look like 30JAN25, contracts stop trading at 15:20
+    return datetime.strptime(expiry, "%d%b%y").replace(hour=15, minute=20).timestamp()
+
+
+class ChainBlock:
+    """
+    One expiry of an option chain held as a (strike x side x minute x field) array.
+    Missing bars are NaN so lookups can tell "no trade" apart from a real price.
+    """
+
+    def __init__(self, baseSym, expiry, strikes, minutes):
+        self.baseSym = baseSym
+        self.expiry = expiry
+        self.expiryEpoch = expiryToEpoch(expiry)
+        self.strikes = np.asarray(strikes, dtype=np.int64)
+        self.minutes = np.asarray(minutes, dtype=np.float64)
+        self.values = np.full((len(self.strikes), len(sides), len(self.minutes), len(fields)), np.nan)
+        self._registerIds()
+
+    @classmethod
+    def fromArrays(cls, baseSym, expiry, strikes, minutes, values):
+        # Wrap arrays that already exist (e.g. attached from shared memory) without copying
+        block = cls.__new__(cls)
+        block.baseSym = baseSym
+        block.expiry = expiry
+        block.expiryEpoch = expiryToEpoch(expiry)
+        block.strikes = strikes
+        block.minutes = minutes
+        block.values = values
+        block._registerIds()
+        return block
+
+    def _registerIds(self):
+        # Instrument id of every (strike, side) in the block
+        self.ids = np.array([[instruments.idFor(self.baseSym, self.expiry, strike, side) for side in sides]
+                             for strike in self.strikes], dtype=np.int64).reshape(len(self.strikes), len(sides))
+
+    def symbol(self, strikeIdx, sideIdx):
+        return instruments.symbol(self.ids[strikeIdx, sideIdx])
+
+    def load(self, startEpoch, endEpoch, logger=None, workers=8):
+        """
+        Fill the whole block in one pass. Contracts whose months are all in
+        histStore are read from the local files; the rest come from a single
+        bulkFetch.fetchMany over the chain (histData only reads one symbol per
+        call, so that is a threaded fan-out rather than one query). All rows
+        then land in values with one indexed assignment.
+        """
+        # bulkFetch takes strikeDist and sides from this module
+        from backtestUtils.bulkFetch import fetchMany
+
+        startEpoch, endEpoch = int(startEpoch), int(endEpoch)
+        months = [str(month) for month in np.arange(monthOf(startEpoch), monthOf(endEpoch) + 1)]
+        cells = [(strikeIdx, sideIdx) for strikeIdx in range(len(self.strikes)) for sideIdx in range(len(sides))]
+
+        parts = []
+        remote = []
+        for cell in cells:
+            store = SymbolStore("fno", self.symbol(*cell), "1Min")
+            if store.exists and set(months) <= set(store.months()):
+                parts.append((cell, store.read(startEpoch, endEpoch)))
+            else:
+                remote.append(cell)
+
+        if remote:
+            frame = fetchMany([self.symbol(*cell) for cell in remote], startEpoch, endEpoch, "1Min", workers, logger=logger)
+            if not frame.empty:
+                symbolIds = frame["symbolId"].values
+                for symbolId in np.unique(symbolIds):
+                    parts.append((remote[symbolId], frame[symbolIds == symbolId]))
+
+        parts = [(cell, df) for cell, df in parts if df is not None and not df.empty]
+        if not parts:
+            return
+
+        strikeIdx = np.concatenate([np.full(len(df), cell[0]) for cell, df in parts])
+        sideIdx = np.concatenate([np.full(len(df), cell[1]) for cell, df in parts])
+        epochs = np.concatenate([df.index.values.astype(np.float64) for _, df in parts])
+        rows = np.concatenate([df[list(fields)].values.astype(np.float64) for _, df in parts])
+
+        pos = np.searchsorted(self.minutes, epochs)
+        pos = np.clip(pos, 0, len(self.minutes) - 1)
+        onGrid = self.minutes[pos] == epochs
+        self.values[strikeIdx[onGrid], sideIdx[onGrid], pos[onGrid], :] = rows[onGrid]
+
+    def lookup(self, strikeIdx, sideIdx, timestamp):
+        pos = np.searchsorted(self.minutes, timestamp)
+        if pos >= len(self.minutes) or self.minutes[pos] != timestamp:
+            return None
+        row = self.values[strikeIdx, sideIdx, pos]
+        if np.isnan(row[3]):
+            return None
+        return dict(zip(fields, row))
+
+
+def loadChainBlocks(baseSym, df, strikeBand=10, expiries=None, logger=None):
+    """
+    One ChainBlock per expiry touched by the 1-min index frame df, covering
+    strikeBand strikes either side of the spot range seen while it is current.
+    """
+    step = strikeDist.get(baseSym, 50)
+    minutes = df.index.values.astype(np.float64)
+    closes = df["c"].values
+
+    if expiries is None:
+        expiries = []
+        for dayEpoch in np.unique(minutes - (minutes + 19800) % 86400):
+            expiry = getExpiryData(dayEpoch, baseSym)["CurrentExpiry"]
+            if expiry not in expiries:
+                expiries.append(expiry)
+
+    blocks = []
+    windowStart = minutes[0]
+    for expiry in sorted(expiries, key=expiryToEpoch):
+        expiryEpoch = expiryToEpoch(expiry)
+        # A contract can be selected from the previous expiry day (rollover) until its own expiry
+        inWindow = (minutes >= windowStart) & (minutes <= expiryEpoch + 600)
+        if not inWindow.any():
+            continue
+
+        low = np.floor(closes[inWindow].min() / step) * step - strikeBand * step
+        high = np.ceil(closes[inWindow].max() / step) * step + strikeBand * step
+        strikes = np.arange(low, high + step, step).astype(np.int64)
+
+        block = ChainBlock(baseSym, expiry, strikes, minutes[inWindow])
+        block.load(minutes[inWindow][0], minutes[inWindow][-1], logger)
+        blocks.append(block)
+
+        windowStart = expiryEpoch - 86400
+    return blocks
+
+
+class preloadOptOverNightAlgoLogic(budgetOptOverNightAlgoLogic):
+    """
+    budgetOptOverNightAlgoLogic with an optional preload mode.
+
+    Call preloadChain() once after the index data is fetched. From then on
+    fetchAndCacheFnoHistData answers symbols inside the preloaded band by
+    indexing into ChainBlock arrays and only falls back to the history store
+    for anything outside it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chainBlocks = []
+        self.chainIdMap = {}
+
+    def preloadChain(self, baseSym, df, strikeBand=10, expiries=None):
+        for block in loadChainBlocks(baseSym, df, strikeBand, expiries, self.strategyLogger):
+            self.addChainBlock(block)
+
+    def addChainBlock(self, block):
+        blockIdx = len(self.chainBlocks)
+        self.chainBlocks.append(block)
+        for strikeIdx in range(len(block.strikes)):
+            for sideIdx in range(len(sides)):
+                self.chainIdMap[block.ids[strikeIdx, sideIdx]] = (blockIdx, strikeIdx, sideIdx)
+
+    def fetchAndCacheFnoHistData(self, symbol, timestamp, *args, **kwargs):
+        key = self.chainIdMap.get(instruments.idOf(symbol))
+        if key is not None:
+            blockIdx, strikeIdx, sideIdx = key
+            data = self.chainBlocks[blockIdx].lookup(strikeIdx, sideIdx, float(timestamp))
+            if data is not None:
+                return data
+        return super().fetchAndCacheFnoHistData(symbol, timestamp, *args, **kwargs)
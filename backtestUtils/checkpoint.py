@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import pickle
+import hashlib
+import inspect
+import pandas as pd
+from datetime import datetime
+from backtestUtils import cacheRoot
+from backtestUtils.eventClock import istOffset
+from backtestUtils.expiryCalendar import dayNumber
+from backtestUtils.multiStrategy import MarketStream, runStrategies
+
+# Last 1-min bar of the NSE session starts at 15:29
+sessionClose = 15 * 3600 + 29 * 60
+
+# Bump to invalidate every saved checkpoint, e.g. after a backtestTools upgrade
+checkpointVersion = 1
+
+
+def helperSource():
+    # Source of every backtestUtils module; indicators, resampling, calendars all feed a checkpoint
+    packageDir = os.path.dirname(os.path.abspath(__file__))
+    sources = []
+    for name in sorted(os.listdir(packageDir)):
+        if name.endswith(".py"):
+            with open(os.path.join(packageDir, name)) as f:
+                sources.append(f"{name}\n{f.read()}")
+    return "\n".join(sources)
+
+
+def strategyKey(algo, baseSym, indexSym, startDate, streamKwargs):
+    """
+    Hash of everything a checkpoint depends on: the source of the strategy's
+    module and of backtestUtils, checkpointVersion, the strategy's params,
+    and the run arguments other than endDate.
+    """
+    source = inspect.getsource(sys.modules[type(algo).__module__]) + helperSource()
+    runArgs = {
+        "strategy": type(algo).__qualname__,
+        "params": getattr(algo, "params", {}),
+        "baseSym": baseSym,
+        "indexSym": indexSym,
+        "startDate": startDate.isoformat(),
+        "stream": streamKwargs,
+        "version": checkpointVersion,
+    }
+    payload = source + json.dumps(runArgs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class CheckpointStore:
+    """
+    Per-day end-of-session state of one strategy run, kept under
+    cacheRoot/checkpoints/<key>/<day>.pkl.
+
+    Each file holds the snapshot() taken after the last bar of that day and
+    the closedPnl rows added during the day, so resuming at day d needs every
+    file up to d but nothing after it.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.path = os.path.join(cacheRoot, "checkpoints", key)
+        os.makedirs(self.path, exist_ok=True)
+
+    def days(self):
+        return sorted(int(name[:-4]) for name in os.listdir(self.path) if name.endswith(".pkl"))
+
+    def save(self, day, state, closed):
+        tmpFile = os.path.join(self.path, f"{day}.tmp")
+        with open(tmpFile, "wb") as f:
+            pickle.dump({"state": state, "closed": closed}, f)
+        os.replace(tmpFile, os.path.join(self.path, f"{day}.pkl"))
+
+    def load(self, day):
+        with open(os.path.join(self.path, f"{day}.pkl"), "rb") as f:
+            return pickle.load(f)
+
+    def lastBefore(self, endEpoch):
+        # Latest day whose session had closed by endEpoch
+        days = [day for day in self.days() if day * 86400 - istOffset + sessionClose <= endEpoch]
+        return days[-1] if days else None
+
+    def resume(self, day):
+        closed = []
+        for savedDay in self.days():
+            if savedDay > day:
+                break
+            checkpoint = self.load(savedDay)
+            if not checkpoint["closed"].empty:
+                closed.append(checkpoint["closed"])
+        state = dict(checkpoint["state"])
+        state["closedPnl"] = pd.concat(closed, ignore_index=True) if closed else None
+        return state
+
+
+def runCheckpointed(algo, startDate, endDate, baseSym, indexSym, **streamKwargs):
+    """
+    algo.run() that saves a checkpoint at the end of every day and, when a
+    checkpoint for the same strategy code, params and start already exists,
+    only runs the days after the latest one that is not past endDate.
+
+    A resumed run's stream still starts at startDate, so the indicators
+    onStart builds over it are the ones a full run would have; only the bars
+    after the checkpoint are stepped. Per-bar state (positions, the book and
+    stateAttrs, which may hold streaming indicator objects) comes from the
+    checkpoint itself, so a resumed run matches a full one.
+    """
+    store = CheckpointStore(strategyKey(algo, baseSym, indexSym, startDate, streamKwargs))
+    endEpoch = endDate.timestamp()
+
+    state = None
+    runStart = None
+    resumeDay = store.lastBefore(endEpoch)
+    if resumeDay is not None:
+        state = store.resume(resumeDay)
+        if state["closedPnl"] is None:
+            state["closedPnl"] = algo.closedPnl.iloc[0:0]
+        runStart = datetime.fromtimestamp((resumeDay + 1) * 86400 - istOffset + 9 * 3600 + 15 * 60)
+        algo.strategyLogger.info(f"Resuming from checkpoint {store.key} after {datetime.fromtimestamp(resumeDay * 86400 - istOffset).date()}")
+
+    if runStart is not None and runStart > endDate:
+        algo.restore(state)
+        algo.combinePnlCsv()
+        return algo.closedPnl, algo.fileDir["backtestResultsStrategyUid"]
+
+    resumeEpoch = None if runStart is None else runStart.timestamp()
+    stream = MarketStream(baseSym, indexSym, startDate, endDate, resumeEpoch=resumeEpoch, **streamKwargs)
+    days = dayNumber(stream.minutes)
+    closedCount = [0 if state is None else len(state["closedPnl"])]
+
+    def onDayClose(i):
+        # A day cut short by endDate is not saved, the next run redoes it
+        if i + 1 == len(days) and endEpoch < days[i] * 86400 - istOffset + sessionClose:
+            return
+        closed = algo.closedPnl.iloc[closedCount[0]:].copy()
+        closedCount[0] = len(algo.closedPnl)
+        store.save(int(days[i]), algo.snapshot(), closed)
+
+    runStrategies([algo], stream, None if state is None else [state], onDayClose)
+    return algo.closedPnl, algo.fileDir["backtestResultsStrategyUid"]
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import multiprocessing as mp
+from datetime import datetime, timedelta
+from backtestUtils.expiryCalendar import getCalendar
+
+
+def expirySplits(baseSym, startDate, endDate):
+    """
+    Default chunk boundaries: the session after every weekly expiry in range.
+    Strategies that exit on expiry are usually flat there, and when they are
+    not the runner hands the open book over (see runChunked).
+    """
+    calendar = getCalendar(baseSym)
+    calendar.load(startDate, endDate)
+    splits = []
+    for expiry in calendar.expiries(startDate, endDate):
+        boundary = datetime.strptime(expiry, "%d%b%y").replace(hour=9, minute=15) + timedelta(days=1)
+        if startDate < boundary <= endDate:
+            splits.append(boundary)
+    return splits
+
+
+def makeChunks(startDate, endDate, splits):
+    chunks = []
+    chunkStart = startDate
+    for boundary in sorted(splits):
+        # Previous chunk ends at the close of the last session before the boundary
+        chunkEnd = (boundary - timedelta(days=1)).replace(hour=15, minute=30)
+        if chunkEnd > chunkStart:
+            chunks.append((chunkStart, chunkEnd))
+            chunkStart = boundary
+    chunks.append((chunkStart, endDate))
+    return chunks
+
+
+def runChunk(args):
+    strategyCls, (devName, strategyName, version), label, startDate, endDate, baseSym, indexSym, state, streamKwargs = args
+    algo = strategyCls(devName, f"{strategyName}_{label}", version)
+    algo.run(startDate, endDate, baseSym, indexSym, state=state, **streamKwargs)
+    return algo.closedPnl.copy(), algo.startState, algo.snapshot()
+
+
+def sameState(a, b):
+    # Handoff is only needed when the book or the strategy state differs from a fresh start
+    if len(a["openPnl"]) != len(b["openPnl"]):
+        return False
+    if not a["openPnl"].empty and list(a["openPnl"]["Symbol"]) != list(b["openPnl"]["Symbol"]):
+        return False
+    return {k: str(v) for k, v in a["attrs"].items()} == {k: str(v) for k, v in b["attrs"].items()}
+
+
+def samePnl(a, b):
+    cols = [col for col in ("Symbol", "EntryPrice", "ExitPrice", "Quantity", "Pnl", "ExitType") if col in a.columns]
+    if len(a) != len(b):
+        return False
+
+    a = a.sort_values(["Key", "Symbol"], kind="stable")[cols].reset_index(drop=True)
+    b = b.sort_values(["Key", "Symbol"], kind="stable")[cols].reset_index(drop=True)
+    for col in cols:
+        if pd.api.types.is_numeric_dtype(a[col]):
+            if not np.allclose(a[col].astype(float), b[col].astype(float), equal_nan=True):
+                return False
+        elif not (a[col].astype(str) == b[col].astype(str)).all():
+            return False
+    return True
+
+
+def runChunked(strategyCls, startDate, endDate, baseSym, indexSym, splits=None, processes=4, verify=False,
+               devName="NA", strategyName="chunked", version="v1", **streamKwargs):
+    """
+    Run a streamAlgoLogic strategy over [startDate, endDate] as parallel chunks.
+
+    Every chunk first runs in the pool from a fresh start. Chunks are then
+    stitched in order: if the previous chunk ended with open positions or with
+    stateAttrs different from the ones this chunk started with, the chunk is
+    run again serially from the previous chunk's snapshot() so positions and
+    strategy state carry across.
+
+    Indicators are not part of that handoff: each chunk rebuilds them from its
+    own warm-up buffer, so recursive ones (EMA, RSI, ADX...) can differ
+    slightly from a serial run near chunk starts, and so can the trades they
+    drive. verify=True is a one-off check of that for a strategy: it also
+    makes a full serial run and compares it leg by leg with the stitched
+    result, which costs more than the serial run alone.
+
+    Returns (closedPnl, fileDir, matchesSerial) where matchesSerial is None
+    unless verify is set.
+    """
+    if splits is None:
+        splits = expirySplits(baseSym, startDate, endDate)
+    chunks = makeChunks(startDate, endDate, splits)
+    nomenclature = (devName, strategyName, version)
+
+    tasks = [(strategyCls, nomenclature, f"chunk{n}", chunkStart, chunkEnd, baseSym, indexSym, None, streamKwargs)
+             for n, (chunkStart, chunkEnd) in enumerate(chunks)]
+    with mp.Pool(processes) as pool:
+        results = pool.map(runChunk, tasks)
+
+    closedPnls = []
+    handoff = None
+    for n, (chunkStart, chunkEnd) in enumerate(chunks):
+        closedPnl, startState, endState = results[n]
+        if handoff is not None and not sameState(startState, handoff):
+            closedPnl, startState, endState = runChunk((strategyCls, nomenclature, f"chunk{n}_resumed", chunkStart, chunkEnd,
+                                                        baseSym, indexSym, handoff, streamKwargs))
+        closedPnls.append(closedPnl)
+        handoff = endState
+
+    algo = strategyCls(devName, strategyName, version)
+    algo.closedPnl = pd.concat([df for df in closedPnls if not df.empty] or [closedPnls[0]], ignore_index=True)
+    algo.openPnl = handoff["openPnl"]
+    algo.strategyLogger.info(f"Stitched {len(chunks)} chunks; indicators were rebuilt from each chunk's own warm-up, "
+                             f"so trades near chunk starts can differ from a serial run")
+    algo.combinePnlCsv()
+
+    matchesSerial = None
+    if verify:
+        serial = strategyCls(devName, f"{strategyName}_serial", version)
+        serial.run(startDate, endDate, baseSym, indexSym, **streamKwargs)
+        matchesSerial = samePnl(algo.closedPnl, serial.closedPnl)
+
+    return algo.closedPnl, algo.fileDir["backtestResultsStrategyUid"], matchesSerial
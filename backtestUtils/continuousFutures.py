@@ -0,0 +1,189 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from backtestUtils import cacheRoot
+from backtestUtils.bulkFetch import fetchMany
+from backtestUtils.chainPreload import expiryToEpoch
+from backtestUtils.eventClock import istOffset
+from backtestUtils.expiryCalendar import getCalendar, dayNumber, toEpoch
+from backtestUtils.histCache import getFnoBacktestData
+from backtestUtils.tradingCalendar import nseCalendar
+
+fields = ("o", "h", "l", "c", "v", "oi")
+rollRules = ("expiry", "daysBefore", "oi")
+adjustments = (None, "difference", "ratio")
+
+
+def futureSymbol(baseSym, expiry):
+    # NIFTY + 29MAY25, the naming get_futures uses for CurrentFutureExpiry
+    return f"{baseSym}{expiry}"
+
+
+class ContinuousFutures:
+    """
+    Near-month futures of baseSym stitched into one series on the index's 1-min grid.
+
+    roll picks when the next contract takes over:
+      "expiry"      after the last bar of the front contract's expiry day
+      "daysBefore"  at the open of the rollDays-th trading day before expiry
+      "oi"          on the first minute the next contract's open interest is
+                    above the front's (at the latest, after expiry day)
+    adjust=None keeps traded prices; "difference" or "ratio" back-adjusts every
+    bar before a roll by the gap between the two contracts' closes on the last
+    minute both traded, so the latest contract is left as traded.
+
+    build() writes minutes.npy, values.npy (bars x o/h/l/c/v/oi) and
+    contract.npy to cacheRoot/continuousFutures/... and load() maps them back
+    with mmap_mode="c", so the series is one contiguous block on disk.
+    """
+
+    def __init__(self, baseSym, indexSym, roll="expiry", rollDays=1, adjust=None, calendar=nseCalendar):
+        if roll not in rollRules:
+            raise ValueError(f"Unknown roll rule {roll}, expected one of {rollRules}")
+        if adjust not in adjustments:
+            raise ValueError(f"Unknown adjustment {adjust}, expected one of {adjustments}")
+        self.baseSym = baseSym
+        self.indexSym = indexSym
+        self.roll = roll
+        self.rollDays = rollDays
+        self.adjust = adjust
+        self.calendar = calendar
+
+    def path(self, startEpoch, endEpoch):
+        rule = f"{self.roll}{self.rollDays}" if self.roll == "daysBefore" else self.roll
+        name = f"{rule}-{self.adjust or 'raw'}-{int(startEpoch)}-{int(endEpoch)}"
+        return os.path.join(cacheRoot, "continuousFutures", self.baseSym, name)
+
+    def expiries(self, startEpoch, endEpoch):
+        # Every futures expiry in force over the range plus the one after, for the last roll
+        expiryCalendar = getCalendar(self.baseSym)
+        expiryCalendar.load(startEpoch, endEpoch)
+        expiries = expiryCalendar.expiries(startEpoch, endEpoch, key="CurrentFutureExpiry")
+        if expiries:
+            after = expiryToEpoch(expiries[-1]) + 86400
+            expiryCalendar.load(after, after)
+            following = expiryCalendar.lookup([after], "CurrentFutureExpiry")[0]
+            if isinstance(following, str) and following not in expiries:
+                expiries.append(following)
+        return expiries
+
+    def rollEpochs(self, minutes, expiryEpochs, values):
+        """
+        Epoch at which contract k + 1 takes over from contract k, one per
+        consecutive pair; contract k is live on [roll[k - 1], roll[k]).
+        """
+        expiryDays = dayNumber(expiryEpochs).astype(np.int64)
+        # First minute after the expiry day, the latest any rule rolls
+        expiryRolls = (expiryDays + 1) * 86400 - istOffset
+        rolls = expiryRolls[:-1].astype(np.float64)
+
+        if self.roll == "daysBefore":
+            for k in range(len(rolls)):
+                days = self.calendar.tradingDays(expiryEpochs[k] - 86400 * (self.rollDays * 3 + 10), expiryEpochs[k])
+                days = days[days < expiryDays[k]]
+                if len(days) >= self.rollDays:
+                    rolls[k] = days[-self.rollDays] * 86400 - istOffset
+
+        elif self.roll == "oi":
+            # Last known open interest of every contract on every minute
+            oi = pd.DataFrame(values[:, :, fields.index("oi")].T).ffill().values.T
+            previous = -np.inf
+            for k in range(len(rolls)):
+                window = (minutes >= previous) & (minutes < rolls[k])
+                crossed = np.flatnonzero(window & (oi[k + 1] > oi[k]))
+                if len(crossed):
+                    rolls[k] = minutes[crossed[0]]
+                previous = rolls[k]
+
+        return np.maximum.accumulate(rolls)
+
+    def build(self, startEpoch, endEpoch, logger=None):
+        startEpoch, endEpoch = toEpoch(startEpoch), toEpoch(endEpoch)
+        index = getFnoBacktestData(self.indexSym, startEpoch, endEpoch, "1Min")
+        if index is None or index.empty:
+            raise Exception(f"No {self.indexSym} data from {datetime.fromtimestamp(startEpoch)} to {datetime.fromtimestamp(endEpoch)}")
+        minutes = index.dropna(subset=["c"]).index.values.astype(np.int64)
+
+        expiries = self.expiries(startEpoch, endEpoch)
+        if not expiries:
+            raise Exception(f"No futures expiries for {self.baseSym} from {datetime.fromtimestamp(startEpoch)}")
+        symbols = [futureSymbol(self.baseSym, expiry) for expiry in expiries]
+        expiryEpochs = np.array([expiryToEpoch(expiry) for expiry in expiries])
+
+        # contracts x minutes x fields, NaN where a contract has no bar
+        frame = fetchMany(symbols, startEpoch, endEpoch, "1Min", logger=logger)
+        values = np.full((len(symbols), len(minutes), len(fields)), np.nan)
+        for symbolId, rows in frame.groupby("symbolId"):
+            pos = np.searchsorted(minutes, rows.index.values)
+            valid = (pos < len(minutes)) & (minutes[np.clip(pos, 0, len(minutes) - 1)] == rows.index.values)
+            for n, col in enumerate(fields):
+                if col in rows.columns:
+                    values[symbolId, pos[valid], n] = rows[col].values[valid]
+
+        rolls = self.rollEpochs(minutes, expiryEpochs, values)
+        contract = np.searchsorted(rolls, minutes, side="right").astype(np.int16)
+        series = values[contract, np.arange(len(minutes))]
+
+        if self.adjust is not None:
+            series = self.backAdjust(series, values, minutes, rolls, contract)
+
+        return self.write(startEpoch, endEpoch, minutes, series, contract, symbols, rolls)
+
+    def backAdjust(self, series, values, minutes, rolls, contract):
+        close = fields.index("c")
+        prices = [fields.index(col) for col in ("o", "h", "l", "c")]
+        for k, rollEpoch in enumerate(rolls):
+            if rollEpoch > minutes[-1]:
+                # The series ends before this roll, its latest contract stays as traded
+                break
+            before = np.flatnonzero((minutes < rollEpoch)
+                                    & ~np.isnan(values[k, :, close]) & ~np.isnan(values[k + 1, :, close]))
+            if len(before) == 0:
+                continue
+            front, nxt = values[k, before[-1], close], values[k + 1, before[-1], close]
+            earlier = contract <= k
+            # Each roll shifts everything before it, so older bars collect every later gap
+            if self.adjust == "difference":
+                series[np.ix_(earlier, prices)] += nxt - front
+            else:
+                series[np.ix_(earlier, prices)] *= nxt / front
+        return series
+
+    def write(self, startEpoch, endEpoch, minutes, series, contract, symbols, rolls):
+        path = self.path(startEpoch, endEpoch)
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "minutes.npy"), minutes)
+        np.save(os.path.join(path, "values.npy"), np.ascontiguousarray(series))
+        np.save(os.path.join(path, "contract.npy"), contract)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"symbols": symbols, "rolls": [float(r) for r in rolls], "fields": list(fields)}, f)
+        return self.load(startEpoch, endEpoch)
+
+    def load(self, startEpoch, endEpoch):
+        """
+        The built series as a frame over the mapped files: o/h/l/c/v/oi, the
+        contract position and a categorical symbol column. None if not built.
+        """
+        path = self.path(toEpoch(startEpoch), toEpoch(endEpoch))
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            return None
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        minutes = np.load(os.path.join(path, "minutes.npy"), mmap_mode="c")
+        values = np.load(os.path.join(path, "values.npy"), mmap_mode="c")
+        contract = np.load(os.path.join(path, "contract.npy"), mmap_mode="c")
+
+        df = pd.DataFrame(values, index=minutes, columns=meta["fields"], copy=False)
+        df.insert(len(df.columns), "contract", contract)
+        df.insert(len(df.columns), "symbol", pd.Categorical.from_codes(contract, categories=meta["symbols"]))
+        df.attrs["rolls"] = meta["rolls"]
+        return df
+
+
+def getContinuousFutures(baseSym, indexSym, startDate, endDate, roll="expiry", rollDays=1, adjust=None, logger=None):
+    """Continuous futures frame for the range, built once and then read from the mapped files."""
+    builder = ContinuousFutures(baseSym, indexSym, roll, rollDays, adjust)
+    df = builder.load(startDate, endDate)
+    return df if df is not None else builder.build(startDate, endDate, logger)
@@ -0,0 +1,80 @@
+import numpy as np
+
+# Epochs are stored in UTC, the exchange runs on IST
+istOffset = 19800
+
+
+def minuteOfDay(epochs):
+    return ((np.asarray(epochs, dtype=np.int64) + istOffset) % 86400) // 60
+
+
+class EventClock:
+    """
+    Walks a 1-minute index but only stops on bars where something can happen.
+
+    Events are registered up front (completed higher timeframe bars, fixed times
+    of day, expiry cutoffs). While the book is flat the clock jumps straight from
+    one event to the next; while positions are open it visits every minute so
+    MTM, Target and Stoploss checks still see each bar.
+    """
+
+    def __init__(self, minutes, sessionStart=None, sessionEnd=None, calendar=None):
+        self.minutes = np.asarray(minutes)
+        self.pos = -1
+        self.minuteOfDay = minuteOfDay(self.minutes)
+
+        # With a TradingCalendar, holidays and off-session minutes are dropped as well
+        if calendar is not None:
+            self.inSession = calendar.sessionMask(self.minutes, sessionStart, sessionEnd)
+            self.isEvent = np.zeros(len(self.minutes), dtype=bool)
+            return
+
+        self.inSession = np.ones(len(self.minutes), dtype=bool)
+        if sessionStart is not None:
+            self.inSession &= self.minuteOfDay >= sessionStart.hour * 60 + sessionStart.minute
+        if sessionEnd is not None:
+            self.inSession &= self.minuteOfDay <= sessionEnd.hour * 60 + sessionEnd.minute
+
+        self.isEvent = np.zeros(len(self.minutes), dtype=bool)
+
+    def addSignalBars(self, barIndex, barSeconds):
+        # A bar starting at t is complete (and tradable) on the 1-min bar at t + barSeconds
+        self.addEpochs(np.asarray(barIndex) + barSeconds, exact=True)
+
+    def addTimeOfDay(self, t):
+        self.isEvent |= self.minuteOfDay == t.hour * 60 + t.minute
+
+    def addEpochs(self, epochs, exact=False):
+        epochs = np.asarray(epochs)
+        pos = np.searchsorted(self.minutes, epochs)
+        valid = pos < len(self.minutes)
+        if exact:
+            valid[valid] = self.minutes[pos[valid]] == epochs[valid]
+        self.isEvent[pos[valid]] = True
+
+    def eventCount(self):
+        return int((self.isEvent & self.inSession).sum())
+
+    def run(self, isFlat):
+        # isFlat is called after each visited bar, e.g. lambda: self.openPnl.empty;
+        # pos holds the row of the bar just yielded, for strategies with per-row arrays
+        eventPos = np.flatnonzero(self.isEvent & self.inSession)
+        sessionPos = np.flatnonzero(self.inSession)
+        if len(sessionPos) == 0:
+            return
+
+        i = sessionPos[0] if not isFlat() else (eventPos[0] if len(eventPos) else len(self.minutes))
+        while i < len(self.minutes):
+            self.pos = i
+            yield self.minutes[i]
+
+            if isFlat():
+                nxt = np.searchsorted(eventPos, i, side="right")
+                if nxt >= len(eventPos):
+                    return
+                i = eventPos[nxt]
+            else:
+                nxt = np.searchsorted(sessionPos, i, side="right")
+                if nxt >= len(sessionPos):
+                    return
+                i = sessionPos[nxt]
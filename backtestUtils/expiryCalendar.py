@@ -0,0 +1,167 @@
+import os
+import numpy as np
+import pandas as pd
+from uuid import uuid4
+from datetime import datetime
+from backtestTools.expiry import getExpiryData as fetchExpiryData
+from backtestUtils import cacheRoot
+from backtestUtils.eventClock import istOffset
+
+
+def toEpoch(date):
+    return date.timestamp() if isinstance(date, datetime) else float(date)
+
+
+def dayNumber(epochs):
+    # IST calendar day of each epoch as an integer
+    return (np.asarray(epochs, dtype=np.float64) + istOffset) // 86400
+
+
+class ExpiryCalendar:
+    """
+    Every getExpiryData answer for one underlying, one row per calendar day.
+
+    Rows are kept sorted by day so lookups are a searchsorted over an int array,
+    scalar or vectorized. The table is pickled to cacheRoot/expiry/<baseSym>.pkl
+    with every value as backtestTools returned it (LotSize stays a number), and
+    only the days missing from it are ever asked from backtestTools.
+
+    A day whose 09:15 fetch failed is kept as a missing row rather than left
+    out, so it never silently takes the previous day's answer: lookups on it go
+    to the live getExpiryData instead. Missing rows are not persisted, so the
+    next process asks for those days again.
+    """
+
+    extendDays = 60
+
+    def __init__(self, baseSym):
+        self.baseSym = baseSym
+        self.path = os.path.join(cacheRoot, "expiry", f"{baseSym}.pkl")
+        self.table = pd.DataFrame(columns=["day"], dtype=object)
+        if os.path.exists(self.path):
+            try:
+                self.table = pd.read_pickle(self.path)
+            except Exception:
+                # Unreadable table: start over, the days get fetched again
+                pass
+        self._reindex()
+
+    def _reindex(self):
+        self.table = self.table.drop_duplicates("day", keep="last").sort_values("day").reset_index(drop=True)
+        self.days = self.table["day"].values.astype(np.int64)
+        self.missing = self.table["missing"].fillna(False).values.astype(bool) if "missing" in self.table else np.zeros(len(self.days), dtype=bool)
+        self.columns = {col: self.table[col].values for col in self.table.columns if col not in ("day", "missing")}
+
+    def covers(self, epoch):
+        day = dayNumber(epoch)
+        return len(self.days) > 0 and self.days[0] <= day <= self.days[-1]
+
+    def load(self, startDate, endDate):
+        # Fill every missing day in [startDate, endDate] from backtestTools and persist
+        firstDay = int(dayNumber(toEpoch(startDate)))
+        lastDay = int(dayNumber(toEpoch(endDate)))
+        missing = np.setdiff1d(np.arange(firstDay, lastDay + 1), self.days)
+        if len(missing) == 0:
+            return
+
+        rows = []
+        for day in missing:
+            expiryData = self._fetchDay(day)
+            row = {"missing": True} if expiryData is None else {**expiryData, "missing": False}
+            row["day"] = int(day)
+            rows.append(row)
+
+        # object columns keep the engine's own value types through concat and pickle
+        self.table = pd.concat([self.table, pd.DataFrame(rows, dtype=object)], ignore_index=True)
+        self._reindex()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Pool workers read this file, so it is only ever swapped in whole
+        tmpFile = f"{self.path}.{os.getpid()}.{uuid4().hex}.tmp"
+        self.table[~self.missing].drop(columns="missing").to_pickle(tmpFile)
+        os.replace(tmpFile, self.path)
+
+    def _fetchDay(self, day):
+        # Ask at 09:15 IST so the answer is the one valid for the whole session
+        try:
+            return fetchExpiryData(float(day * 86400 - istOffset + 33300), self.baseSym)
+        except Exception:
+            return None
+
+    def positions(self, epochs):
+        # Row of the latest known day on or before each epoch, -1 if before the table
+        return np.searchsorted(self.days, dayNumber(epochs), side="right") - 1
+
+    def lookup(self, epochs, key="CurrentExpiry"):
+        pos = self.positions(epochs)
+        out = np.asarray(self.columns[key], dtype=object)[np.clip(pos, 0, None)]
+        out[pos < 0] = None
+        # Days whose fetch failed are asked live again, once per day
+        live = (pos >= 0) & self.missing[np.clip(pos, 0, None)]
+        for day in np.unique(self.days[pos[live]]):
+            expiryData = self._fetchDay(day)
+            out[live & (self.days[np.clip(pos, 0, None)] == day)] = None if expiryData is None else expiryData[key]
+        return out
+
+    def expiryEpochs(self, epochs, key="CurrentExpiry"):
+        expiries = self.lookup(epochs, key)
+        uniq, inverse = np.unique(expiries.astype(str), return_inverse=True)
+        uniqEpochs = np.array([
+            datetime.strptime(expiry, "%d%b%y").replace(hour=15, minute=20).timestamp() if expiry != "None" else np.nan
+            for expiry in uniq
+        ])
+        return uniqEpochs[inverse]
+
+    def lotSizes(self, epochs):
+        return self.lookup(epochs, "LotSize").astype(float).astype(np.int64)
+
+    def expiries(self, startDate=None, endDate=None, key="CurrentExpiry"):
+        # Sorted unique expiries seen on days inside [startDate, endDate]
+        mask = np.ones(len(self.days), dtype=bool)
+        if startDate is not None:
+            mask &= self.days >= dayNumber(toEpoch(startDate))
+        if endDate is not None:
+            mask &= self.days <= dayNumber(toEpoch(endDate))
+        uniq = {expiry for expiry in self.columns.get(key, np.array([]))[mask] if isinstance(expiry, str)}
+        return sorted(uniq, key=lambda expiry: datetime.strptime(expiry, "%d%b%y"))
+
+    def getExpiryData(self, date, baseSym=None):
+        pos = self.positions(toEpoch(date))
+        if pos >= 0 and self.missing[pos]:
+            return fetchExpiryData(date, self.baseSym)
+        return {key: values[pos] for key, values in self.columns.items()}
+
+
+calendars = {}
+
+
+def getCalendar(baseSym):
+    if baseSym not in calendars:
+        calendars[baseSym] = ExpiryCalendar(baseSym)
+    return calendars[baseSym]
+
+
+def getExpiryData(date, baseSym):
+    """
+    Drop-in replacement for backtestTools.expiry.getExpiryData backed by ExpiryCalendar.
+
+    Days close to the loaded range are filled in chunks of ExpiryCalendar.extendDays,
+    anything further away is passed straight through to backtestTools.
+    """
+    calendar = getCalendar(baseSym)
+    epoch = toEpoch(date)
+
+    if not calendar.covers(epoch):
+        day = dayNumber(epoch)
+        near = len(calendar.days) == 0 or (calendar.days[0] - calendar.extendDays <= day <= calendar.days[-1] + calendar.extendDays)
+        if not near:
+            return fetchExpiryData(date, baseSym)
+        start, end = epoch - 7 * 86400, epoch + calendar.extendDays * 86400
+        if len(calendar.days):
+            # Extend contiguously so no day between the table and epoch is left out
+            start = min(start, (calendar.days[-1] + 1) * 86400 - istOffset)
+            end = max(end, calendar.days[0] * 86400 - istOffset - 1)
+        calendar.load(start, end)
+        if not calendar.covers(epoch):
+            return fetchExpiryData(date, baseSym)
+
+    return calendar.getExpiryData(epoch)
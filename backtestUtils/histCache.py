@@ -0,0 +1,246 @@
+import os
+import pickle
+import time
+import threading
+import pandas as pd
+from uuid import uuid4
+from collections import OrderedDict
+from backtestTools import histData
+from backtestUtils import cacheRoot
+
+
+def mergeRanges(ranges):
+    # Sort and merge inclusive (start, end) epoch ranges, joining ranges that touch
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missingRanges(covered, start, end):
+    missing = []
+    cursor = start
+    for coveredStart, coveredEnd in covered:
+        if coveredEnd < cursor:
+            continue
+        if coveredStart > end:
+            break
+        if coveredStart > cursor:
+            missing.append((cursor, coveredStart - 1))
+        cursor = max(cursor, coveredEnd + 1)
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+
+class CacheEntry:
+    """All candles fetched so far for one (kind, symbol, interval) and the epoch ranges they cover."""
+
+    def __init__(self):
+        self.frame = None
+        self.covered = []
+        self.nbytes = 0
+        self.records = 0
+
+    def add(self, df, start, end):
+        if df is not None and not df.empty:
+            frames = [df] if self.frame is None else [self.frame, df]
+            frame = pd.concat(frames)
+            self.frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+            self.nbytes = int(self.frame.memory_usage(deep=True).sum())
+        self.covered = mergeRanges(self.covered + [(start, end)])
+
+    def slice(self, start, end):
+        if self.frame is None:
+            return None
+        return self.frame[(self.frame.index >= start) & (self.frame.index <= end)].copy()
+
+
+class HistCache:
+    """
+    Read-through cache for histData range queries: a byte-budgeted LRU in
+    memory in front of one append-only file per (kind, interval, symbol)
+    under cacheRoot/histCache, itself size-capped by evicting the least
+    recently used files.
+
+    A query only goes to the source for the parts of its range no earlier
+    query has covered; the answer is then cut out of the merged frame.
+    Ranges reaching past the current time are only marked covered up to now.
+
+    Each miss appends just the newly fetched (frame, start, end) records to
+    the symbol's file instead of re-pickling everything held for it; once a
+    file holds more than compactAfter records it is rewritten with one per
+    covered range. The bookkeeping runs under a lock so bulkFetch and
+    prefetch threads can share the cache; the source reads themselves happen
+    outside it.
+    """
+
+    compactAfter = 64
+
+    def __init__(self, memoryBytes=2 * 1024**3, diskBytes=20 * 1024**3, path=None):
+        self.memoryBytes = memoryBytes
+        self.diskBytes = diskBytes
+        self.path = path or os.path.join(cacheRoot, "histCache")
+        self.entries = OrderedDict()
+        self.memoryTotal = 0
+        self.diskTotal = None
+        self.lock = threading.RLock()
+        self.stats = {"memoryHits": 0, "diskHits": 0, "misses": 0, "partialHits": 0,
+                      "memoryEvictions": 0, "diskEvictions": 0}
+
+    def _file(self, key):
+        kind, symbol, interval = key
+        return os.path.join(self.path, kind, interval, f"{symbol}.pkl")
+
+    def _entry(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key], "memory"
+        entry, source = self._load(key)
+        self.entries[key] = entry
+        return entry, source
+
+    def _load(self, key):
+        diskFile = self._file(key)
+        entry = CacheEntry()
+        broken = False
+        try:
+            with open(diskFile, "rb") as f:
+                while True:
+                    try:
+                        record = pickle.load(f)
+                    except EOFError:
+                        break
+                    if isinstance(record, CacheEntry):
+                        # A file from before the append-only layout holds the whole entry
+                        records = [(record.slice(start, end), start, end) for start, end in record.covered]
+                        broken = True
+                    else:
+                        records = [record]
+                    for df, start, end in records:
+                        entry.add(df, start, end)
+                        entry.records += 1
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # A truncated last append: whatever loaded whole is kept, the file is rewritten without the rest
+            broken = True
+        if broken or self._compact(entry):
+            self._rewrite(key, entry)
+        if not entry.records:
+            return entry, None
+        os.utime(diskFile)
+        return entry, "disk"
+
+    def _diskFiles(self):
+        files = []
+        for root, _, names in os.walk(self.path):
+            files += [os.path.join(root, name) for name in names if name.endswith(".pkl")]
+        return files
+
+    def _records(self, entry):
+        # The whole entry as one record per covered range
+        return [(entry.slice(start, end), start, end) for start, end in entry.covered]
+
+    def _compact(self, entry):
+        # Rewriting can only drop records down to one per covered range
+        return entry.records > max(self.compactAfter, 2 * len(entry.covered))
+
+    def _rewrite(self, key, entry):
+        diskFile = self._file(key)
+        os.makedirs(os.path.dirname(diskFile), exist_ok=True)
+        oldSize = os.path.getsize(diskFile) if os.path.exists(diskFile) else 0
+        # Other processes can load the same key at once, so every writer gets its own temp file
+        tmpFile = f"{diskFile}.{os.getpid()}.{uuid4().hex}.tmp"
+        with open(tmpFile, "wb") as f:
+            records = self._records(entry)
+            for record in records:
+                pickle.dump(record, f)
+        os.replace(tmpFile, diskFile)
+        entry.records = len(records)
+        if self.diskTotal is not None:
+            self.diskTotal += os.path.getsize(diskFile) - oldSize
+
+    def _save(self, key, entry, records):
+        diskFile = self._file(key)
+        os.makedirs(os.path.dirname(diskFile), exist_ok=True)
+        if self.diskTotal is None:
+            self.diskTotal = sum(os.path.getsize(f) for f in self._diskFiles())
+        # One write call per miss, so concurrent appenders cannot interleave inside a record
+        data = b"".join(pickle.dumps(record) for record in records)
+        with open(diskFile, "ab") as f:
+            f.write(data)
+        self.diskTotal += len(data)
+        entry.records += len(records)
+        if self._compact(entry):
+            self._rewrite(key, entry)
+        if self.diskTotal > self.diskBytes:
+            self._evictDisk(keep=diskFile)
+
+    def _evictMemory(self):
+        self.memoryTotal = sum(entry.nbytes for entry in self.entries.values())
+        while self.memoryTotal > self.memoryBytes and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            self.memoryTotal -= entry.nbytes
+            self.stats["memoryEvictions"] += 1
+
+    def _evictDisk(self, keep):
+        # Oldest access first; the file just written always stays
+        files = sorted((os.path.getmtime(f), os.path.getsize(f), f) for f in self._diskFiles() if f != keep)
+        self.diskTotal = sum(size for _, size, _ in files) + os.path.getsize(keep)
+        for _, size, diskFile in files:
+            if self.diskTotal <= self.diskBytes:
+                break
+            os.remove(diskFile)
+            self.diskTotal -= size
+            self.stats["diskEvictions"] += 1
+
+    def get(self, kind, symbol, startEpoch, endEpoch, interval):
+        key = (kind, symbol, interval)
+        start, end = int(startEpoch), int(endEpoch)
+        with self.lock:
+            entry, source = self._entry(key)
+            missing = missingRanges(entry.covered, start, end)
+            if not missing:
+                self.stats["memoryHits" if source == "memory" else "diskHits"] += 1
+            else:
+                self.stats["misses" if len(missing) == 1 and missing[0] == (start, end) else "partialHits"] += 1
+
+        records = []
+        if missing:
+            fetch = histData.getFnoBacktestData if kind == "fno" else histData.getEquityBacktestData
+            now = int(time.time())
+            records = [(fetch(symbol, missStart, missEnd, interval), missStart, min(missEnd, now))
+                       for missStart, missEnd in missing]
+
+        with self.lock:
+            if records:
+                for df, recordStart, recordEnd in records:
+                    entry.add(df, recordStart, recordEnd)
+                self._save(key, entry, records)
+            if missing or source != "memory":
+                self._evictMemory()
+            return entry.slice(start, end)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.memoryTotal = 0
+
+
+histCache = HistCache()
+
+
+def getFnoBacktestData(symbol, startEpoch, endEpoch, interval):
+    """backtestTools.histData.getFnoBacktestData behind the shared histCache."""
+    return histCache.get("fno", symbol, startEpoch, endEpoch, interval)
+
+
+def getEquityBacktestData(symbol, startEpoch, endEpoch, interval):
+    """backtestTools.histData.getEquityBacktestData behind the shared histCache."""
+    return histCache.get("equity", symbol, startEpoch, endEpoch, interval)
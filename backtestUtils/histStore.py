@@ -0,0 +1,159 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from backtestUtils import cacheRoot
+from backtestUtils.eventClock import istOffset
+
+storeRoot = os.path.join(cacheRoot, "histStore")
+
+
+def monthOf(epochs):
+    # IST calendar month of each epoch, as numpy datetime64[M]
+    days = (np.asarray(epochs, dtype=np.int64) + istOffset) // 86400
+    return days.astype("datetime64[D]").astype("datetime64[M]")
+
+
+def monthBounds(month):
+    # First and one-past-last epoch of an IST calendar month
+    start = np.datetime64(month, "M").astype("datetime64[s]").astype(np.int64) - istOffset
+    end = (np.datetime64(month, "M") + 1).astype("datetime64[s]").astype(np.int64) - istOffset
+    return int(start), int(end)
+
+
+class SymbolStore:
+    """
+    Candles of one symbol at one interval, stored as
+    storeRoot/<kind>/<interval>/<symbol>/<YYYY-MM>/{ti.npy, values.npy}.
+
+    values.npy is a (bars x columns) float64 block opened with mmap_mode="c":
+    a range inside one month comes back as a view of the mapped file with no
+    copy, and scripts that write into the frame only touch private pages.
+    """
+
+    def __init__(self, kind, symbol, interval):
+        self.path = os.path.join(storeRoot, kind, interval, symbol)
+        self.meta = None
+        metaFile = os.path.join(self.path, "meta.json")
+        if os.path.exists(metaFile):
+            with open(metaFile) as f:
+                self.meta = json.load(f)
+
+    @property
+    def exists(self):
+        return self.meta is not None
+
+    def months(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name for name in os.listdir(self.path) if os.path.isdir(os.path.join(self.path, name)))
+
+    def writeMonth(self, month, df):
+        numeric = df.select_dtypes(include=[np.number])
+        # Only numeric columns are stored and datetime is rebuilt from the index on read
+        dropped = [col for col in df.columns if col not in numeric.columns and col != "datetime"]
+        if dropped:
+            raise ValueError(f"Non-numeric columns {dropped} cannot be stored in {self.path}")
+        meta = {
+            "columns": list(numeric.columns),
+            "allColumns": list(df.columns),
+            "datetime": "datetime" in df.columns,
+        }
+        if self.meta is not None and self.meta["columns"] != meta["columns"]:
+            raise ValueError(f"Column mismatch for {self.path}: {self.meta['columns']} vs {meta['columns']}")
+
+        monthDir = os.path.join(self.path, str(month))
+        os.makedirs(monthDir, exist_ok=True)
+        np.save(os.path.join(monthDir, "ti.npy"), df.index.values.astype(np.int64))
+        np.save(os.path.join(monthDir, "values.npy"), numeric.values.astype(np.float64))
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        self.meta = meta
+
+    def readMonth(self, month):
+        monthDir = os.path.join(self.path, str(month))
+        if not os.path.isdir(monthDir):
+            return None, None
+        ti = np.load(os.path.join(monthDir, "ti.npy"), mmap_mode="r")
+        values = np.load(os.path.join(monthDir, "values.npy"), mmap_mode="c")
+        return ti, values
+
+    def read(self, startEpoch, endEpoch):
+        if not self.exists or endEpoch < startEpoch:
+            return None
+
+        slices = []
+        month = monthOf(startEpoch)
+        lastMonth = monthOf(endEpoch)
+        while month <= lastMonth:
+            ti, values = self.readMonth(month)
+            if ti is not None:
+                a = np.searchsorted(ti, startEpoch, "left")
+                b = np.searchsorted(ti, endEpoch, "right")
+                if b > a:
+                    slices.append((ti[a:b], values[a:b]))
+            month = month + 1
+
+        columns = self.meta["columns"]
+        if not slices:
+            df = pd.DataFrame(np.empty((0, len(columns))), index=np.empty(0, dtype=np.int64), columns=columns)
+        elif len(slices) == 1:
+            df = pd.DataFrame(slices[0][1], index=slices[0][0], columns=columns, copy=False)
+        else:
+            df = pd.DataFrame(np.concatenate([v for _, v in slices]), index=np.concatenate([t for t, _ in slices]),
+                              columns=columns, copy=False)
+
+        if self.meta["datetime"]:
+            # Same naive IST datetimes the history store returns
+            position = [col for col in self.meta["allColumns"] if col in columns or col == "datetime"].index("datetime")
+            df.insert(position, "datetime", pd.to_datetime(df.index.values + istOffset, unit="s"))
+        return df
+
+
+def getFnoBacktestData(symbol, startEpoch, endEpoch, interval):
+    """Drop-in for backtestTools.histData.getFnoBacktestData reading the local store."""
+    return SymbolStore("fno", symbol, interval).read(int(startEpoch), int(endEpoch))
+
+
+def getEquityBacktestData(symbol, startEpoch, endEpoch, interval):
+    """Drop-in for backtestTools.histData.getEquityBacktestData reading the local store."""
+    return SymbolStore("equity", symbol, interval).read(int(startEpoch), int(endEpoch))
+
+
+def importSymbols(symbols, startDate, endDate, intervals=("1Min",), kind="fno", logger=None):
+    """
+    One-time copy from backtestTools.histData into the local store, one month
+    per query. Months already present are skipped, so an interrupted import
+    can simply be run again.
+    """
+    from backtestTools import histData
+
+    fetch = histData.getFnoBacktestData if kind == "fno" else histData.getEquityBacktestData
+    for interval in intervals:
+        for symbol in symbols:
+            store = SymbolStore(kind, symbol, interval)
+            # The newest stored month may have been imported part way through
+            done = set(store.months()[:-1])
+            month = monthOf(startDate.timestamp())
+            while month <= monthOf(endDate.timestamp()):
+                if str(month) not in done:
+                    monthStart, monthEnd = monthBounds(month)
+                    try:
+                        df = fetch(symbol, monthStart, monthEnd - 1, interval)
+                    except Exception as e:
+                        df = None
+                        if logger is not None:
+                            logger.info(f"Import skipped {symbol} {interval} {month}: {e}")
+                    if df is not None and not df.empty:
+                        store.writeMonth(month, df.sort_index())
+                month = month + 1
+
+
+if __name__ == "__main__":
+    startTime = datetime.now()
+
+    # Example: index candles used by the overnight option strategies
+    importSymbols(["NIFTY 50", "NIFTY BANK"], datetime(2022, 1, 1), datetime(2025, 4, 30), intervals=("1Min", "5Min", "1H", "1D"))
+
+    print(f"Done. Ended in {datetime.now()-startTime}")
@@ -0,0 +1,119 @@
+import re
+import numpy as np
+from datetime import datetime
+from backtestUtils.expiryCalendar import getCalendar
+
+# NIFTY30JAN2524750CE -> underlying, expiry, strike, side
+optionPattern = re.compile(r"^(.+?)(\d{2}[A-Z]{3}\d{2})(\d+(?:\.\d+)?)(CE|PE)$")
+
+sideNames = ("CE", "PE")
+
+
+def expiryStringToEpoch(expiry):
+    return datetime.strptime(expiry, "%d%b%y").replace(hour=15, minute=20).timestamp()
+
+
+class InstrumentMaster:
+    """
+    Integer ids for contracts, with their parsed fields in parallel arrays.
+
+    A symbol string is parsed once, the first time it is seen; after that
+    the strike, side (0 CE, 1 PE, -1 not an option), expiry epoch, underlying
+    and lot size are array reads by id. idFor() goes the other way, from the
+    fields to the id, and only formats the symbol string for a new contract.
+    Lot sizes are filled in lazily from the expiry calendar.
+    """
+
+    def __init__(self, capacity=1024):
+        self.symbols = []
+        self.ids = {}
+        self.fieldIds = {}
+        self.underlyings = []
+        self.underlyingIds = {}
+
+        self.underlying = np.full(capacity, -1, dtype=np.int32)
+        self.expiryEpoch = np.full(capacity, np.nan)
+        self.strike = np.full(capacity, np.nan)
+        self.side = np.full(capacity, -1, dtype=np.int8)
+        self.lotSizes = np.full(capacity, -1, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _grow(self):
+        for name in ("underlying", "expiryEpoch", "strike", "side", "lotSizes"):
+            arr = getattr(self, name)
+            fill = np.nan if arr.dtype.kind == "f" else -1
+            setattr(self, name, np.concatenate([arr, np.full(len(arr), fill, dtype=arr.dtype)]))
+
+    def _underlyingId(self, baseSym):
+        if baseSym not in self.underlyingIds:
+            self.underlyingIds[baseSym] = len(self.underlyings)
+            self.underlyings.append(baseSym)
+        return self.underlyingIds[baseSym]
+
+    def _add(self, symbol, baseSym, expiry, strike, side):
+        instrumentId = len(self.symbols)
+        if instrumentId == len(self.side):
+            self._grow()
+        self.symbols.append(symbol)
+        self.ids[symbol] = instrumentId
+        if side >= 0:
+            self.fieldIds[(baseSym, expiry, strike, side)] = instrumentId
+            self.underlying[instrumentId] = self._underlyingId(baseSym)
+            self.expiryEpoch[instrumentId] = expiryStringToEpoch(expiry)
+            self.strike[instrumentId] = strike
+            self.side[instrumentId] = side
+        return instrumentId
+
+    def idOf(self, symbol):
+        instrumentId = self.ids.get(symbol)
+        if instrumentId is not None:
+            return instrumentId
+
+        match = optionPattern.match(symbol)
+        if match is None:
+            return self._add(symbol, None, None, np.nan, -1)
+        baseSym, expiry, strike, side = match.groups()
+        try:
+            expiryStringToEpoch(expiry)
+        except ValueError:
+            return self._add(symbol, None, None, np.nan, -1)
+        strike = float(strike)
+        return self._add(symbol, baseSym, expiry, int(strike) if strike.is_integer() else strike, sideNames.index(side))
+
+    def idFor(self, baseSym, expiry, strike, side):
+        side = sideNames.index(side) if isinstance(side, str) else int(side)
+        strike = int(strike) if float(strike).is_integer() else float(strike)
+        instrumentId = self.fieldIds.get((baseSym, expiry, strike, side))
+        if instrumentId is not None:
+            return instrumentId
+        return self.idOf(f"{baseSym}{expiry}{strike}{sideNames[side]}")
+
+    def idsOf(self, symbols):
+        return np.array([self.idOf(symbol) for symbol in symbols], dtype=np.int64)
+
+    def symbol(self, instrumentId):
+        return self.symbols[instrumentId]
+
+    def lotSize(self, instrumentId):
+        if self.lotSizes[instrumentId] < 0 and self.side[instrumentId] >= 0:
+            calendar = getCalendar(self.underlyings[self.underlying[instrumentId]])
+            expiryEpoch = self.expiryEpoch[instrumentId]
+            calendar.load(expiryEpoch, expiryEpoch)
+            self.lotSizes[instrumentId] = int(float(calendar.lookup([expiryEpoch], "LotSize")[0]))
+        return int(self.lotSizes[instrumentId])
+
+
+instruments = InstrumentMaster()
+
+
+def strikeOf(symbol):
+    strike = instruments.strike[instruments.idOf(symbol)]
+    return int(strike) if float(strike).is_integer() else strike
+
+
+def sideOf(symbol):
+    # "CE", "PE" or "" for anything that is not an option
+    side = instruments.side[instruments.idOf(symbol)]
+    return sideNames[side] if side >= 0 else ""
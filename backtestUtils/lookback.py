@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from backtestUtils import resample
+from backtestUtils.tradingCalendar import nseCalendar
+
+
+def fetchLookback(fetch, symbol, startEpoch, endEpoch, interval, warmupBars, calendar=nseCalendar,
+                  maxExtensions=3, **fetchKwargs):
+    """
+    Bars of interval from startEpoch to endEpoch plus exactly warmupBars bars before startEpoch.
+
+    The read starts where the calendar says the warm-up begins, so one query
+    normally covers it. If the data index turns out to have fewer bars than
+    the calendar expected (a missing day, a holiday the calendar does not
+    know), only the shortfall is read again further back, up to
+    maxExtensions times. fetch is any getFnoBacktestData-shaped function.
+    The number of warm-up rows actually returned is in df.attrs["warmupBars"].
+    """
+    dailyAtOpen = fetchKwargs.get("dailyAtOpen", False)
+    fetchStart = calendar.lookbackStart(startEpoch, warmupBars, interval, dailyAtOpen)
+    # Rows labelled up to the last warm-up bar count as warm-up; for daily bars
+    # that leaves out the start day, whose midnight label precedes a 09:15 start
+    lastWarmup = calendar.lookbackStart(startEpoch, 1, interval, dailyAtOpen)
+
+    df = fetch(symbol, fetchStart, endEpoch, interval, **fetchKwargs)
+    if df is None:
+        return None
+    df = df[df["c"].notna()]
+
+    for _ in range(maxExtensions):
+        shortfall = warmupBars - int((df.index <= lastWarmup).sum())
+        if shortfall <= 0:
+            break
+        earlierStart = calendar.lookbackStart(fetchStart, shortfall, interval, dailyAtOpen)
+        earlier = fetch(symbol, earlierStart, fetchStart - 1, interval, **fetchKwargs)
+        fetchStart = earlierStart
+        if earlier is None or earlier.empty:
+            continue
+        earlier = earlier[earlier["c"].notna()]
+        if len(df):
+            earlier = earlier[earlier.index < df.index[0]]
+        df = pd.concat([earlier, df])
+
+    warmup = np.flatnonzero(df.index <= lastWarmup)
+    if len(warmup) > warmupBars:
+        df = df.iloc[len(warmup) - warmupBars:]
+    df.attrs["warmupBars"] = min(len(warmup), warmupBars)
+    return df
+
+
+def getFnoLookbackData(symbol, startEpoch, endEpoch, interval, warmupBars, dailyAtOpen=False):
+    """resample.getFnoBacktestData from startEpoch with warmupBars bars of warm-up ahead of it."""
+    return fetchLookback(resample.getFnoBacktestData, symbol, startEpoch, endEpoch, interval, warmupBars,
+                         dailyAtOpen=dailyAtOpen)
+
+
+def getEquityLookbackData(symbol, startEpoch, endEpoch, interval, warmupBars, dailyAtOpen=False):
+    """resample.getEquityBacktestData from startEpoch with warmupBars bars of warm-up ahead of it."""
+    return fetchLookback(resample.getEquityBacktestData, symbol, startEpoch, endEpoch, interval, warmupBars,
+                         dailyAtOpen=dailyAtOpen)
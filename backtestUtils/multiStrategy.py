@@ -0,0 +1,178 @@
+import copy
+import numpy as np
+from datetime import datetime
+from backtestUtils.histCache import getFnoBacktestData
+from backtestUtils.chainPreload import loadChainBlocks
+from backtestUtils.prefetch import prefetchOptOverNightAlgoLogic
+from backtestUtils.eventClock import minuteOfDay
+from backtestUtils.expiryCalendar import getCalendar, dayNumber
+from backtestUtils.timeframeAlign import alignTimeframes, newBarMask
+from backtestUtils.resample import resampleBars
+from backtestUtils.tradingCalendar import nseCalendar
+
+
+class MarketStream:
+    """
+    One pass over an index's 1-min grid that several strategies step through together.
+
+    Everything that does not depend on a strategy is done once here: the candle
+    fetch and resampling to higher intervals, datetime conversion, higher timeframe alignment, expiry lookups,
+    the option chain preload, and a per-bar memo of option prices so two
+    strategies holding the same contract only look it up once.
+    """
+
+    def __init__(self, baseSym, indexSym, startDate, endDate, intervals=("1Min", "5Min"),
+                 warmupBars=500, strikeBand=10, resumeEpoch=None):
+        self.baseSym = baseSym
+        self.indexSym = indexSym
+        self.startEpoch = startDate.timestamp()
+        self.endEpoch = endDate.timestamp()
+
+        # Only 1-min bars are read, higher intervals are built from them; the read starts
+        # exactly warmupBars bars of the longest interval before startDate
+        self.calendar = nseCalendar
+        fetchStart = min([self.calendar.lookbackStart(self.startEpoch, warmupBars, interval)
+                          for interval in intervals if interval != "1Min"] + [self.startEpoch])
+        base = getFnoBacktestData(indexSym, fetchStart, self.endEpoch, "1Min").dropna()
+        self.frames = {"1Min": base[base.index >= self.startEpoch]}
+        for interval in intervals:
+            if interval != "1Min":
+                self.frames[interval] = resampleBars(base, interval)
+        self.df = self.frames["1Min"]
+
+        self.minutes = self.df.index.values
+        self.humanTimes = [datetime.fromtimestamp(t) for t in self.minutes]
+        self.minuteOfDay = minuteOfDay(self.minutes)
+        self.windows = {}
+
+        higher = {interval: frame for interval, frame in self.frames.items() if interval != "1Min"}
+        self.tfPos = alignTimeframes(self.df, higher)
+        self.newBar = {interval: newBarMask(pos) for interval, pos in self.tfPos.items()}
+
+        # A resumed run keeps the frames from startDate, so indicators built over them match a
+        # full run, but only steps (and preloads expiries and the chain for) bars from resumeEpoch
+        self.firstBar = 0 if resumeEpoch is None else int(np.searchsorted(self.minutes, resumeEpoch))
+        stepped = self.df.iloc[self.firstBar:]
+
+        calendar = getCalendar(baseSym)
+        calendar.load(max(self.startEpoch, resumeEpoch or 0), self.endEpoch + 86400)
+        self.expiryCalendar = calendar
+
+        self.chainBlocks = loadChainBlocks(baseSym, stepped, strikeBand) if strikeBand is not None and len(stepped) else []
+
+        self.i = -1
+        self.priceMemo = {}
+
+    def window(self, start=None, end=None):
+        # Session mask over the 1-min grid between two times of day (inclusive), built once per window
+        key = (start, end)
+        if key not in self.windows:
+            self.windows[key] = self.calendar.sessionMask(self.minutes, start, end)
+        return self.windows[key]
+
+    def step(self, i):
+        self.i = i
+        self.priceMemo = {}
+
+    def fetch(self, symbol, timestamp, fetcher):
+        key = (symbol, timestamp)
+        if key not in self.priceMemo:
+            self.priceMemo[key] = fetcher(symbol, timestamp)
+        return self.priceMemo[key]
+
+
+class streamAlgoLogic(prefetchOptOverNightAlgoLogic):
+    """
+    Base for strategies written as onStart / onBar / onEnd.
+
+    Each instance keeps its own openPnl, closedPnl and BacktestResults folder.
+    run() drives a single strategy over its own MarketStream; runStrategies()
+    drives several over one shared stream. A strategy that calls
+    startPrefetch() in onStart gets prefetch() called with the index close
+    before every bar.
+    """
+
+    stream = None
+    # PositionBook bound to this strategy, if it trades through one
+    book = None
+    # Attributes carried across a snapshot/restore handoff, on top of openPnl
+    stateAttrs = ()
+
+    def attach(self, stream):
+        self.stream = stream
+        for block in stream.chainBlocks:
+            self.addChainBlock(block)
+
+    def onStart(self, stream):
+        pass
+
+    def onBar(self, stream, i):
+        raise NotImplementedError
+
+    def onEnd(self, stream):
+        self.pnlCalculator()
+        self.combinePnlCsv()
+
+    def snapshot(self):
+        state = {
+            "openPnl": self.openPnl.copy(),
+            "attrs": {attr: getattr(self, attr) for attr in self.stateAttrs if hasattr(self, attr)},
+        }
+        if self.book is not None:
+            state["book"] = copy.deepcopy(self.book)
+        return state
+
+    def restore(self, state):
+        self.openPnl = state["openPnl"].copy()
+        if "book" in state:
+            self.book = copy.deepcopy(state["book"])
+            self.book.engine = self
+        if "closedPnl" in state:
+            self.closedPnl = state["closedPnl"].copy()
+        for attr, value in state["attrs"].items():
+            setattr(self, attr, value)
+
+    def fetchAndCacheFnoHistData(self, symbol, timestamp, *args, **kwargs):
+        if self.stream is None:
+            return super().fetchAndCacheFnoHistData(symbol, timestamp, *args, **kwargs)
+        fetcher = lambda sym, ts: super(streamAlgoLogic, self).fetchAndCacheFnoHistData(sym, ts, *args, **kwargs)
+        return self.stream.fetch(symbol, float(timestamp), fetcher)
+
+    def run(self, startDate, endDate, baseSym, indexSym, state=None, **streamKwargs):
+        stream = MarketStream(baseSym, indexSym, startDate, endDate, **streamKwargs)
+        runStrategies([self], stream, None if state is None else [state])
+        return self.closedPnl, self.fileDir["backtestResultsStrategyUid"]
+
+
+def runStrategies(strategies, stream, states=None, onDayClose=None):
+    # states optionally holds one snapshot() per strategy to resume from,
+    # onDayClose(i) is called after the last bar i of every day
+    first = min(stream.firstBar, len(stream.minutes) - 1)
+    for n, strategy in enumerate(strategies):
+        strategy.attach(stream)
+        strategy.timeData = float(stream.minutes[first])
+        strategy.humanTime = stream.humanTimes[first]
+        strategy.onStart(stream)
+        if states is not None and states[n] is not None:
+            strategy.restore(states[n])
+        strategy.startState = strategy.snapshot()
+
+    days = dayNumber(stream.minutes)
+    closes = stream.df["c"].values
+    for i in range(stream.firstBar, len(stream.minutes)):
+        timeData = stream.minutes[i]
+        stream.step(i)
+        for strategy in strategies:
+            strategy.timeData = float(timeData)
+            strategy.humanTime = stream.humanTimes[i]
+            if strategy.prefetcher is not None:
+                strategy.prefetch(closes[i])
+            strategy.onBar(stream, i)
+        if onDayClose is not None and (i + 1 == len(days) or days[i + 1] != days[i]):
+            onDayClose(i)
+
+    for strategy in strategies:
+        strategy.stopPrefetch()
+        strategy.onEnd(stream)
+
+    return [strategy.closedPnl for strategy in strategies]
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from collections import OrderedDict
+from backtestTools.algoLogic import optOverNightAlgoLogic
+from backtestTools.histData import getFnoBacktestData
+from backtestUtils.eventClock import istOffset
+from backtestUtils.instruments import instruments
+
+priceFields = ("o", "h", "l", "c")
+countFields = ("v", "oi")
+
+
+class CachedContract:
+    """One symbol's 1-min history: int32 epochs, float64 OHLC and int64 volume/OI."""
+
+    def __init__(self, df, expiryEpoch, windowStart, windowEnd):
+        self.expiryEpoch = expiryEpoch
+        self.windowStart = windowStart
+        self.windowEnd = windowEnd
+        self.minutes = df.index.values.astype(np.int32)
+        self.prices = df[list(priceFields)].values.astype(np.float64)
+        self.counts = np.zeros((len(df), len(countFields)), dtype=np.int64)
+        for n, col in enumerate(countFields):
+            if col in df.columns:
+                self.counts[:, n] = np.nan_to_num(df[col].values.astype(np.float64)).astype(np.int64)
+        self.nbytes = self.minutes.nbytes + self.prices.nbytes + self.counts.nbytes
+
+    def covers(self, timestamp):
+        return self.windowStart <= timestamp <= self.windowEnd
+
+    def lookup(self, timestamp):
+        pos = np.searchsorted(self.minutes, timestamp)
+        if pos >= len(self.minutes) or self.minutes[pos] != timestamp or np.isnan(self.prices[pos, 3]):
+            return None
+        # Prices are kept at the source's float64, so they come back exactly as histData returned them
+        data = {col: float(value) for col, value in zip(priceFields, self.prices[pos])}
+        data.update({col: int(value) for col, value in zip(countFields, self.counts[pos])})
+        return data
+
+
+class OptionCache:
+    """
+    Memory-budgeted cache of option histories for fetchAndCacheFnoHistData,
+    keyed by instrument id.
+
+    A contract is loaded from the day it is first asked for until its expiry
+    (other symbols get windowDays). Before anything is evicted on size,
+    contracts whose expiry has passed are dropped; after that the least
+    recently used go first. residentBytes and stats report what is held
+    and what was evicted.
+    """
+
+    windowDays = 30
+
+    def __init__(self, budgetBytes=512 * 1024**2, endEpoch=None):
+        self.budgetBytes = budgetBytes
+        self.endEpoch = endEpoch
+        self.contracts = OrderedDict()
+        self.residentBytes = 0
+        self.stats = {"hits": 0, "misses": 0, "expiredDrops": 0, "lruEvictions": 0}
+
+    def _load(self, instrumentId, timestamp, startEpoch=None):
+        expiryEpoch = instruments.expiryEpoch[instrumentId]
+        expiryEpoch = None if np.isnan(expiryEpoch) else float(expiryEpoch)
+        dayStart = timestamp - (timestamp + istOffset) % 86400
+        startEpoch = dayStart if startEpoch is None else min(startEpoch, dayStart)
+        endEpoch = expiryEpoch + 600 if expiryEpoch is not None else startEpoch + self.windowDays * 86400
+        if self.endEpoch is not None:
+            endEpoch = max(min(endEpoch, self.endEpoch), timestamp)
+        df = getFnoBacktestData(instruments.symbol(instrumentId), startEpoch, endEpoch, "1Min")
+        if df is None or df.empty:
+            # Kept as an empty contract so an untraded strike is not asked for again every minute
+            df = pd.DataFrame(columns=list(priceFields), index=np.empty(0, dtype=np.int64), dtype=np.float64)
+        return CachedContract(df, expiryEpoch, startEpoch, endEpoch)
+
+    def _remove(self, instrumentId):
+        contract = self.contracts.pop(instrumentId)
+        self.residentBytes -= contract.nbytes
+
+    def evict(self, timestamp):
+        for instrumentId in [k for k, c in self.contracts.items() if c.expiryEpoch is not None and c.expiryEpoch + 600 < timestamp]:
+            self._remove(instrumentId)
+            self.stats["expiredDrops"] += 1
+        while self.residentBytes > self.budgetBytes and len(self.contracts) > 1:
+            self._remove(next(iter(self.contracts)))
+            self.stats["lruEvictions"] += 1
+
+    def get(self, symbol, timestamp):
+        return self.getById(instruments.idOf(symbol), timestamp)
+
+    def getById(self, instrumentId, timestamp):
+        contract = self.contracts.get(instrumentId)
+        if contract is not None and contract.covers(timestamp):
+            self.contracts.move_to_end(instrumentId)
+            self.stats["hits"] += 1
+            data = contract.lookup(timestamp)
+            if data is None:
+                raise Exception(f"No data for {instruments.symbol(instrumentId)} at {datetime.fromtimestamp(timestamp)}")
+            return data
+
+        # Not cached, or asked for a bar outside the cached window
+        self.stats["misses"] += 1
+        startEpoch = None
+        if contract is not None:
+            startEpoch = contract.windowStart
+            self._remove(instrumentId)
+        contract = self._load(instrumentId, timestamp, startEpoch)
+        self.contracts[instrumentId] = contract
+        self.residentBytes += contract.nbytes
+        self.evict(timestamp)
+
+        data = contract.lookup(timestamp)
+        if data is None:
+            raise Exception(f"No data for {instruments.symbol(instrumentId)} at {datetime.fromtimestamp(timestamp)}")
+        return data
+
+
+class budgetOptOverNightAlgoLogic(optOverNightAlgoLogic):
+    """
+    optOverNightAlgoLogic whose fetchAndCacheFnoHistData keeps option
+    histories in an OptionCache instead of the unbounded per-symbol cache.
+    Set cacheBudget (bytes) on the class or instance to change the budget.
+    Calls with extra arguments (another interval or range) are not what the
+    cache holds and go to the engine's own fetchAndCacheFnoHistData.
+    """
+
+    cacheBudget = 512 * 1024**2
+    optionCache = None
+
+    def fetchAndCacheFnoHistData(self, symbol, timestamp, *args, **kwargs):
+        if args or kwargs:
+            return super().fetchAndCacheFnoHistData(symbol, timestamp, *args, **kwargs)
+        if self.optionCache is None:
+            self.optionCache = OptionCache(self.cacheBudget)
+        return self.optionCache.get(symbol, float(timestamp))
@@ -0,0 +1,169 @@
+import itertools
+import numpy as np
+import pandas as pd
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from backtestUtils.histCache import getFnoBacktestData
+from backtestUtils.chainPreload import ChainBlock, loadChainBlocks
+from backtestUtils.lookback import fetchLookback
+
+
+def shareArray(arr):
+    # Copy arr into a new shared memory block, return the block and what a worker needs to attach
+    arr = np.ascontiguousarray(arr)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm, (shm.name, arr.shape, arr.dtype.str)
+
+
+def attachArray(spec, handles):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    handles.append(shm)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+class SharedData:
+    """
+    Index frames and option chain blocks loaded once in the parent process and
+    placed in shared memory, so every worker of a sweep reads the same pages.
+    Only the numeric columns of each frame are shared.
+    """
+
+    def __init__(self, frames, chainBlocks=()):
+        self.handles = []
+        self.frameSpecs = {}
+        for interval, df in frames.items():
+            numeric = df.select_dtypes(include=[np.number])
+            shm, indexSpec = shareArray(df.index.values)
+            self.handles.append(shm)
+            shm, valueSpec = shareArray(numeric.values.astype(np.float64))
+            self.handles.append(shm)
+            self.frameSpecs[interval] = (indexSpec, valueSpec, list(numeric.columns))
+
+        self.chainSpecs = []
+        for block in chainBlocks:
+            specs = []
+            for arr in (block.strikes, block.minutes, block.values):
+                shm, spec = shareArray(arr)
+                self.handles.append(shm)
+                specs.append(spec)
+            self.chainSpecs.append((block.baseSym, block.expiry, specs))
+
+    def specs(self):
+        return self.frameSpecs, self.chainSpecs
+
+    def release(self):
+        for shm in self.handles:
+            shm.close()
+            shm.unlink()
+        self.handles = []
+
+
+workerData = {}
+
+
+def attachWorker(specs):
+    # Pool initializer: map the shared blocks once per worker process
+    frameSpecs, chainSpecs = specs
+    handles = []
+    frames = {}
+    for interval, (indexSpec, valueSpec, columns) in frameSpecs.items():
+        index = attachArray(indexSpec, handles)
+        values = attachArray(valueSpec, handles)
+        frames[interval] = pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+    chainBlocks = []
+    for baseSym, expiry, (strikeSpec, minuteSpec, valueSpec) in chainSpecs:
+        chainBlocks.append(ChainBlock.fromArrays(
+            baseSym, expiry, attachArray(strikeSpec, handles), attachArray(minuteSpec, handles), attachArray(valueSpec, handles)))
+
+    workerData.update({"frames": frames, "chainBlocks": chainBlocks, "handles": handles})
+
+
+def getSweepData(algo, symbol, startEpoch, endEpoch, interval, warmupBars=0):
+    """
+    getFnoBacktestData for strategies that can run inside a sweep, with
+    warmupBars bars ahead of startEpoch.
+
+    Inside a sweep worker the frame comes from shared memory (copied, since the
+    strategies add columns and dropna in place); otherwise it is read through histCache.
+    """
+    frames = getattr(algo, "sweepFrames", None)
+    if frames and interval in frames:
+        df = frames[interval]
+        first = max(int(np.searchsorted(df.index.values, startEpoch)) - warmupBars, 0)
+        df = df.iloc[first:]
+        return df[df.index <= endEpoch].copy()
+    return fetchLookback(getFnoBacktestData, symbol, startEpoch, endEpoch, interval, warmupBars)
+
+
+def summarize(closedPnl):
+    if closedPnl is None or closedPnl.empty:
+        return {"Pnl": 0.0, "MaxDrawdown": 0.0, "Trades": 0}
+
+    sortCol = "ExitTime" if "ExitTime" in closedPnl.columns else closedPnl.columns[0]
+    equity = closedPnl.sort_values(sortCol)["Pnl"].cumsum().values
+    peak = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:]
+    return {"Pnl": float(equity[-1]), "MaxDrawdown": float((peak - equity).max()), "Trades": int(len(closedPnl))}
+
+
+def runCombination(args):
+    strategyCls, names, (runId, values), runArgs, nomenclature = args
+    params = dict(zip(names, values))
+    devName, strategyName, version = nomenclature
+
+    algo = strategyCls(devName, f"{strategyName}_{runId}", version)
+    algo.params = params
+    algo.sweepFrames = workerData.get("frames", {})
+    if hasattr(algo, "addChainBlock"):
+        for block in workerData.get("chainBlocks", []):
+            algo.addChainBlock(block)
+
+    try:
+        algo.run(*runArgs)
+        result = summarize(algo.closedPnl)
+    except Exception as e:
+        # The row only carries the message; the full traceback goes to this run's strategy log
+        algo.strategyLogger.exception(f"Sweep combination {runId} {params} failed")
+        result = {"Pnl": np.nan, "MaxDrawdown": np.nan, "Trades": 0, "Error": str(e)}
+    return {"RunId": runId, **params, **result}
+
+
+def runSweep(strategyCls, paramGrid, startDate, endDate, baseSym, indexSym,
+             intervals=("1Min", "5Min"), warmupBars=500, strikeBand=None,
+             processes=4, devName="NA", strategyName="sweep", version="v1"):
+    """
+    Run strategyCls once per combination in paramGrid ({name: [values]}).
+
+    Index candles for every interval (and, with strikeBand, the option chain)
+    are fetched once here and shared with a process pool. Strategies read
+    their parameters from self.params and their candles via getSweepData.
+    Returns one row per combination with Pnl, MaxDrawdown and Trades.
+    """
+    startEpoch = startDate.timestamp()
+    endEpoch = endDate.timestamp()
+
+    frames = {}
+    for interval in intervals:
+        # Every interval comes with exactly warmupBars bars ahead of startDate; getSweepData cuts what each run asks for
+        frames[interval] = fetchLookback(getFnoBacktestData, indexSym, startEpoch, endEpoch, interval, warmupBars)
+
+    chainBlocks = []
+    if strikeBand is not None:
+        df = frames["1Min"]
+        chainBlocks = loadChainBlocks(baseSym, df[df.index >= startEpoch].dropna(), strikeBand)
+
+    names = list(paramGrid.keys())
+    combinations = list(enumerate(itertools.product(*paramGrid.values())))
+    tasks = [(strategyCls, names, combo, (startDate, endDate, baseSym, indexSym), (devName, strategyName, version))
+             for combo in combinations]
+
+    shared = SharedData(frames, chainBlocks)
+    try:
+        with mp.Pool(processes, initializer=attachWorker, initargs=(shared.specs(),)) as pool:
+            results = pool.map(runCombination, tasks)
+    finally:
+        shared.release()
+
+    return pd.DataFrame(results).sort_values("Pnl", ascending=False).reset_index(drop=True)
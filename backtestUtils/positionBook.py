@@ -0,0 +1,227 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from backtestUtils.instruments import instruments, sideNames
+
+
+class PositionBook:
+    """
+    Struct-of-arrays replacement for iterating openPnl row by row.
+
+    Every position lives at a fixed slot in a set of parallel NumPy arrays,
+    keyed to the instrument master by instrumentId so strike and side checks
+    never parse the symbol string.
+    MTM refresh and Target/Stoploss/Expiry checks run as array operations over
+    the open slots.
+
+    With engine set (the algoLogic that owns the book) every entry and exit is
+    also placed through engine.entryOrder/exitOrder and refreshed prices are
+    written into engine.openPnl, so pnlCalculator, netPnl, closedPnl and the
+    report CSVs stay the engine's own. Without it the book stands alone and
+    closedPnlDf() builds the closed legs once at the end.
+    """
+
+    closedColumns = ["Key", "ExitTime", "Symbol", "EntryPrice", "ExitPrice", "Quantity", "PositionStatus", "Pnl", "ExitType"]
+
+    def __init__(self, extraColumns=None, capacity=64, engine=None):
+        self.engine = engine
+        self.columns = list(extraColumns or [])
+        self.extraColumns = [col for col in (extraColumns or []) if col not in ("Target", "Stoploss", "Expiry")]
+        self.size = 0
+        self.symbol = np.empty(capacity, dtype=object)
+        self.instrumentId = np.full(capacity, -1, dtype=np.int64)
+        self.entryTime = np.zeros(capacity)
+        self.entryPrice = np.zeros(capacity)
+        self.currentPrice = np.zeros(capacity)
+        self.quantity = np.zeros(capacity)
+        self.positionStatus = np.zeros(capacity, dtype=np.int8)
+        self.target = np.full(capacity, np.nan)
+        self.stoploss = np.full(capacity, np.nan)
+        self.expiry = np.full(capacity, np.inf)
+        self.isOpen = np.zeros(capacity, dtype=bool)
+        self.exitTime = np.zeros(capacity)
+        self.exitPrice = np.zeros(capacity)
+        self.exitType = np.empty(capacity, dtype=object)
+        self.engineKey = np.empty(capacity, dtype=object)
+        self.extras = {col: np.empty(capacity, dtype=object) for col in self.extraColumns}
+
+    def _grow(self):
+        capacity = len(self.entryPrice) * 2
+        for name in ("symbol", "instrumentId", "entryTime", "entryPrice", "currentPrice", "quantity", "positionStatus",
+                     "target", "stoploss", "expiry", "isOpen", "exitTime", "exitPrice", "exitType", "engineKey"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        self.target[self.size:] = np.nan
+        self.stoploss[self.size:] = np.nan
+        self.expiry[self.size:] = np.inf
+        self.isOpen[self.size:] = False
+        for col, old in self.extras.items():
+            new = np.empty(capacity, dtype=object)
+            new[:len(old)] = old
+            self.extras[col] = new
+
+    def __getstate__(self):
+        # Snapshots and checkpoints carry the book without its engine, restore() binds it again
+        state = self.__dict__.copy()
+        state["engine"] = None
+        return state
+
+    @property
+    def empty(self):
+        return not self.isOpen[:self.size].any()
+
+    def openIdx(self):
+        return np.flatnonzero(self.isOpen[:self.size])
+
+    def entry(self, timeData, entryPrice, symbol, quantity, positionStatus="BUY", extraCols=None):
+        if self.size == len(self.entryPrice):
+            self._grow()
+
+        extraCols = extraCols or {}
+        i = self.size
+        self.symbol[i] = symbol
+        self.instrumentId[i] = instruments.idOf(symbol)
+        self.entryTime[i] = timeData
+        self.entryPrice[i] = entryPrice
+        self.currentPrice[i] = entryPrice
+        self.quantity[i] = quantity
+        self.positionStatus[i] = 1 if positionStatus == "BUY" else -1
+        self.target[i] = extraCols.get("Target", np.nan)
+        self.stoploss[i] = extraCols.get("Stoploss", np.nan)
+        self.expiry[i] = extraCols.get("Expiry", np.inf)
+        self.isOpen[i] = True
+        for col in self.extraColumns:
+            self.extras[col][i] = extraCols.get(col)
+        self.size += 1
+
+        if self.engine is not None:
+            before = self.engine.openPnl.index
+            self.engine.entryOrder(entryPrice, symbol, quantity, positionStatus, *([extraCols] if extraCols else []))
+            self.engineKey[i] = self.engine.openPnl.index.difference(before)[0]
+        return i
+
+    def strikes(self):
+        return instruments.strike[self.instrumentId[:self.size]]
+
+    def sideMask(self, side):
+        # Open slots on the CE or PE side
+        n = self.size
+        return (instruments.side[self.instrumentId[:n]] == sideNames.index(side)) & self.isOpen[:n]
+
+    def refresh(self, timestamp, fetch, logger=None):
+        # fetch is usually algo.fetchAndCacheFnoHistData; only open slots are touched
+        idx = self.openIdx()
+        for i in idx:
+            try:
+                self.currentPrice[i] = fetch(self.symbol[i], timestamp)["c"]
+            except Exception as e:
+                if logger is not None:
+                    logger.info(e)
+        self.syncEngine(idx)
+
+    def syncEngine(self, idx):
+        # CurrentPrice of the given slots into engine.openPnl, in one assignment
+        if self.engine is not None and len(idx):
+            self.engine.openPnl.loc[list(self.engineKey[idx]), "CurrentPrice"] = self.currentPrice[idx]
+
+    def pnl(self):
+        n = self.size
+        return (self.currentPrice[:n] - self.entryPrice[:n]) * self.quantity[:n] * self.positionStatus[:n]
+
+    def openPnlSum(self):
+        idx = self.openIdx()
+        return float(self.pnl()[idx].sum())
+
+    def targetMask(self):
+        n = self.size
+        price, target, status = self.currentPrice[:n], self.target[:n], self.positionStatus[:n]
+        with np.errstate(invalid="ignore"):
+            hit = np.where(status == 1, price >= target, price <= target)
+        return hit & self.isOpen[:n]
+
+    def stoplossMask(self):
+        n = self.size
+        price, stoploss, status = self.currentPrice[:n], self.stoploss[:n], self.positionStatus[:n]
+        with np.errstate(invalid="ignore"):
+            hit = np.where(status == 1, price <= stoploss, price >= stoploss)
+        return hit & self.isOpen[:n]
+
+    def expiryMask(self, timeData):
+        n = self.size
+        return (timeData >= self.expiry[:n]) & self.isOpen[:n]
+
+    def exit(self, mask, timeData, exitType, exitPrice=None):
+        # mask may be a boolean mask over the book or an array of slot indices
+        idx = np.flatnonzero(mask) if np.asarray(mask).dtype == bool else np.asarray(mask, dtype=np.int64)
+        idx = idx[self.isOpen[idx]]
+        if len(idx) == 0:
+            return idx
+
+        self.exitTime[idx] = timeData
+        self.exitPrice[idx] = self.currentPrice[idx] if exitPrice is None else exitPrice
+        self.currentPrice[idx] = self.exitPrice[idx]
+        self.exitType[idx] = exitType
+        self.isOpen[idx] = False
+
+        if self.engine is not None:
+            # exitOrder fills at CurrentPrice, which now holds the exit price
+            self.syncEngine(idx)
+            for i in idx:
+                self.engine.exitOrder(self.engineKey[i], exitType)
+        return idx
+
+    def exitAll(self, timeData, exitType):
+        return self.exit(self.isOpen[:self.size], timeData, exitType)
+
+    def checkExits(self, timeData):
+        # Same precedence as the strategies: Target, then Stoploss, then Expiry
+        self.exit(self.targetMask(), timeData, "TargetHit")
+        self.exit(self.stoplossMask(), timeData, "StoplossHit")
+        self.exit(self.expiryMask(timeData), timeData, "ExpiryExit")
+
+    def closedPnlDf(self):
+        n = self.size
+        closed = np.flatnonzero(~self.isOpen[:n])
+        pnl = (self.exitPrice[closed] - self.entryPrice[closed]) * self.quantity[closed] * self.positionStatus[closed]
+
+        closedPnl = pd.DataFrame({
+            "Key": [datetime.fromtimestamp(t) for t in self.entryTime[closed]],
+            "ExitTime": [datetime.fromtimestamp(t) for t in self.exitTime[closed]],
+            "Symbol": self.symbol[closed],
+            "EntryPrice": self.entryPrice[closed],
+            "ExitPrice": self.exitPrice[closed],
+            "Quantity": self.quantity[closed],
+            "PositionStatus": self.positionStatus[closed].astype(int),
+            "Pnl": pnl,
+            "ExitType": self.exitType[closed],
+        }, columns=self.closedColumns)
+
+        for col, values in (("Target", self.target), ("Stoploss", self.stoploss), ("Expiry", self.expiry)):
+            if col in self.columns:
+                closedPnl[col] = values[closed]
+        for col in self.extraColumns:
+            closedPnl[col] = self.extras[col][closed]
+
+        return closedPnl.sort_values("ExitTime", kind="stable").reset_index(drop=True)
+
+
+def fetchLegs(fetch, symbols, timestamp, logger=None):
+    """
+    fetch(symbol, timestamp) for every leg of a multi-leg order before any of
+    it is entered. Returns the rows in symbol order, or None as soon as one
+    leg cannot be priced, so a butterfly or batman goes in whole or not at all.
+    """
+    legs = []
+    for symbol in symbols:
+        try:
+            data = fetch(symbol, timestamp)
+        except Exception as e:
+            data = None
+            if logger is not None:
+                logger.info(f"Error fetching data for {symbol}: {e}")
+        if data is None:
+            return None
+        legs.append(data)
+    return legs
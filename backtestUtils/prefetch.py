@@ -0,0 +1,132 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from backtestTools.histData import getFnoBacktestData
+from backtestUtils.chainPreload import preloadOptOverNightAlgoLogic, strikeDist, sides, fields, expiryToEpoch
+from backtestUtils.expiryCalendar import getCalendar
+from backtestUtils.eventClock import istOffset
+from backtestUtils.instruments import instruments
+
+
+class OptionPrefetcher:
+    """
+    Loads option contracts the minute loop is likely to ask for next, in
+    worker threads, while the loop keeps running.
+
+    update() is called with the current spot and time. Whenever the ATM
+    strike or the current expiry changes it queues the strikes within
+    strikeBand steps of ATM, for the current and the next expiry, each read
+    from now until its expiry. lookup() only answers from what has already
+    arrived and returns None otherwise, so it never waits on I/O.
+    """
+
+    def __init__(self, baseSym, endEpoch, strikeBand=3, workers=2, logger=None):
+        self.baseSym = baseSym
+        self.endEpoch = endEpoch
+        self.strikeBand = strikeBand
+        self.step = strikeDist.get(baseSym, 50)
+        self.calendar = getCalendar(baseSym)
+        self.logger = logger
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+        self.ready = {}
+        self.requested = {}
+        self.lastKey = None
+        self.stats = {"queued": 0, "hits": 0, "notReady": 0}
+
+    def _load(self, instrumentId, startEpoch, endEpoch):
+        symbol = instruments.symbol(instrumentId)
+        try:
+            df = getFnoBacktestData(symbol, startEpoch, endEpoch, "1Min")
+        except Exception as e:
+            if self.logger is not None:
+                self.logger.info(f"Prefetch skipped {symbol}: {e}")
+            return
+        if df is None or df.empty:
+            return
+        # Published in one assignment so the loop sees either nothing or the whole contract
+        self.ready[instrumentId] = (df.index.values.astype(np.float64), df[list(fields)].values.astype(np.float64))
+
+    def _expiries(self, timestamp):
+        self.calendar.load(timestamp, timestamp + 86400 * 10)
+        current = self.calendar.lookup([timestamp], "CurrentExpiry")[0]
+        following = self.calendar.lookup([expiryToEpoch(current) + 86400], "CurrentExpiry")[0]
+        return current, following
+
+    def update(self, spot, timestamp):
+        if spot is None or np.isnan(spot):
+            return
+        atm = int(round(spot / self.step) * self.step)
+        dayStart = timestamp - (timestamp + istOffset) % 86400
+        key = (atm, dayStart)
+        if key == self.lastKey:
+            return
+        self.lastKey = key
+
+        current, following = self._expiries(timestamp)
+        self.drop(timestamp)
+        for expiry in (current, following):
+            untilEpoch = min(expiryToEpoch(expiry) + 600, self.endEpoch)
+            for offset in range(-self.strikeBand, self.strikeBand + 1):
+                for side in sides:
+                    instrumentId = instruments.idFor(self.baseSym, expiry, atm + offset * self.step, side)
+                    if instrumentId in self.requested:
+                        continue
+                    self.requested[instrumentId] = expiryToEpoch(expiry)
+                    self.pool.submit(self._load, instrumentId, dayStart, untilEpoch)
+                    self.stats["queued"] += 1
+
+    def drop(self, timestamp):
+        # Contracts that have expired are never asked for again
+        for instrumentId, expiryEpoch in list(self.requested.items()):
+            if expiryEpoch + 600 < timestamp:
+                del self.requested[instrumentId]
+                self.ready.pop(instrumentId, None)
+
+    def lookup(self, instrumentId, timestamp):
+        contract = self.ready.get(instrumentId)
+        if contract is None:
+            self.stats["notReady"] += 1
+            return None
+        minutes, values = contract
+        pos = np.searchsorted(minutes, timestamp)
+        if pos >= len(minutes) or minutes[pos] != timestamp or np.isnan(values[pos, 3]):
+            return None
+        self.stats["hits"] += 1
+        return dict(zip(fields, values[pos]))
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class prefetchOptOverNightAlgoLogic(preloadOptOverNightAlgoLogic):
+    """
+    preloadOptOverNightAlgoLogic that can also warm contracts in the background.
+
+    Call startPrefetch() once, then prefetch(spot) every bar (cheap unless the
+    ATM strike or the day changed). fetchAndCacheFnoHistData answers from the
+    preloaded chain first, then from prefetched contracts, and only then
+    reads from the history store.
+    """
+
+    prefetcher = None
+
+    def startPrefetch(self, baseSym, endEpoch, strikeBand=3, workers=2):
+        self.prefetcher = OptionPrefetcher(baseSym, endEpoch, strikeBand, workers, self.strategyLogger)
+
+    def prefetch(self, spot, timestamp=None):
+        if self.prefetcher is not None:
+            self.prefetcher.update(spot, float(self.timeData if timestamp is None else timestamp))
+
+    def stopPrefetch(self):
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            self.strategyLogger.info(f"Prefetch stats: {self.prefetcher.stats}")
+            self.prefetcher = None
+
+    def fetchAndCacheFnoHistData(self, symbol, timestamp, *args, **kwargs):
+        if self.prefetcher is not None:
+            instrumentId = instruments.idOf(symbol)
+            data = None if instrumentId in self.chainIdMap else self.prefetcher.lookup(instrumentId, float(timestamp))
+            if data is not None:
+                return data
+        return super().fetchAndCacheFnoHistData(symbol, timestamp, *args, **kwargs)
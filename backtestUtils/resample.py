@@ -0,0 +1,106 @@
+import re
+import numpy as np
+import pandas as pd
+from backtestUtils import histCache
+from backtestUtils.eventClock import istOffset
+
+# NSE cash/F&O session opens at 09:15 IST, 33300 seconds after midnight
+sessionOpen = 9 * 3600 + 15 * 60
+
+
+def barSeconds(interval):
+    # "5Min", "75Min", "1H", "H", "1D", "D" (any case, so "30min" too) -> seconds
+    match = re.fullmatch(r"(\d*)(min|h|d)", interval, re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Unknown interval {interval}")
+    count = int(match.group(1) or 1)
+    return count * {"min": 60, "h": 3600, "d": 86400}[match.group(2).lower()]
+
+
+def barStarts(epochs, interval, dailyAtOpen=False):
+    """
+    Label of the higher timeframe bar each 1-min epoch falls in.
+
+    Intraday bars are anchored at 09:15 IST every session (so 1H bars start at
+    09:15, 10:15, ... and 75Min bars at 09:15, 10:30, ...). Daily bars are
+    labelled at IST midnight like the stored 1D series, or at 09:15 (the
+    +33300 scripts add by hand) when dailyAtOpen is set. Minutes before 09:15
+    get label -1.
+    """
+    epochs = np.asarray(epochs, dtype=np.int64)
+    seconds = barSeconds(interval)
+    dayStart = (epochs + istOffset) // 86400 * 86400 - istOffset
+
+    if seconds >= 86400:
+        return dayStart + (sessionOpen if dailyAtOpen else 0)
+
+    sinceOpen = epochs - dayStart - sessionOpen
+    starts = dayStart + sessionOpen + sinceOpen // seconds * seconds
+    return np.where(sinceOpen >= 0, starts, -1)
+
+
+def resampleBars(df, interval, dailyAtOpen=False):
+    """
+    Build interval bars from a 1-min frame indexed by epoch seconds.
+
+    o/h/l/c/v/oi are aggregated as first/max/min/last/sum/last; ti follows the
+    new index and a datetime column, if present, is shifted to the bar start.
+    """
+    df = df[df["c"].notna()]
+    epochs = df.index.values.astype(np.int64)
+    labels = barStarts(epochs, interval, dailyAtOpen)
+    keep = labels >= 0
+    df, epochs, labels = df[keep], epochs[keep], labels[keep]
+
+    if len(df) == 0:
+        return df.iloc[0:0].copy()
+
+    first = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    last = np.r_[first[1:] - 1, len(labels) - 1]
+    index = labels[first]
+
+    out = {}
+    for col in df.columns:
+        values = df[col].values
+        if col == "o":
+            out[col] = values[first]
+        elif col == "h":
+            out[col] = np.maximum.reduceat(values.astype(np.float64), first)
+        elif col == "l":
+            out[col] = np.minimum.reduceat(values.astype(np.float64), first)
+        elif col == "v":
+            out[col] = np.add.reduceat(np.nan_to_num(values.astype(np.float64)), first)
+        elif col == "ti":
+            out[col] = index
+        elif col == "datetime":
+            out[col] = pd.to_datetime(values[first]) - pd.to_timedelta(epochs[first] - index, unit="s")
+        else:
+            out[col] = values[last]
+    return pd.DataFrame(out, index=index, columns=df.columns)
+
+
+def getResampledData(kind, symbol, startEpoch, endEpoch, interval, dailyAtOpen=False):
+    """
+    Bars of interval labelled within [startEpoch, endEpoch], built from the
+    1-min series so only the base interval is ever read (through histCache).
+    """
+    if interval == "1Min":
+        return histCache.histCache.get(kind, symbol, startEpoch, endEpoch, interval)
+
+    seconds = barSeconds(interval)
+    df = histCache.histCache.get(kind, symbol, startEpoch, endEpoch + seconds - 1, "1Min")
+    if df is None:
+        return None
+
+    bars = resampleBars(df, interval, dailyAtOpen)
+    return bars[(bars.index >= startEpoch) & (bars.index <= endEpoch)]
+
+
+def getFnoBacktestData(symbol, startEpoch, endEpoch, interval, dailyAtOpen=False):
+    """getFnoBacktestData with every interval above 1Min derived from 1-min bars."""
+    return getResampledData("fno", symbol, startEpoch, endEpoch, interval, dailyAtOpen)
+
+
+def getEquityBacktestData(symbol, startEpoch, endEpoch, interval, dailyAtOpen=False):
+    """getEquityBacktestData with every interval above 1Min derived from 1-min bars."""
+    return getResampledData("equity", symbol, startEpoch, endEpoch, interval, dailyAtOpen)
@@ -0,0 +1,800 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+from numpy.lib.stride_tricks import sliding_window_view
+from backtestUtils.eventClock import istOffset
+
+nan = float("nan")
+
+
+def isZero(value):
+    # talib's TA_IS_ZERO
+    return -1e-8 < value < 1e-8
+
+
+def linearRecurrence(x, a, y0=0.0, block=64):
+    """
+    y[t] = a * y[t - 1] + x[t] for every t, starting from y[-1] = y0.
+
+    The recursion is solved a block at a time: inside a block it is a
+    triangular matrix product, and only the value carried from one block to
+    the next is chained in Python, so n bars cost n / block loop steps.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    if n == 0:
+        return x.copy()
+
+    blocks = np.concatenate([x, np.zeros(-n % block)]).reshape(-1, block)
+    powers = a ** np.arange(block + 1, dtype=np.float64)
+    j = np.arange(block)
+    weights = np.where(j[:, None] >= j[None, :], powers[np.abs(j[:, None] - j[None, :])], 0.0)
+    partial = blocks @ weights.T
+
+    carried = np.empty(len(blocks))
+    prev = y0
+    for k, end in enumerate(partial[:, -1]):
+        carried[k] = prev
+        prev = end + powers[block] * prev
+    return (partial + carried[:, None] * powers[1:][None, :]).ravel()[:n]
+
+
+def firstValid(*arrays):
+    # Index of the first bar where every input is set (talib skips leading NaNs)
+    valid = np.ones(len(arrays[0]), dtype=bool)
+    for arr in arrays:
+        valid &= ~np.isnan(arr)
+    hits = np.flatnonzero(valid)
+    return int(hits[0]) if len(hits) else len(arrays[0])
+
+
+def recurrenceFrom(x, a, y0):
+    # linearRecurrence that stops at the first NaN and leaves NaN after it, as talib does
+    out = np.full(len(x), nan)
+    bad = np.flatnonzero(np.isnan(x))
+    stop = int(bad[0]) if len(bad) else len(x)
+    out[:stop] = linearRecurrence(x[:stop], a, y0)
+    return out
+
+
+def trueRange(high, low, close):
+    # talib TRANGE, NaN on the first bar
+    tr = np.full(len(close), nan)
+    tr[1:] = np.maximum(high[1:], close[:-1]) - np.minimum(low[1:], close[:-1])
+    return tr
+
+
+def asArrays(*arrays):
+    return [np.asarray(arr, dtype=np.float64) for arr in arrays]
+
+
+class EMA:
+    """Exponential moving average seeded with the SMA of the first period values (talib EMA)."""
+
+    def __init__(self, period):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.value = nan
+
+    def update(self, x):
+        if self.count == 0 and np.isnan(x):
+            return nan
+        self.count += 1
+        if self.count < self.period:
+            self.total += x
+            return nan
+        if self.count == self.period:
+            self.value = (self.total + x) / self.period
+        else:
+            self.value = (x - self.value) * self.k + self.value
+        return self.value
+
+    def batch(self, close):
+        close, = asArrays(close)
+        self.reset()
+        out = np.full(len(close), nan)
+        start = firstValid(close)
+        seedAt = start + self.period - 1
+        if seedAt >= len(close):
+            for x in close[start:]:
+                self.update(x)
+            return out
+        out[seedAt] = close[start:seedAt + 1].mean()
+        out[seedAt + 1:] = recurrenceFrom(self.k * close[seedAt + 1:], 1 - self.k, out[seedAt])
+        self.count = len(close) - start
+        self.value = out[-1]
+        return out
+
+
+class RSI:
+    """Wilder RSI (talib RSI): simple averages over the first period changes, then Wilder smoothing."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.prevClose = nan
+        self.count = 0
+        self.avgGain = 0.0
+        self.avgLoss = 0.0
+        self.value = nan
+
+    def _value(self):
+        total = self.avgGain + self.avgLoss
+        return 0.0 if isZero(total) else 100.0 * self.avgGain / total
+
+    def update(self, x):
+        if np.isnan(self.prevClose) and self.count == 0:
+            self.prevClose = x
+            return nan
+        change = x - self.prevClose
+        self.prevClose = x
+        gain, loss = (change, 0.0) if change > 0 else (0.0, -change)
+        self.count += 1
+        if self.count < self.period:
+            self.avgGain += gain
+            self.avgLoss += loss
+            return nan
+        if self.count == self.period:
+            self.avgGain = (self.avgGain + gain) / self.period
+            self.avgLoss = (self.avgLoss + loss) / self.period
+        else:
+            self.avgGain = (self.avgGain * (self.period - 1) + gain) / self.period
+            self.avgLoss = (self.avgLoss * (self.period - 1) + loss) / self.period
+        self.value = self._value()
+        return self.value
+
+    def batch(self, close):
+        close, = asArrays(close)
+        self.reset()
+        out = np.full(len(close), nan)
+        start = firstValid(close)
+        seedAt = start + self.period
+        if seedAt >= len(close):
+            for x in close[start:]:
+                self.update(x)
+            return out
+
+        change = np.diff(close[start:])
+        gains = np.where(change > 0, change, 0.0)
+        losses = np.where(change < 0, -change, 0.0)
+        a = (self.period - 1) / self.period
+        avgGain = np.empty(len(change))
+        avgLoss = np.empty(len(change))
+        avgGain[self.period - 1] = gains[:self.period].mean()
+        avgLoss[self.period - 1] = losses[:self.period].mean()
+        avgGain[self.period:] = recurrenceFrom(gains[self.period:] / self.period, a, avgGain[self.period - 1])
+        avgLoss[self.period:] = recurrenceFrom(losses[self.period:] / self.period, a, avgLoss[self.period - 1])
+        avgGain, avgLoss = avgGain[self.period - 1:], avgLoss[self.period - 1:]
+
+        total = avgGain + avgLoss
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[seedAt:] = np.where(np.abs(total) < 1e-8, 0.0, 100.0 * avgGain / total)
+
+        self.prevClose = close[-1]
+        self.count = len(change)
+        self.avgGain, self.avgLoss = avgGain[-1], avgLoss[-1]
+        self.value = out[-1]
+        return out
+
+
+class ATR:
+    """Average true range with Wilder smoothing (talib ATR)."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.prevClose = nan
+        self.count = 0
+        self.total = 0.0
+        self.value = nan
+
+    def update(self, high, low, close):
+        if np.isnan(self.prevClose) and self.count == 0:
+            self.prevClose = close
+            return nan
+        tr = max(high, self.prevClose) - min(low, self.prevClose)
+        self.prevClose = close
+        self.count += 1
+        if self.period == 1:
+            self.value = tr
+        elif self.count < self.period:
+            self.total += tr
+            return nan
+        elif self.count == self.period:
+            self.value = (self.total + tr) / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + tr) / self.period
+        return self.value
+
+    def batch(self, high, low, close):
+        high, low, close = asArrays(high, low, close)
+        self.reset()
+        out = np.full(len(close), nan)
+        start = firstValid(high, low, close)
+        seedAt = start + self.period
+        if seedAt >= len(close):
+            for h, l, c in zip(high[start:], low[start:], close[start:]):
+                self.update(h, l, c)
+            return out
+
+        tr = trueRange(high[start:], low[start:], close[start:])
+        if self.period == 1:
+            out[start + 1:] = tr[1:]
+        else:
+            out[seedAt] = tr[1:self.period + 1].mean()
+            a = (self.period - 1) / self.period
+            out[seedAt + 1:] = recurrenceFrom(tr[self.period + 1:] / self.period, a, out[seedAt])
+
+        self.prevClose = close[-1]
+        self.count = len(close) - start - 1
+        self.value = out[-1]
+        return out
+
+
+class ADX:
+    """
+    Average directional index with +DI and -DI (talib ADX, PLUS_DI, MINUS_DI).
+
+    update() and batch() return adx; plusDI and minusDI are kept alongside
+    (batch() sets self.plusDIs and self.minusDIs).
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.prev = None
+        self.count = 0
+        self.plusDM = 0.0
+        self.minusDM = 0.0
+        self.tr = 0.0
+        self.sumDX = 0.0
+        self.plusDI = nan
+        self.minusDI = nan
+        self.value = nan
+
+    def update(self, high, low, close):
+        if self.prev is None:
+            if not (np.isnan(high) or np.isnan(low) or np.isnan(close)):
+                self.prev = (high, low, close)
+            return nan
+        prevHigh, prevLow, prevClose = self.prev
+        self.prev = (high, low, close)
+        diffP, diffM = high - prevHigh, prevLow - low
+        plusDM = diffP if diffP > 0 and diffP > diffM else 0.0
+        minusDM = diffM if diffM > 0 and diffP < diffM else 0.0
+        tr = max(high, prevClose) - min(low, prevClose)
+        self.count += 1
+        p = self.period
+
+        if self.count < p:
+            self.plusDM += plusDM
+            self.minusDM += minusDM
+            self.tr += tr
+            return nan
+
+        self.plusDM = self.plusDM - self.plusDM / p + plusDM
+        self.minusDM = self.minusDM - self.minusDM / p + minusDM
+        self.tr = self.tr - self.tr / p + tr
+        dx = nan
+        if not isZero(self.tr):
+            self.plusDI = 100.0 * self.plusDM / self.tr
+            self.minusDI = 100.0 * self.minusDM / self.tr
+            total = self.plusDI + self.minusDI
+            if not isZero(total):
+                dx = 100.0 * abs(self.plusDI - self.minusDI) / total
+        else:
+            self.plusDI = self.minusDI = 0.0
+
+        if self.count < 2 * p - 1:
+            self.sumDX += 0.0 if np.isnan(dx) else dx
+            return nan
+        if self.count == 2 * p - 1:
+            self.sumDX += 0.0 if np.isnan(dx) else dx
+            self.value = self.sumDX / p
+        elif not np.isnan(dx):
+            self.value = (self.value * (p - 1) + dx) / p
+        return self.value
+
+    def batch(self, high, low, close):
+        high, low, close = asArrays(high, low, close)
+        self.reset()
+        p = self.period
+        n = len(close)
+        out = np.full(n, nan)
+        self.plusDIs = np.full(n, nan)
+        self.minusDIs = np.full(n, nan)
+        start = firstValid(high, low, close)
+        if start + 2 * p - 1 >= n:
+            for h, l, c in zip(high[start:], low[start:], close[start:]):
+                self.update(h, l, c)
+            return out
+
+        h, l, c = high[start:], low[start:], close[start:]
+        diffP = np.r_[nan, h[1:] - h[:-1]]
+        diffM = np.r_[nan, l[:-1] - l[1:]]
+        plusDM = np.where((diffP > 0) & (diffP > diffM), diffP, 0.0)
+        minusDM = np.where((diffM > 0) & (diffP < diffM), diffM, 0.0)
+        tr = trueRange(h, l, c)
+
+        # Sums over bars 1 .. p-1, then x - x/p + v from bar p on
+        a = 1 - 1 / p
+        smoothed = []
+        for values in (plusDM, minusDM, tr):
+            series = np.full(len(c), nan)
+            seed = values[1:p].sum()
+            series[p:] = recurrenceFrom(values[p:], a, seed)
+            smoothed.append(series)
+        sPlus, sMinus, sTR = smoothed
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            trZero = np.abs(sTR) < 1e-8
+            plusDI = np.where(trZero, 0.0, 100.0 * sPlus / sTR)
+            minusDI = np.where(trZero, 0.0, 100.0 * sMinus / sTR)
+            total = plusDI + minusDI
+            dx = np.where(trZero | (np.abs(total) < 1e-8), nan, 100.0 * np.abs(plusDI - minusDI) / total)
+        plusDI[:p] = minusDI[:p] = nan
+        self.plusDIs[start:] = plusDI
+        self.minusDIs[start:] = minusDI
+
+        # First ADX is the mean DX of bars p .. 2p-1; after that a bar without a DX keeps the previous ADX
+        seedAt = 2 * p - 1
+        adx = np.full(len(c), nan)
+        adx[seedAt] = np.nansum(dx[p:seedAt + 1]) / p
+        rest = dx[seedAt + 1:]
+        valid = ~np.isnan(rest)
+        smoothedDX = linearRecurrence(rest[valid] / p, (p - 1) / p, adx[seedAt])
+        adx[seedAt + 1:] = np.r_[adx[seedAt], smoothedDX][np.cumsum(valid)]
+        out[start:] = adx
+
+        self.prev = (high[-1], low[-1], close[-1])
+        self.count = len(c) - 1
+        self.plusDM, self.minusDM, self.tr = sPlus[-1], sMinus[-1], sTR[-1]
+        self.plusDI, self.minusDI = plusDI[-1], minusDI[-1]
+        self.value = out[-1]
+        return out
+
+
+class MACD:
+    """
+    talib MACD: fast and slow EMAs both start on bar slow-1 (the fast one
+    seeded with the SMA of the fast bars ending there), signal is an EMA of
+    the MACD line, and all three outputs start together.
+    """
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        if slow < fast:
+            fast, slow = slow, fast
+        self.fast, self.slow, self.signalPeriod = fast, slow, signal
+        self.kFast, self.kSlow = 2.0 / (fast + 1), 2.0 / (slow + 1)
+        self.reset()
+
+    def reset(self):
+        self.window = deque(maxlen=self.slow)
+        self.fastEma = nan
+        self.slowEma = nan
+        self.signalEma = EMA(self.signalPeriod)
+        self.value = (nan, nan, nan)
+
+    def update(self, x):
+        if np.isnan(self.slowEma):
+            if not self.window and np.isnan(x):
+                return self.value
+            self.window.append(x)
+            if len(self.window) < self.slow:
+                return self.value
+            values = list(self.window)
+            self.slowEma = sum(values) / self.slow
+            self.fastEma = sum(values[-self.fast:]) / self.fast
+        else:
+            self.fastEma = (x - self.fastEma) * self.kFast + self.fastEma
+            self.slowEma = (x - self.slowEma) * self.kSlow + self.slowEma
+        macd = self.fastEma - self.slowEma
+        signal = self.signalEma.update(macd)
+        self.value = (nan, nan, nan) if np.isnan(signal) else (macd, signal, macd - signal)
+        return self.value
+
+    def batch(self, close):
+        """Returns macd, signal and hist arrays."""
+        close, = asArrays(close)
+        self.reset()
+        n = len(close)
+        macd = np.full(n, nan)
+        start = firstValid(close)
+        seedAt = start + self.slow - 1
+        if seedAt >= n:
+            for x in close[start:]:
+                self.update(x)
+            return macd, macd.copy(), macd.copy()
+
+        emas = []
+        for period, k in ((self.fast, self.kFast), (self.slow, self.kSlow)):
+            ema = np.full(n, nan)
+            ema[seedAt] = close[seedAt - period + 1:seedAt + 1].mean()
+            ema[seedAt + 1:] = recurrenceFrom(k * close[seedAt + 1:], 1 - k, ema[seedAt])
+            emas.append(ema)
+        self.fastEma, self.slowEma = emas[0][-1], emas[1][-1]
+        macd = emas[0] - emas[1]
+
+        signal = self.signalEma.batch(macd)
+        macd[np.isnan(signal)] = nan
+        self.value = (macd[-1], signal[-1], macd[-1] - signal[-1])
+        return macd, signal, macd - signal
+
+
+class Bollinger:
+    """SMA middle band with population standard deviation bands (talib BBANDS, matype 0)."""
+
+    def __init__(self, period=20, nbdevup=2.0, nbdevdn=2.0):
+        self.period = period
+        self.nbdevup, self.nbdevdn = nbdevup, nbdevdn
+        self.reset()
+
+    def reset(self):
+        self.window = deque(maxlen=self.period)
+        self.total = 0.0
+        self.totalSq = 0.0
+        self.value = (nan, nan, nan)
+
+    def _bands(self, mean, variance):
+        std = np.sqrt(variance) if variance > 1e-8 else 0.0
+        return mean + self.nbdevup * std, mean, mean - self.nbdevdn * std
+
+    def update(self, x):
+        if not self.window and np.isnan(x):
+            return self.value
+        if len(self.window) == self.period:
+            old = self.window[0]
+            self.total -= old
+            self.totalSq -= old * old
+        self.window.append(x)
+        self.total += x
+        self.totalSq += x * x
+        if len(self.window) < self.period:
+            return self.value
+        mean = self.total / self.period
+        self.value = self._bands(mean, self.totalSq / self.period - mean * mean)
+        return self.value
+
+    def batch(self, close):
+        """Returns upper, middle and lower arrays."""
+        close, = asArrays(close)
+        self.reset()
+        n = len(close)
+        upper, middle, lower = np.full(n, nan), np.full(n, nan), np.full(n, nan)
+        start = firstValid(close)
+        if n - start >= self.period:
+            windows = sliding_window_view(close[start:], self.period)
+            mean = windows.mean(axis=1)
+            variance = (windows * windows).mean(axis=1) - mean * mean
+            std = np.where(variance > 1e-8, np.sqrt(np.maximum(variance, 0.0)), 0.0)
+            at = slice(start + self.period - 1, n)
+            upper[at], middle[at], lower[at] = mean + self.nbdevup * std, mean, mean - self.nbdevdn * std
+        for x in close[max(start, n - self.period):]:
+            self.window.append(x)
+        self.total = sum(self.window)
+        self.totalSq = sum(x * x for x in self.window)
+        self.value = (upper[-1], middle[-1], lower[-1]) if n else self.value
+        return upper, middle, lower
+
+
+class Supertrend:
+    """
+    Supertrend on a talib ATR, stepping the bands the way pandas_ta
+    supertrend does, so direction matches its SUPERTd_<length>_<multiplier>
+    column. update() and batch() return (trend, direction).
+    """
+
+    def __init__(self, length=7, multiplier=3.0):
+        self.length = length
+        self.multiplier = multiplier
+        self.atr = ATR(length)
+        self.reset()
+
+    def reset(self):
+        self.atr.reset()
+        self.upper = nan
+        self.lower = nan
+        self.direction = 1
+        self.started = False
+        self.value = (nan, 1)
+
+    def update(self, high, low, close):
+        atr = self.atr.update(high, low, close)
+        hl2 = (high + low) / 2
+        upper, lower = hl2 + self.multiplier * atr, hl2 - self.multiplier * atr
+        if self.started:
+            if close > self.upper:
+                self.direction = 1
+            elif close < self.lower:
+                self.direction = -1
+            else:
+                if self.direction > 0 and lower < self.lower:
+                    lower = self.lower
+                if self.direction < 0 and upper > self.upper:
+                    upper = self.upper
+        self.started = True
+        self.upper, self.lower = upper, lower
+        self.value = (lower if self.direction > 0 else upper, self.direction)
+        return self.value
+
+    def batch(self, high, low, close):
+        high, low, close = asArrays(high, low, close)
+        self.reset()
+        atr = self.atr.batch(high, low, close)
+        hl2 = (high + low) / 2
+        upper = hl2 + self.multiplier * atr
+        lower = hl2 - self.multiplier * atr
+        trend, direction, finalUpper, finalLower = stepSupertrend(close, upper[:, None], lower[:, None])
+        if len(close):
+            self.started = True
+            self.upper, self.lower = finalUpper[-1, 0], finalLower[-1, 0]
+            self.direction = int(direction[-1, 0])
+            self.value = (trend[-1, 0], self.direction)
+        return trend[:, 0], direction[:, 0]
+
+
+def stepSupertrend(close, upper, lower):
+    """
+    The path-dependent part of Supertrend for one or more band sets at once.
+
+    upper and lower are (bars x sets) raw bands; returns trend and direction
+    of the same shape plus the final (ratcheted) upper and lower bands. Each
+    set is walked a trend segment at a time rather than a bar at a time, see
+    ratchetSegment(), so the Python loop runs once per flip or band reset.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    upper = np.array(upper, dtype=np.float64).T.copy()
+    lower = np.array(lower, dtype=np.float64).T.copy()
+    sets, n = upper.shape
+    direction = np.ones((sets, n), dtype=np.int8)
+    for j in range(sets):
+        supertrendSet(close, upper[j], lower[j], direction[j])
+    trend = np.where(direction > 0, lower, upper)
+    return trend.T, direction.T, upper.T, lower.T
+
+
+def supertrendSet(close, upper, lower, direction):
+    """
+    One band set of stepSupertrend, filling upper, lower and direction in place.
+
+    Going up, the upper band is never ratcheted, so the bars where the close
+    tops the previous upper band (and the lower band restarts) are known up
+    front; between two of them the lower band is a running max and the only
+    thing left to find is the first close below it. Going down is the mirror
+    image, except that an upward flip is tested before the restart.
+    """
+    n = len(close)
+    valid = np.isfinite(upper) & np.isfinite(lower) & np.isfinite(close)
+    if not valid.any():
+        return
+    k = int(np.argmax(valid))
+    if not valid[k:].all():
+        # Gaps after the warm-up: only the bar-by-bar rules handle NaN comparisons
+        return stepBars(close, upper, lower, direction)
+
+    # Bars where a trend restarts its band instead of ratcheting it
+    restarts = {1: np.flatnonzero(close[k + 1:] > upper[k:-1]) + k + 1,
+                -1: np.flatnonzero(close[k + 1:] < lower[k:-1]) + k + 1}
+    # Before k the bands are NaN, nothing flips and the first valid bar starts an uptrend
+    a, d = k, 1
+    while a < n:
+        r = restarts[d]
+        p = np.searchsorted(r, a, side="right")
+        b = int(r[p]) if p < len(r) else n
+        f = ratchetSegment(close, lower if d > 0 else upper, d, a, b)
+        direction[a:f] = d
+        if f < b:
+            d = -d
+        elif b < n and d < 0 and close[b] > upper[b - 1]:
+            d = 1
+        a = f
+
+
+def ratchetSegment(close, band, sign, a, b):
+    """
+    Ratchets band from bar a (running max for sign 1, min for -1) until the
+    close crosses it or bar b. band[a:f] is left final and f returned.
+    The scan grows in doubling chunks so a short segment costs little.
+    """
+    pos, size, carry = a, 64, -np.inf
+    while pos < b:
+        end = min(pos + size, b)
+        chunk = np.maximum.accumulate(np.maximum(sign * band[pos:end], carry))
+        # Bar i flips against the band of bar i - 1; carry is -inf on bar a
+        previous = np.concatenate(([carry], chunk[:-1]))
+        hits = np.flatnonzero(sign * close[pos:end] < previous)
+        if len(hits):
+            f = pos + int(hits[0])
+            band[pos:f] = sign * chunk[:hits[0]]
+            return f
+        band[pos:end] = sign * chunk
+        carry = chunk[-1]
+        pos, size = end, size * 2
+    return b
+
+
+def stepBars(close, upper, lower, direction):
+    # pandas_ta's bar-by-bar rules, in place, for bands with gaps
+    d = 1
+    for i in range(1, len(close)):
+        if close[i] > upper[i - 1]:
+            d = 1
+        elif close[i] < lower[i - 1]:
+            d = -1
+        else:
+            if d > 0 and lower[i] < lower[i - 1]:
+                lower[i] = lower[i - 1]
+            if d < 0 and upper[i] > upper[i - 1]:
+                upper[i] = upper[i - 1]
+        direction[i] = d
+
+
+def supertrends(high, low, close, length=7, multipliers=(3.0,)):
+    """
+    Supertrend for several multipliers on one ATR.
+
+    The talib ATR is computed once and the bands of every multiplier go
+    through stepSupertrend together. Returns trend, direction, upper and
+    lower arrays of shape (bars x multipliers).
+    """
+    high, low, close = asArrays(high, low, close)
+    atr = ATR(length).batch(high, low, close)
+    hl2 = (high + low) / 2
+    offsets = np.outer(atr, np.asarray(multipliers, dtype=np.float64))
+    return stepSupertrend(close, hl2[:, None] + offsets, hl2[:, None] - offsets)
+
+
+def supertrendFrame(df, length=7, multipliers=(3.0,)):
+    """
+    supertrends() on a frame with h, l and c columns, laid out like
+    pandas_ta supertrend: SUPERT, SUPERTd, SUPERTl and SUPERTs columns
+    suffixed _<length>_<multiplier> for every multiplier.
+    """
+    trend, direction, upper, lower = supertrends(df["h"], df["l"], df["c"], length, multipliers)
+    columns = {}
+    for j, multiplier in enumerate(multipliers):
+        props = f"_{length}_{multiplier}"
+        up = direction[:, j] > 0
+        columns[f"SUPERT{props}"] = trend[:, j]
+        columns[f"SUPERTd{props}"] = direction[:, j]
+        columns[f"SUPERTl{props}"] = np.where(up, lower[:, j], nan)
+        columns[f"SUPERTs{props}"] = np.where(up, nan, upper[:, j])
+    return pd.DataFrame(columns, index=df.index)
+
+
+class StochRSI:
+    """
+    Stochastic of RSI. k is the SMA of the raw stochastic over kPeriod and d
+    the SMA of k over dPeriod, as pandas_ta stochrsi(length, rsi_length, k,
+    d); k equals talib STOCHRSI fastd with fastk_period=period,
+    fastd_period=kPeriod. A flat RSI window gives a raw value of 0 like talib.
+    """
+
+    def __init__(self, period=14, rsiPeriod=14, kPeriod=3, dPeriod=3):
+        self.period = period
+        self.rsi = RSI(rsiPeriod)
+        self.kPeriod, self.dPeriod = kPeriod, dPeriod
+        self.reset()
+
+    def reset(self):
+        self.rsi.reset()
+        self.rsiWindow = deque(maxlen=self.period)
+        self.rawWindow = deque(maxlen=self.kPeriod)
+        self.kWindow = deque(maxlen=self.dPeriod)
+        self.value = (nan, nan)
+
+    def update(self, x):
+        rsi = self.rsi.update(x)
+        if np.isnan(rsi):
+            return self.value
+        self.rsiWindow.append(rsi)
+        if len(self.rsiWindow) < self.period:
+            return self.value
+        low, high = min(self.rsiWindow), max(self.rsiWindow)
+        self.rawWindow.append(0.0 if high == low else 100.0 * (rsi - low) / (high - low))
+        if len(self.rawWindow) < self.kPeriod:
+            return self.value
+        k = sum(self.rawWindow) / self.kPeriod
+        self.kWindow.append(k)
+        d = sum(self.kWindow) / self.dPeriod if len(self.kWindow) == self.dPeriod else nan
+        self.value = (k, d)
+        return self.value
+
+    def batch(self, close):
+        """Returns k and d arrays."""
+        close, = asArrays(close)
+        self.reset()
+        n = len(close)
+        rsi = self.rsi.batch(close)
+        k, d = np.full(n, nan), np.full(n, nan)
+        start = firstValid(rsi)
+
+        raw = np.full(n, nan)
+        if n - start >= self.period:
+            windows = sliding_window_view(rsi[start:], self.period)
+            low, high = windows.min(axis=1), windows.max(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                raw[start + self.period - 1:] = np.where(high == low, 0.0,
+                                                         100.0 * (rsi[start + self.period - 1:] - low) / (high - low))
+        k = rollingMean(raw, self.kPeriod)
+        d = rollingMean(k, self.dPeriod)
+
+        self.rsiWindow.extend(rsi[max(start, n - self.period):])
+        self.rawWindow.extend(raw[max(firstValid(raw), n - self.kPeriod):])
+        self.kWindow.extend(k[max(firstValid(k), n - self.dPeriod):])
+        self.value = (k[-1], d[-1]) if n else self.value
+        return k, d
+
+
+def rollingMean(values, period):
+    # Trailing SMA that starts period-1 bars after the first non-NaN value
+    out = np.full(len(values), nan)
+    start = firstValid(values)
+    if len(values) - start >= period:
+        out[start + period - 1:] = sliding_window_view(values[start:], period).mean(axis=1)
+    return out
+
+
+class VWAP:
+    """
+    Volume weighted average of the typical price (h+l+c)/3, restarted at the
+    first bar of every IST day. update() and batch() take epoch timestamps.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.day = None
+        self.priceVolume = 0.0
+        self.volume = 0.0
+        self.value = nan
+
+    def update(self, timestamp, high, low, close, volume):
+        day = (int(timestamp) + istOffset) // 86400
+        if day != self.day:
+            self.day = day
+            self.priceVolume = 0.0
+            self.volume = 0.0
+        if not np.isnan(close + high + low + volume):
+            self.priceVolume += (high + low + close) / 3 * volume
+            self.volume += volume
+        self.value = self.priceVolume / self.volume if self.volume else nan
+        return self.value
+
+    def batch(self, timestamps, high, low, close, volume):
+        high, low, close, volume = asArrays(high, low, close, volume)
+        self.reset()
+        n = len(close)
+        if n == 0:
+            return np.empty(0)
+        days = (np.asarray(timestamps, dtype=np.int64) + istOffset) // 86400
+        first = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        dayOf = np.repeat(np.arange(len(first)), np.diff(np.r_[first, n]))
+
+        # Bars with a missing field add nothing, the running VWAP carries on
+        barPV = (high + low + close) / 3 * volume
+        missing = np.isnan(barPV)
+        priceVolume = np.cumsum(np.where(missing, 0.0, barPV))
+        cumVolume = np.cumsum(np.where(missing, 0.0, volume))
+        before = np.r_[0.0, priceVolume][first][dayOf]
+        volumeBefore = np.r_[0.0, cumVolume][first][dayOf]
+        dayPV, dayVolume = priceVolume - before, cumVolume - volumeBefore
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = np.where(dayVolume != 0, dayPV / dayVolume, nan)
+
+        self.day = int(days[-1])
+        self.priceVolume, self.volume = dayPV[-1], dayVolume[-1]
+        self.value = out[-1]
+        return out
@@ -0,0 +1,65 @@
+import numpy as np
+from backtestTools.histData import getFnoBacktestData
+from backtestUtils.chainPreload import strikeDist
+from backtestUtils.expiryCalendar import getCalendar
+
+
+def atmStrikes(prices, baseSym):
+    step = strikeDist.get(baseSym, 50)
+    return (np.round(np.asarray(prices, dtype=np.float64) / step) * step).astype(np.int64)
+
+
+def selectStrikes(prices, baseSym, otmFactor=0):
+    """
+    Batch version of the strike choice inside getCallSym / getPutSym.
+
+    otmFactor is a scalar or an array matching prices. Calls move up and puts
+    move down by otmFactor strike steps from ATM, same as the single-symbol calls.
+    Returns {"CE": strikes, "PE": strikes} as int arrays.
+    """
+    step = strikeDist.get(baseSym, 50)
+    atm = atmStrikes(prices, baseSym)
+    offset = (np.asarray(otmFactor) * step).astype(np.int64)
+    return {"CE": atm + offset, "PE": atm - offset}
+
+
+def selectExpiries(timestamps, baseSym, key="CurrentExpiry"):
+    calendar = getCalendar(baseSym)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    calendar.load(timestamps.min(), timestamps.max())
+    return calendar.lookup(timestamps, key)
+
+
+def buildSymbols(baseSym, expiries, strikes, side):
+    # Strings are only formatted once per unique (expiry, strike) pair
+    strikes = np.asarray(strikes, dtype=np.int64)
+    expiries = np.broadcast_to(np.asarray(expiries, dtype=object), strikes.shape)
+    pairs, inverse = np.unique(np.stack([expiries.astype(str), strikes.astype(str)]), axis=1, return_inverse=True)
+    symbols = np.array([f"{baseSym}{expiry}{strike}{side}" for expiry, strike in pairs.T], dtype=object)
+    return symbols[inverse.ravel()]
+
+
+def fetchSeries(symbols, timestamps, field="c"):
+    """
+    Price of symbols[i] at timestamps[i] for whole arrays at once.
+
+    Each unique symbol is read with one getFnoBacktestData call over the span it
+    is needed for; missing bars come back as NaN.
+    """
+    symbols = np.asarray(symbols, dtype=object)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    out = np.full(len(symbols), np.nan)
+
+    for sym in np.unique(symbols):
+        rows = np.flatnonzero(symbols == sym)
+        try:
+            df = getFnoBacktestData(sym, timestamps[rows].min(), timestamps[rows].max(), "1Min")
+        except Exception:
+            continue
+        if df is None or df.empty:
+            continue
+        index = df.index.values.astype(np.float64)
+        pos = np.clip(np.searchsorted(index, timestamps[rows]), 0, len(index) - 1)
+        found = index[pos] == timestamps[rows]
+        out[rows[found]] = df[field].values[pos[found]]
+    return out
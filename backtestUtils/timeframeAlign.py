@@ -0,0 +1,74 @@
+import numpy as np
+from backtestUtils.eventClock import istOffset
+
+
+# Bar length in seconds for the interval strings used with getFnoBacktestData
+intervalSeconds = {
+    "1Min": 60,
+    "3Min": 180,
+    "5Min": 300,
+    "15Min": 900,
+    "30Min": 1800,
+    "1H": 3600,
+    "75Min": 4500,
+    "1D": 86400,
+}
+
+
+def alignIndex(minutes, barStarts, barSeconds, sessionEnd=None, exact=False):
+    """
+    For every 1-min timestamp return the position of the latest bar in barStarts
+    that has completed by then (start + barSeconds <= minute), or -1 if none has.
+
+    With sessionEnd (seconds after IST midnight, e.g. 15:30 -> 55800) a bar
+    whose end falls after that day's close, such as the partial 15:15 1H bar,
+    never counts as completed instead of completing at the next open.
+
+    With exact a bar only completes on the 1-min bar stamped at its end, as
+    the (timeData - barSeconds) in frame.index lookups did, so a bar ending on
+    a minute the 1-min data lacks (the 15:25 5-min bar ends at 15:30) is
+    never seen rather than picked up at the next open.
+    """
+    barStarts = np.asarray(barStarts, dtype=np.float64)
+    barEnds = barStarts + barSeconds
+    minutes = np.asarray(minutes, dtype=np.float64)
+
+    keep = np.ones(len(barStarts), dtype=bool)
+    if sessionEnd is not None:
+        dayStarts = barStarts - (barStarts + istOffset) % 86400
+        keep &= barEnds <= dayStarts + sessionEnd
+    if exact:
+        keep &= np.isin(barEnds, minutes)
+    keep = np.flatnonzero(keep)
+    pos = np.searchsorted(barEnds[keep], minutes, side="right") - 1
+    return np.where(pos >= 0, keep[np.clip(pos, 0, None)], -1)
+
+
+def newBarMask(positions):
+    # True on the first 1-min bar that sees a newly completed higher timeframe bar
+    positions = np.asarray(positions)
+    mask = np.empty(len(positions), dtype=bool)
+    if len(positions):
+        mask[0] = positions[0] >= 0
+        mask[1:] = positions[1:] != positions[:-1]
+    return mask
+
+
+def alignTimeframes(df, frames, sessionEnd=None):
+    """
+    Map each row of the 1-min frame df onto higher timeframe frames.
+
+    frames is a dict keyed by interval string, e.g. {"5Min": df_5min, "1D": df_1d}.
+    Returns a dict with the same keys holding integer position arrays, so a
+    strategy reads frame["c"].values[pos[i]] instead of hashing (timeData-300)
+    into frame.index every minute. Intraday frames are aligned exact, the way
+    those lookups saw them, and with sessionEnd; daily and longer bars always
+    end after the close.
+    """
+    positions = {}
+    for interval, frame in frames.items():
+        seconds = intervalSeconds[interval]
+        intraday = seconds < 86400
+        positions[interval] = alignIndex(df.index.values, frame.index.values, seconds,
+                                         sessionEnd if intraday else None, exact=intraday)
+    return positions
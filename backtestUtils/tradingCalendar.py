@@ -0,0 +1,174 @@
+import numpy as np
+from datetime import time
+from backtestUtils.eventClock import istOffset, minuteOfDay
+from backtestUtils.resample import barSeconds, barStarts, sessionOpen
+
+# NSE equity/F&O trading holidays (weekday closures only)
+nseHolidays = (
+    "2020-02-21", "2020-03-10", "2020-04-02", "2020-04-06", "2020-04-10", "2020-04-14", "2020-05-01",
+    "2020-05-25", "2020-10-02", "2020-11-16", "2020-11-30", "2020-12-25",
+    "2021-01-26", "2021-03-11", "2021-03-29", "2021-04-02", "2021-04-14", "2021-04-21", "2021-05-13",
+    "2021-07-21", "2021-08-19", "2021-09-10", "2021-10-15", "2021-11-04", "2021-11-05", "2021-11-19",
+    "2022-01-26", "2022-03-01", "2022-03-18", "2022-04-14", "2022-04-15", "2022-05-03", "2022-08-09",
+    "2022-08-15", "2022-08-31", "2022-10-05", "2022-10-24", "2022-10-26", "2022-11-08",
+    "2023-01-26", "2023-03-07", "2023-03-30", "2023-04-04", "2023-04-07", "2023-04-14", "2023-05-01",
+    "2023-06-29", "2023-08-15", "2023-09-19", "2023-10-02", "2023-10-24", "2023-11-14", "2023-11-27",
+    "2023-12-25",
+    "2024-01-22", "2024-01-26", "2024-03-08", "2024-03-25", "2024-03-29", "2024-04-11", "2024-04-17",
+    "2024-05-01", "2024-05-20", "2024-06-17", "2024-07-17", "2024-08-15", "2024-10-02", "2024-11-01",
+    "2024-11-15", "2024-11-20", "2024-12-25",
+    "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10", "2025-04-14", "2025-04-18", "2025-05-01",
+    "2025-08-15", "2025-08-27", "2025-10-02", "2025-10-21", "2025-10-22", "2025-11-05", "2025-12-25",
+)
+
+# Days whose session differs from 09:15-15:30: Muhurat trading, Saturday budget
+# sessions and the DR drill sessions. The listed windows replace the regular session.
+nseSpecialSessions = {
+    "2020-02-01": ((time(9, 15), time(15, 30)),),
+    "2020-11-14": ((time(18, 15), time(19, 15)),),
+    "2021-11-04": ((time(18, 15), time(19, 15)),),
+    "2022-10-24": ((time(18, 15), time(19, 15)),),
+    "2023-11-12": ((time(18, 15), time(19, 15)),),
+    "2024-01-20": ((time(9, 15), time(15, 30)),),
+    "2024-03-02": ((time(9, 15), time(10, 0)), (time(11, 30), time(12, 30))),
+    "2024-05-18": ((time(9, 15), time(10, 0)), (time(11, 30), time(12, 30))),
+    "2024-11-01": ((time(18, 0), time(19, 0)),),
+    "2025-02-01": ((time(9, 15), time(15, 30)),),
+    "2025-10-21": ((time(13, 45), time(14, 45)),),
+}
+
+
+def toMinute(t):
+    return t.hour * 60 + t.minute
+
+
+def toDayNumbers(dates):
+    # "YYYY-MM-DD" strings -> IST day numbers (same numbering as expiryCalendar.dayNumber)
+    return np.array(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+class TradingCalendar:
+    """
+    Trading days and session windows of an exchange, answered on epoch arrays.
+
+    A day trades if it is a weekday not in holidays, or if it has an entry in
+    specialSessions; special days use their own windows instead of the regular
+    session. Sessions are half open, a 09:15-15:30 session has 1-min bars
+    09:15 ... 15:29. sessionMask() is the vectorized replacement for building a
+    datetime per bar and comparing its .time(); lookbackStart() gives the
+    exact start of the N bars of an interval that end before a timestamp.
+    """
+
+    def __init__(self, holidays=nseHolidays, specialSessions=nseSpecialSessions,
+                 sessionOpen=time(9, 15), sessionClose=time(15, 30)):
+        self.holidays = np.sort(toDayNumbers(list(holidays)))
+        self.specialSessions = {
+            int(day): tuple((toMinute(start), toMinute(end)) for start, end in windows)
+            for day, windows in zip(toDayNumbers(list(specialSessions)), specialSessions.values())
+        }
+        self.specialDays = np.array(sorted(self.specialSessions), dtype=np.int64)
+        self.regularSession = ((toMinute(sessionOpen), toMinute(sessionClose)),)
+        self.barCounts = {}
+
+    def isTradingDay(self, days):
+        days = np.asarray(days, dtype=np.int64)
+        # Day 0 (1970-01-01) was a Thursday
+        weekday = (days + 3) % 7
+        return ((weekday < 5) & ~np.isin(days, self.holidays)) | np.isin(days, self.specialDays)
+
+    def tradingDays(self, startEpoch, endEpoch):
+        # IST day numbers of the trading days between two epochs, inclusive
+        days = np.arange((int(startEpoch) + istOffset) // 86400, (int(endEpoch) + istOffset) // 86400 + 1)
+        return days[self.isTradingDay(days)]
+
+    def sessions(self, day):
+        # (startMinute, endMinute) windows of one day, empty if it does not trade
+        day = int(day)
+        if day in self.specialSessions:
+            return self.specialSessions[day]
+        return self.regularSession if self.isTradingDay(day) else ()
+
+    def sessionMinutes(self, day, windows=None):
+        # Epoch of every 1-min bar of the day's sessions (or of the given windows)
+        dayStart = int(day) * 86400 - istOffset
+        windows = self.sessions(day) if windows is None else windows
+        parts = [dayStart + np.arange(start, end, dtype=np.int64) * 60 for start, end in windows]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def sessionMask(self, epochs, start=None, end=None):
+        """
+        True for the epochs inside a trading session. start and end
+        (datetime.time, both inclusive) narrow it further to a window such as
+        time(9, 16) - time(15, 25).
+        """
+        epochs = np.asarray(epochs, dtype=np.int64)
+        days = (epochs + istOffset) // 86400
+        minutes = minuteOfDay(epochs)
+
+        (regularOpen, regularClose), = self.regularSession
+        mask = self.isTradingDay(days) & (minutes >= regularOpen) & (minutes < regularClose)
+
+        special = np.isin(days, self.specialDays)
+        for day in np.unique(days[special]):
+            onDay = days == day
+            inWindow = np.zeros(int(onDay.sum()), dtype=bool)
+            for windowStart, windowEnd in self.specialSessions[int(day)]:
+                inWindow |= (minutes[onDay] >= windowStart) & (minutes[onDay] < windowEnd)
+            mask[onDay] = inWindow
+
+        if start is not None:
+            mask &= minutes >= toMinute(start)
+        if end is not None:
+            mask &= minutes <= toMinute(end)
+        return mask
+
+    def barsPerDay(self, interval, day=None):
+        # Number of interval bars in the regular session, or in the given day's sessions
+        if barSeconds(interval) >= 86400:
+            return 1 if day is None or self.isTradingDay(day) else 0
+        if day is not None:
+            return len(self._dayBars(day, interval))
+        if interval not in self.barCounts:
+            self.barCounts[interval] = len(self._dayBars(0, interval, self.regularSession))
+        return self.barCounts[interval]
+
+    def _dayBars(self, day, interval, windows=None):
+        labels = np.unique(barStarts(self.sessionMinutes(day, windows), interval))
+        return labels[labels >= 0]
+
+    def lookbackStart(self, endEpoch, nBars, interval, dailyAtOpen=False):
+        """
+        Start epoch (bar label) of the earliest of the nBars interval bars
+        whose session has started trading before endEpoch, counting only
+        trading sessions. Reading from there gives exactly nBars of warm-up
+        ahead of endEpoch.
+        """
+        endEpoch = int(endEpoch)
+        if nBars <= 0:
+            return endEpoch
+        seconds = barSeconds(interval)
+        day = (endEpoch + istOffset) // 86400
+
+        if seconds >= 86400:
+            needed = nBars * (seconds // 86400)
+            offset = sessionOpen if dailyAtOpen else 0
+            while True:
+                minutes = self.sessionMinutes(day)
+                if len(minutes) and minutes[0] < endEpoch:
+                    needed -= 1
+                    if needed == 0:
+                        return day * 86400 - istOffset + offset
+                day -= 1
+
+        needed = nBars
+        while True:
+            if self.isTradingDay(day):
+                labels = self._dayBars(day, interval)
+                labels = labels[labels < endEpoch]
+                if len(labels) >= needed:
+                    return int(labels[len(labels) - needed])
+                needed -= len(labels)
+            day -= 1
+
+
+nseCalendar = TradingCalendar()
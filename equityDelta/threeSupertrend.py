@@ -1,6 +1,7 @@
 from backtestTools.util import createPortfolio, calculateDailyReport, limitCapital, generateReportFile
 from backtestTools.algoLogic import baseAlgoLogic, equityOverNightAlgoLogic
-from backtestTools.histData import getEquityBacktestData
+from backtestUtils.lookback import getEquityLookbackData
+from backtestUtils.streamIndicators import supertrendFrame, StochRSI
 from backtestTools.util import setup_logger, calculate_mtm
 from datetime import datetime, timedelta
 from termcolor import colored, cprint
@@ -8,8 +9,6 @@ from datetime import datetime, time
 import multiprocessing
 import numpy as np
 import logging
-import talib
-import pandas_ta as ta
 import pandas as pd
 
 class equityDelta(baseAlgoLogic):
@@ -44,7 +43,7 @@ class equityDelta(baseAlgoLogic):
         logger.propagate = False
 
         try:
-            df = getEquityBacktestData(stockName, startTimeEpoch-(86400*500), endTimeEpoch, "75Min")
+            df = getEquityLookbackData(stockName, startTimeEpoch, endTimeEpoch, "75Min", warmupBars=1700)
         except Exception as e:
             print(stockName)
             raise Exception(e)
@@ -52,15 +51,14 @@ class equityDelta(baseAlgoLogic):
 
         df.dropna(inplace=True)
 
-        supertrend_one = ta.supertrend(df["h"], df["l"], df["c"], length=100, multiplier=3.6)
-        supertrend_two = ta.supertrend(df["h"], df["l"], df["c"], length=100, multiplier=2.7)
-        supertrend_three = ta.supertrend(df["h"], df["l"], df["c"], length=100, multiplier=1.8)
-        stoch_rsi = ta.momentum.stochrsi(df['c'], length=14, rsi_length=14, k=3, d=3)
+        # One ATR(100) for all three multipliers
+        supertrend = supertrendFrame(df, length=100, multipliers=(3.6, 2.7, 1.8))
+        stochRsiK, _ = StochRSI(period=14, rsiPeriod=14, kPeriod=3, dPeriod=3).batch(df['c'])
 
-        df['SupertrendColourOne'] = supertrend_one['SUPERTd_100_3.6']
-        df['SupertrendColourTwo'] = supertrend_two['SUPERTd_100_2.7']
-        df['SupertrendColourThree'] = supertrend_three['SUPERTd_100_1.8']
-        df['Stochastic_rsi'] = stoch_rsi['STOCHRSIk_14_14_3_3']
+        df['SupertrendColourOne'] = supertrend['SUPERTd_100_3.6']
+        df['SupertrendColourTwo'] = supertrend['SUPERTd_100_2.7']
+        df['SupertrendColourThree'] = supertrend['SUPERTd_100_1.8']
+        df['Stochastic_rsi'] = stochRsiK
         
         
 
@@ -7,6 +7,7 @@ from datetime import datetime, time
 from backtestTools.util import setup_logger
 from backtestTools.histData import getEquityHistData
 from backtestTools.histData import getEquityBacktestData
+from backtestUtils.lookback import fetchLookback
 from backtestTools.algoLogic import baseAlgoLogic, equityOverNightAlgoLogic
 from datetime import datetime, timedelta
 from backtestTools.util import createPortfolio, calculateDailyReport, limitCapital, generateReportFile
@@ -44,7 +45,7 @@ class BOLLINGERBAND(baseAlgoLogic):
         logger.propagate = False
 
         try:
-            df = getEquityBacktestData( stockName, startTimeEpoch-7776000, endTimeEpoch, "D")
+            df = fetchLookback(getEquityBacktestData, stockName, startTimeEpoch, endTimeEpoch, "D", warmupBars=60)
         except Exception as e:
             raise Exception(e)
 
@@ -1,4 +1,3 @@
-import talib
 import logging
 import numpy as np
 import multiprocessing
@@ -7,6 +6,8 @@ from datetime import datetime, time
 from backtestTools.util import setup_logger
 from backtestTools.histData import getEquityHistData
 from backtestTools.histData import getEquityBacktestData
+from backtestUtils.lookback import fetchLookback
+from backtestUtils.streamIndicators import ATR
 from backtestTools.algoLogic import baseAlgoLogic, equityOverNightAlgoLogic
 from datetime import datetime, timedelta
 from backtestTools.util import createPortfolio, calculateDailyReport, limitCapital, generateReportFile
@@ -44,18 +45,18 @@ class SUPERTREND(baseAlgoLogic):
         logger.propagate = False
 
         try:
-            df = getEquityBacktestData( stockName, startTimeEpoch-7776000, endTimeEpoch, "D")
+            df = fetchLookback(getEquityBacktestData, stockName, startTimeEpoch, endTimeEpoch, "D", warmupBars=60)
         except Exception as e:
             raise Exception(e)
 
         df.dropna(inplace=True)
         df.index = df.index + 33300
-        # Calculate ATR
-        atr = talib.ATR(df['h'], df['l'], df['c'], timeperiod=14)
-
         # Define multiplier
         multiplier = 3
 
+        # Calculate ATR
+        atr = ATR(14).batch(df['h'], df['l'], df['c'])
+
         # Calculate Basic Bands
         df['basic_ub'] = (df['h'] + df['l']) / 2 + multiplier * atr
         df['basic_lb'] = (df['h'] + df['l']) / 2 - multiplier * atr
@@ -64,20 +65,13 @@ class SUPERTREND(baseAlgoLogic):
         df['final_ub'] = df['basic_ub']
         df['final_lb'] = df['basic_lb']
 
-        # SuperTrend Calculation
-        df['supertrend'] = 0
-        for i in range(1, len(df)):
-            try:
-                # Use .iloc to access rows by position
-                if df['c'].iloc[i] > df['final_ub'].iloc[i-1]:
-                    df.loc[df.index[i], 'supertrend'] = df['final_lb'].iloc[i]
-                elif df['c'].iloc[i] < df['final_lb'].iloc[i-1]:
-                    df.loc[df.index[i], 'supertrend'] = df['final_ub'].iloc[i]
-                else:
-                    df.loc[df.index[i], 'supertrend'] = df['supertrend'].iloc[i-1]
-            except KeyError as e:
-                print(f"KeyError at index {i}: {e}")
-                continue
+        # SuperTrend: a close above the previous upper band takes the lower band,
+        # a close below the previous lower band takes the upper band, and every
+        # other bar holds the last level taken (0 until the first break)
+        breakUp = df['c'] > df['final_ub'].shift(1)
+        breakDown = ~breakUp & (df['c'] < df['final_lb'].shift(1))
+        level = df['final_lb'].where(breakUp, df['final_ub'].where(breakDown))
+        df['supertrend'] = level.ffill().fillna(0)
 
         # Create Green & Red Columns
         df['green'] = df['c'] > df['supertrend']
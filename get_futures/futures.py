@@ -1,5 +1,4 @@
-from backtestTools.expiry import getExpiryData
-from backtestTools.histData import getFnoBacktestData
+from backtestUtils.continuousFutures import getContinuousFutures
 import numpy as np
 import pandas as pd
 from datetime import datetime
@@ -8,22 +7,15 @@ start_date = datetime(2025, 5, 1, 9, 15)
 end_date = datetime(2025, 5, 13, 15, 00)
 baseSym = "NIFTY"
 
-# Get expiry info
-expiry_info = getExpiryData(start_date.timestamp(), baseSym)
-print(expiry_info)
-current_future_expiry = expiry_info['CurrentFutureExpiry']
+# Near-month futures stitched across expiries on the index's minute grid,
+# rolling after each expiry day (roll="daysBefore"/"oi" and adjust= are also available)
+ohlc_df = getContinuousFutures(baseSym, "NIFTY 50", start_date, end_date, roll="expiry")
+print(ohlc_df.attrs["rolls"])
 
-# Generate 1-minute interval timestamps
-dt_range = pd.date_range(start=start_date, end=end_date, freq='1min')
-df = pd.DataFrame({'Datetime': dt_range})
-df['CurrentFutureExpiry'] = current_future_expiry
-baseExp = baseSym + current_future_expiry
-
-# Get OHLC data for all futures
-ohlc_df = getFnoBacktestData(baseExp, start_date.timestamp(), end_date.timestamp(), "1Min")
 # Save DataFrame to CSV
-ohlc_df['symbol'] = baseExp
-ohlc_df.to_csv('current_future_expiry_1min.csv', index=False)
+ohlc_df = ohlc_df.drop(columns=["contract"])
+ohlc_df['symbol'] = ohlc_df['symbol'].astype(str)
+ohlc_df.to_csv('current_future_expiry_1min.csv', index_label='ti')
 
 # if ohlc_df is not None:
 #     ohlc_df = ohlc_df.reset_index()
@@ -1,6 +1,7 @@
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
 from backtestTools.algoLogic import optOverNightAlgoLogic
-from backtestTools.histData import getFnoBacktestData
+from backtestUtils.resample import getFnoBacktestData
+from backtestUtils.lookback import getFnoLookbackData
 from backtestTools.expiry import getExpiryData
 from datetime import datetime, time, timedelta
 import pandas_ta as taa
@@ -19,7 +20,7 @@ class algoLogic(optOverNightAlgoLogic):
 
         try:
             df = getFnoBacktestData(indexSym, startEpoch, endEpoch, "1Min")
-            df_1h = getFnoBacktestData(indexSym, startEpoch-886400, endEpoch, "1H")
+            df_1h = getFnoLookbackData(indexSym, startEpoch, endEpoch, "1H", warmupBars=50)
         except Exception as e:
             self.strategyLogger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}")
             raise Exception(e)
@@ -1,16 +1,24 @@
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
 from backtestTools.algoLogic import optOverNightAlgoLogic
-from backtestTools.histData import getFnoBacktestData
+from backtestUtils.paramSweep import getSweepData
 import numpy as np
 import talib as ta
 import pandas_ta as taa
 from backtestTools.expiry import getExpiryData
+from backtestUtils.instruments import sideOf
 from datetime import datetime, time, timedelta
 
 class algoLogic(optOverNightAlgoLogic):
 
     def run(self, startDate, endDate, baseSym, indexSym):
 
+        # Tunable parameters, overridden per combination by backtestUtils.paramSweep
+        params = getattr(self, "params", {})
+        targetMult = params.get("targetMult", 0.7)
+        stoplossMult = params.get("stoplossMult", 1.3)
+        entryStart = params.get("entryStart", time(9, 16))
+        entryEnd = params.get("entryEnd", time(15, 25))
+
         col = ["Target", "Stoploss", "Expiry"]
         self.addColumnsToOpenPnlDf(col)
 
@@ -19,8 +27,8 @@ class algoLogic(optOverNightAlgoLogic):
 
         try:
             # Fetch 1-minute and 5-minute data
-            df = getFnoBacktestData(indexSym, startEpoch, endEpoch, "1Min")
-            df_5min = getFnoBacktestData(indexSym, startEpoch - 886400, endEpoch, "5Min")
+            df = getSweepData(self, indexSym, startEpoch, endEpoch, "1Min")
+            df_5min = getSweepData(self, indexSym, startEpoch, endEpoch, "5Min", warmupBars=500)
 
             
         except Exception as e:
@@ -29,8 +37,8 @@ class algoLogic(optOverNightAlgoLogic):
 
 
         df_5min = df_5min[df_5min.index > startEpoch]
-        df.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexName}_1Min.csv")
-        df_5min.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexName}_5Min.csv")
+        df.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexSym}_1Min.csv")
+        df_5min.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexSym}_5Min.csv")
 
         callEntryAllow = True
         putEntryAllow = True        
@@ -81,11 +89,7 @@ class algoLogic(optOverNightAlgoLogic):
             if not self.openPnl.empty:
                 for index, row in self.openPnl.iterrows():
 
-                    symSide = row["Symbol"]
-                    symSide = symSide[len(symSide) - 2:]
-
-                    symSide = row["Symbol"]
-                    symSide = symSide[len(symSide)-2:]
+                    symSide = sideOf(row["Symbol"])
 
 
                     if row["CurrentPrice"] <= row["Target"]:
@@ -108,7 +112,7 @@ class algoLogic(optOverNightAlgoLogic):
             # callCounter= tradecount.get('CE',0)
             # putCounter= tradecount.get('PE',0)
 
-            if (timeData - 300) in df_5min.index and self.openPnl.empty:
+            if (timeData - 300) in df_5min.index and self.openPnl.empty and (entryStart <= self.humanTime.time() <= entryEnd):
                 # Ensure the column name is specified
                 if "c" in df_5min.columns and last5MinIndexTimeData[1] in df_5min.index:
                     if not np.isnan(df_5min.at[last5MinIndexTimeData[1], "c"]):
@@ -120,8 +124,8 @@ class algoLogic(optOverNightAlgoLogic):
                         except Exception as e:
                             self.strategyLogger.info(e)
 
-                        target = 0.7 * data["c"]
-                        stoploss = 1.3 * data["c"]
+                        target = targetMult * data["c"]
+                        stoploss = stoplossMult * data["c"]
 
                         self.entryOrder(data["c"], callSym, lotSize,"SELL",{"Target": target, "Stoploss": stoploss, "Expiry": expiryEpoch},)
 
@@ -133,8 +137,9 @@ class algoLogic(optOverNightAlgoLogic):
                     except Exception as e:
                         self.strategyLogger.info(e)
 
-                    target = 1.3 * data["c"]
-                    stoploss = 0.7 * data["c"]
+                    # The long put mirrors the short call's levels
+                    target = stoplossMult * data["c"]
+                    stoploss = targetMult * data["c"]
 
                     self.entryOrder(data["c"], putSym, lotSize, "BUY", {
                     "Target": target,"Stoploss": stoploss,"Expiry": expiryEpoch, },)
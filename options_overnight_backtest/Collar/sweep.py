@@ -0,0 +1,34 @@
+from backtestUtils.paramSweep import runSweep
+from datetime import datetime, time
+from Collar import algoLogic
+
+
+if __name__ == "__main__":
+    startTime = datetime.now()
+
+    devName = "Aniket"
+    strategyName = "collarSweep"
+    version = "v1"
+
+    startDate = datetime(2023, 1, 1, 9, 15)
+    endDate = datetime(2023, 12, 31, 15, 30)
+
+    baseSym = "NIFTY"
+    indexName = "NIFTY 50"
+
+    paramGrid = {
+        "targetMult": [0.3, 0.5, 0.7],
+        "stoplossMult": [1.3, 1.5],
+        "entryStart": [time(9, 16), time(9, 30), time(10, 0)],
+        "entryEnd": [time(14, 30), time(15, 25)],
+    }
+
+    results = runSweep(algoLogic, paramGrid, startDate, endDate, baseSym, indexName,
+                       intervals=("1Min", "5Min"), warmupBars=500, processes=6,
+                       devName=devName, strategyName=strategyName, version=version)
+
+    print(results)
+    results.to_csv(f"{strategyName}_results.csv", index=False)
+
+    endTime = datetime.now()
+    print(f"Done. Ended in {endTime-startTime}")
@@ -5,13 +5,25 @@ from backtestTools.expiry import getExpiryData
 from datetime import datetime, time, timedelta
 from backtestTools.algoLogic import optOverNightAlgoLogic, optIntraDayAlgoLogic
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
-from backtestTools.histData import getFnoBacktestData
 import multiprocessing as mp
+from backtestUtils.paramSweep import getSweepData
+from backtestUtils.chainPreload import preloadOptOverNightAlgoLogic
 
-class algoLogic(optOverNightAlgoLogic):
+class algoLogic(preloadOptOverNightAlgoLogic):
 
     def run(self, startDate, endDate, baseSym, indexSym):
 
+        # Tunable parameters, overridden per combination by backtestUtils.paramSweep
+        params = getattr(self, "params", {})
+        otmFactor = params.get("otmFactor", 0)
+        adxEntry = params.get("adxEntry", 25)
+        adxExit = params.get("adxExit", 20)
+        # Target/Stoploss as multiples of the entry premium; None keeps the ADX and expiry exits only
+        targetMult = params.get("targetMult")
+        stoplossMult = params.get("stoplossMult")
+        entryStart = params.get("entryStart", time(9, 20))
+        entryEnd = params.get("entryEnd", time(15, 25))
+
         col = ["Target", "Stoploss", "Expiry"]
         self.addColumnsToOpenPnlDf(col)
 
@@ -19,8 +31,8 @@ class algoLogic(optOverNightAlgoLogic):
         endEpoch = endDate.timestamp()
 
         try:
-            df = getFnoBacktestData(indexSym, startEpoch, endEpoch, "1Min")
-            df_5min = getFnoBacktestData(indexSym, startEpoch - 432000, endEpoch, "5Min")#fetching 5min data of nifty
+            df = getSweepData(self, indexSym, startEpoch, endEpoch, "1Min")
+            df_5min = getSweepData(self, indexSym, startEpoch, endEpoch, "5Min", warmupBars=250)#fetching 5min data of nifty
             
         except Exception as e:
             self.strategyLogger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}")
@@ -34,12 +46,12 @@ class algoLogic(optOverNightAlgoLogic):
 
         df_5min['macdBullish'] = np.where((df_5min['macd'] > df_5min['macdsignal']) & (df_5min['macd'].shift(1) < df_5min['macdsignal'].shift(1)), "macdBullish", "")
         df_5min['macdBearish'] = np.where((df_5min['macd'] < df_5min['macdsignal']) & (df_5min['macd'].shift(1) > df_5min['macdsignal'].shift(1)), "macdBearish", "")
-        df_5min['EntryCall'] = np.where((df_5min['adx'] > 25) & (df_5min['macdBullish'] == "macdBullish"),"EntryCall","")
-        df_5min['EntryPut'] = np.where((df_5min['adx'] > 25) & (df_5min['macdBearish'] == "macdBearish"),"EntryPut","")
+        df_5min['EntryCall'] = np.where((df_5min['adx'] > adxEntry) & (df_5min['macdBullish'] == "macdBullish"),"EntryCall","")
+        df_5min['EntryPut'] = np.where((df_5min['adx'] > adxEntry) & (df_5min['macdBearish'] == "macdBearish"),"EntryPut","")
 
         df_5min = df_5min[df_5min.index > startEpoch]
-        df.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexName}_1Min.csv")
-        df_5min.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexName}_5Min.csv")
+        df.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexSym}_1Min.csv")
+        df_5min.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexSym}_5Min.csv")
 
         callEntryAllow = True
         putEntryAllow = True        
@@ -97,7 +109,15 @@ class algoLogic(optOverNightAlgoLogic):
                         exitType = "Expiry Exit"
                         self.exitOrder(index, exitType)
 
-                    elif df_5min.at[last5MinIndexTimeData[1], "adx"] < 20: #adx exit
+                    elif targetMult is not None and row["CurrentPrice"] <= row["Target"]:
+                        exitType = "TargetHit"
+                        self.exitOrder(index, exitType)
+
+                    elif stoplossMult is not None and row["CurrentPrice"] >= row["Stoploss"]:
+                        exitType = "StoplossHit"
+                        self.exitOrder(index, exitType)
+
+                    elif df_5min.at[last5MinIndexTimeData[1], "adx"] < adxExit: #adx exit
                         exitType = "adxexit"
                         self.exitOrder(index, exitType)#, row["Target"]
                         self.strategyLogger.info(f"TargetHit: Datetime: {self.humanTime}")#logging the datetime at TargetHit
@@ -108,9 +128,9 @@ class algoLogic(optOverNightAlgoLogic):
             putCounter= tradecount.get('PE',0)
 
 
-            if (timeData - 900) in df_5min.index:
+            if ((timeData - 900) in df_5min.index) and (entryStart <= self.humanTime.time() <= entryEnd):
                 if callCounter <= 3 and df_5min.at[last5MinIndexTimeData[1] , "EntryCall"] == "EntryCall":
-                    callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], expiry=Currentexpiry)
+                    callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], expiry=Currentexpiry, otmFactor=otmFactor)
 
                     try:
                         data = self.fetchAndCacheFnoHistData(callSym, lastIndexTimeData[1])
@@ -120,10 +140,10 @@ class algoLogic(optOverNightAlgoLogic):
                         self.strategyLogger.exception(e)
 
                     if data is not None:
-                        self.entryOrder(data["c"], callSym, lotSize, "SELL", {"Expiry": expiryEpoch})
+                        self.entryOrder(data["c"], callSym, lotSize, "SELL", self.exitLevels(data["c"], targetMult, stoplossMult, expiryEpoch))
 
                 elif putCounter <= 3 and df_5min.at[last5MinIndexTimeData[1] , "EntryPut"] == "EntryPut":
-                    putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], expiry=Currentexpiry)
+                    putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], expiry=Currentexpiry, otmFactor=otmFactor)
 
                     try:
                         data = self.fetchAndCacheFnoHistData(putSym, lastIndexTimeData[1])
@@ -133,7 +153,7 @@ class algoLogic(optOverNightAlgoLogic):
                         self.strategyLogger.exception(e)
 
                     if data is not None:
-                        self.entryOrder(data["c"], putSym, lotSize, "SELL", {"Expiry": expiryEpoch})
+                        self.entryOrder(data["c"], putSym, lotSize, "SELL", self.exitLevels(data["c"], targetMult, stoplossMult, expiryEpoch))
                         self.strategyLogger.info(
                             f"optinPrice: {data['c']}, Entry: Datetime: {self.humanTime}\t"
                             f"Open: {df_5min.at[last5MinIndexTimeData[1], 'o']}\t"
@@ -150,6 +170,15 @@ class algoLogic(optOverNightAlgoLogic):
 
         return self.closedPnl, self.fileDir["backtestResultsStrategyUid"]
 
+    def exitLevels(self, price, targetMult, stoplossMult, expiryEpoch):
+        # Short option legs: the target sits below the entry premium, the stoploss above
+        levels = {"Expiry": expiryEpoch}
+        if targetMult is not None:
+            levels["Target"] = targetMult * price
+        if stoplossMult is not None:
+            levels["Stoploss"] = stoplossMult * price
+        return levels
+
 
 if __name__ == "__main__":
     startTime = datetime.now()
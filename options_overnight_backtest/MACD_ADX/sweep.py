@@ -0,0 +1,35 @@
+from backtestUtils.paramSweep import runSweep
+from datetime import datetime, time
+from main import algoLogic
+
+
+if __name__ == "__main__":
+    startTime = datetime.now()
+
+    devName = "Aniket"
+    strategyName = "macdAdxSweep"
+    version = "v1"
+
+    startDate = datetime(2024, 1, 1, 9, 15)
+    endDate = datetime(2024, 12, 31, 15, 30)
+
+    baseSym = "NIFTY"
+    indexName = "NIFTY 50"
+
+    paramGrid = {
+        "otmFactor": [0, 1],
+        "targetMult": [0.3, 0.7],
+        "stoplossMult": [1.3],
+        "entryStart": [time(9, 20), time(10, 0)],
+        "entryEnd": [time(14, 30), time(15, 25)],
+    }
+
+    results = runSweep(algoLogic, paramGrid, startDate, endDate, baseSym, indexName,
+                       intervals=("1Min", "5Min"), warmupBars=250, strikeBand=10, processes=6,
+                       devName=devName, strategyName=strategyName, version=version)
+
+    print(results)
+    results.to_csv(f"{strategyName}_results.csv", index=False)
+
+    endTime = datetime.now()
+    print(f"Done. Ended in {endTime-startTime}")
@@ -4,7 +4,7 @@ from backtestTools.expiry import getExpiryData
 from datetime import datetime, time, timedelta
 from backtestTools.algoLogic import optOverNightAlgoLogic, optIntraDayAlgoLogic
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
-from backtestTools.histData import getFnoBacktestData
+from backtestUtils.paramSweep import getSweepData
 import multiprocessing as mp
 
 class algoLogic(optIntraDayAlgoLogic):
@@ -13,6 +13,13 @@ class algoLogic(optIntraDayAlgoLogic):
      def run(self, startDate, endDate, baseSym, indexSym):
          #defining run to execute the strategy
 
+        # Tunable parameters, overridden per combination by backtestUtils.paramSweep
+        params = getattr(self, "params", {})
+        targetMult = params.get("targetMult", 0.7)
+        stoplossMult = params.get("stoplossMult", 1.3)
+        entryStart = params.get("entryStart", time(9, 20))
+        entryEnd = params.get("entryEnd", time(15, 25))
+
         col = ["Target", "Stoploss", "Expiry"]
         self.addColumnsToOpenPnlDf(col)
 
@@ -21,7 +28,7 @@ class algoLogic(optIntraDayAlgoLogic):
         
         #creating a dataframe of nifty and nifty 15min
         try:
-            df = getFnoBacktestData(indexSym, startEpoch - 432000, endEpoch, "1Min")#fetching 1min data of nifty
+            df = getSweepData(self, indexSym, startEpoch, endEpoch, "1Min", warmupBars=1125)#fetching 1min data of nifty
             df['rsi'] = ta.RSI(df["c"], timeperiod=14)#rsi values using talib library
             df['prev_rsi'] = df['c'].shift(1)
             df['CE_SELL_ABOVE_50'] = np.where((df['rsi'] > 50) & (df['rsi'].shift(1) <= 50), "CE_SELL_ABOVE_50", "")
@@ -103,7 +110,7 @@ class algoLogic(optIntraDayAlgoLogic):
 
             # '''for taking more than one lot size use trade counters or
             #     len(self.openPnl) < 2'''
-            if ((timeData - 900) in df.index):
+            if ((timeData - 900) in df.index) and (entryStart <= self.humanTime.time() <= entryEnd):
 
                 tradecount = self.openPnl['Symbol'].str[-2:].value_counts()
                 callTradeCounter = tradecount.get('CE',0)
@@ -123,8 +130,8 @@ class algoLogic(optIntraDayAlgoLogic):
                             self.strategyLogger.exception(e)
 
                         if data is not None:
-                            target = 0.7 * data["c"]#target value is 0.7 * data["c"] 
-                            stoploss = 1.3 * data["c"]#stoploss value is 1.3 * data["c"]
+                            target = targetMult * data["c"]#target value is 0.7 * data["c"] by default
+                            stoploss = stoplossMult * data["c"]#stoploss value is 1.3 * data["c"] by default
                             self.entryOrder(data["c"], callSym, lotSize, "SELL", {"Target": target,"Stoploss": stoploss,
                                             "Expiry": expiryEpoch })
 
@@ -143,8 +150,8 @@ class algoLogic(optIntraDayAlgoLogic):
                             self.strategyLogger.exception(e)
 
                         if data is not None:
-                            target = 0.7 * data["c"]#target value is 0.7 * data["c"] FOR PUT
-                            stoploss = 1.3 * data["c"]#stoploss value is 1.3 * data["c"] FOR PUT
+                            target = targetMult * data["c"]#target value is 0.7 * data["c"] FOR PUT by default
+                            stoploss = stoplossMult * data["c"]#stoploss value is 1.3 * data["c"] FOR PUT by default
                             self.entryOrder(data["c"], putSym, lotSize, "SELL", {"Target": target, "Stoploss": stoploss,
                                             "Expiry": expiryEpoch })
                             #to change lot size write lotSize(2)
@@ -181,10 +188,10 @@ if __name__ == "__main__":
     maxConcurrentProcesses = 4
     processes = []
 
- #For Multiprocessing   
-# Start a loop from Start Date to End Date
-currentDate = startDate
-while currentDate <= endDate:
+    # For Multiprocessing
+    # Start a loop from Start Date to End Date
+    currentDate = startDate
+    while currentDate <= endDate:
         # Define trading period for Current day
         startTime = datetime(
             currentDate.year, currentDate.month, currentDate.day, 9, 15, 0)
@@ -204,5 +211,5 @@ while currentDate <= endDate:
         currentDate += timedelta(days=1)
         
 
-end = datetime.now()
-print(f"Done. Ended in {end-start}.")
\ No newline at end of file
+    end = datetime.now()
+    print(f"Done. Ended in {end-start}.")
@@ -1,153 +1,80 @@
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
-from backtestTools.algoLogic import optOverNightAlgoLogic
-from backtestTools.histData import getFnoBacktestData
+from backtestUtils.multiStrategy import streamAlgoLogic
+from backtestUtils.positionBook import PositionBook, fetchLegs
 import numpy as np
 import talib as ta
 import pandas_ta as taa
 from backtestTools.expiry import getExpiryData
 from datetime import datetime, time, timedelta
 
-class algoLogic(optOverNightAlgoLogic):
+class algoLogic(streamAlgoLogic):
 
-    def run(self, startDate, endDate, baseSym, indexSym):
+    stateAttrs = ("entry", "Currentexpiry", "expiryDatetime", "expiryEpoch", "lotSize")
+
+    def onStart(self, stream):
 
         col = ["Target", "Stoploss", "Expiry"]
         self.addColumnsToOpenPnlDf(col)
+        self.book = PositionBook(col, engine=self)
 
-        startEpoch = startDate.timestamp()
-        endEpoch = endDate.timestamp()
-
-        try:
-            df = getFnoBacktestData(indexSym, startEpoch, endEpoch, "1Min")
-            df_5min = getFnoBacktestData(indexSym, startEpoch-886400, endEpoch, "5Min")
-        except Exception as e:
-            self.strategyLogger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}")
-            raise Exception(e)
-
-        df.dropna(inplace=True)
-        df_5min.dropna(inplace=True)
-
-        df_5min = df_5min[df_5min.index >= startEpoch]
-        df.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexName}_1Min.csv")
-        df_5min.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexName}_5Min.csv")
-
-                
-        lastIndexTimeData = [0, 0]
-        last5MinIndexTimeData = [0, 0]
-        entry = False
-
-        Currentexpiry = getExpiryData(startEpoch, baseSym)['CurrentExpiry']
-        expiryDatetime = datetime.strptime(Currentexpiry, "%d%b%y").replace(hour=15, minute=20)
-        expiryEpoch= expiryDatetime.timestamp()
-        lotSize = int(getExpiryData(self.timeData, baseSym)["LotSize"])
-
-        for timeData in df.index: 
-
-            self.timeData = float(timeData)
-            self.humanTime = datetime.fromtimestamp(timeData)
-            print(self.humanTime)
-
-            if (self.humanTime.time() < time(9, 16)) | (self.humanTime.time() > time(15, 30)):
-                continue
-
-            lastIndexTimeData.pop(0)
-            lastIndexTimeData.append(timeData-60)
-            if (timeData-300) in df_5min.index:
-                last5MinIndexTimeData.pop(0)
-                last5MinIndexTimeData.append(timeData-300)
-
-            if (self.humanTime.time() < time(9, 16)) | (self.humanTime.time() > time(15, 25)):
-                continue
-
-            if (timeData-300) in df_5min.index:
-                self.strategyLogger.info(f"Datetime: {self.humanTime}\tClose: {df.at[lastIndexTimeData[1],'c']}")
-
-            if not self.openPnl.empty:
-                for index, row in self.openPnl.iterrows():
-                    try:
-                        data = self.fetchAndCacheFnoHistData(row["Symbol"], lastIndexTimeData[1])
-                        self.openPnl.at[index, "CurrentPrice"] = data["c"]
-                    except Exception as e:
-                        self.strategyLogger.info(e)
-
-            self.pnlCalculator()
-
-            if self.humanTime.date() > expiryDatetime.date() : #next day after expiry to build condor
-                Currentexpiry = getExpiryData(self.timeData, baseSym)['CurrentExpiry']
-                expiryDatetime = datetime.strptime(Currentexpiry, "%d%b%y").replace(hour=15, minute=20)
-                expiryEpoch= expiryDatetime.timestamp()
-                entry= True
-                
-            if not self.openPnl.empty:
-                for index, row in self.openPnl.iterrows():
-
-                    if self.timeData >= row["Expiry"]:
-                        exitType = "Expiry Exit"
-                        self.exitOrder(index, exitType)
-
-            # tradecount = self.openPnl['Symbol'].str[-2:].value_counts()
-            # callCounter= tradecount.get('CE',0)
-            # putCounter= tradecount.get('PE',0)
-
-            if ((timeData-300) in df_5min.index) and self.openPnl.empty:
-                if entry == True and self.humanTime.time() == time(10, 15):    
-                
-                    #Call Entry
-                    callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"],expiry= Currentexpiry, otmFactor=4)
-
-                    try:
-                        data = self.fetchAndCacheFnoHistData(callSym, lastIndexTimeData[1])
-                    except Exception as e:
-                        self.strategyLogger.info(e)
-
-                    self.entryOrder(data["c"], callSym, lotSize, "BUY", {"Expiry": expiryEpoch},)
-
-                    # Call Hedge Entry
-                    callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], expiry=Currentexpiry, otmFactor=2)
-
-                    try:
-                        # Fetch data once and reuse it
-                        data = self.fetchAndCacheFnoHistData(callSym, lastIndexTimeData[1])
-                    except Exception as e:
-                        self.strategyLogger.info(e)
-
-                    self.entryOrder(data["c"], callSym, lotSize, "SELL", {"Expiry": expiryEpoch})
-                    self.entryOrder(data["c"], callSym, lotSize, "SELL", {"Expiry": expiryEpoch})
-
-                    
-
-
-                    #Put Entry
-                    putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"],expiry= Currentexpiry, otmFactor=4)
+        df_5min = stream.frames["5Min"]
+        stream.df.to_csv(f"{self.fileDir['backtestResultsCandleData']}{stream.indexSym}_1Min.csv")
+        df_5min[df_5min.index >= stream.startEpoch].to_csv(f"{self.fileDir['backtestResultsCandleData']}{stream.indexSym}_5Min.csv")
 
-                    try:
-                        data = self.fetchAndCacheFnoHistData(putSym, lastIndexTimeData[1])
-                    except Exception as e:
-                        self.strategyLogger.info(e)
+        self.entry = False
+        self.Currentexpiry = getExpiryData(stream.startEpoch, stream.baseSym)['CurrentExpiry']
+        self.expiryDatetime = datetime.strptime(self.Currentexpiry, "%d%b%y").replace(hour=15, minute=20)
+        self.expiryEpoch = self.expiryDatetime.timestamp()
+        self.lotSize = int(getExpiryData(stream.startEpoch, stream.baseSym)["LotSize"])
 
-                    self.entryOrder(data["c"], putSym, lotSize, "BUY", {"Expiry": expiryEpoch},)
-                    
+    def onBar(self, stream, i):
 
-                    # Put Hedge Entry
-                    callSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], expiry=Currentexpiry, otmFactor=2)
+        timeData = stream.minutes[i]
+        baseSym = stream.baseSym
+        lastIndexTimeData = timeData - 60
+        pos5Min = stream.tfPos["5Min"][i]
+        new5MinBar = stream.newBar["5Min"][i] and pos5Min >= 0
 
-                    try:
-                        # Fetch data once and reuse it
-                        data = self.fetchAndCacheFnoHistData(callSym, lastIndexTimeData[1])
-                    except Exception as e:
-                        self.strategyLogger.info(e)
+        # 09:16 to 15:25 of a trading session only
+        if not stream.window(time(9, 16), time(15, 25))[i]:
+            return
 
-                    self.entryOrder(data["c"], callSym, lotSize, "SELL", {"Expiry": expiryEpoch})
-                    self.entryOrder(data["c"], callSym, lotSize, "SELL", {"Expiry": expiryEpoch})
-                    
-                    
+        if new5MinBar:
+            self.strategyLogger.info(f"Datetime: {self.humanTime}\tClose: {stream.df.at[lastIndexTimeData,'c'] if lastIndexTimeData in stream.df.index else None}")
 
-                    
+        if not self.book.empty:
+            self.book.refresh(lastIndexTimeData, self.fetchAndCacheFnoHistData, self.strategyLogger)
 
         self.pnlCalculator()
-        self.combinePnlCsv()
 
-        return self.closedPnl, self.fileDir["backtestResultsStrategyUid"]
+        if self.humanTime.date() > self.expiryDatetime.date() : #next day after expiry to build condor
+            self.Currentexpiry = getExpiryData(self.timeData, baseSym)['CurrentExpiry']
+            self.expiryDatetime = datetime.strptime(self.Currentexpiry, "%d%b%y").replace(hour=15, minute=20)
+            self.expiryEpoch = self.expiryDatetime.timestamp()
+            self.entry = True
+            
+        if not self.book.empty:
+            self.book.exit(self.book.expiryMask(self.timeData), self.timeData, "Expiry Exit")
+
+        if new5MinBar and self.book.empty:
+            if self.entry == True and stream.minuteOfDay[i] == 10 * 60 + 15:
+
+                close5Min = stream.frames["5Min"]["c"].values[pos5Min]
+                expiryEpoch = self.expiryEpoch
+                lotSize = self.lotSize
+
+                # Long wings at otmFactor 4, two short lots each side at otmFactor 2
+                legs = [(self.getCallSym, 4, "BUY", 1), (self.getCallSym, 2, "SELL", 2),
+                        (self.getPutSym, 4, "BUY", 1), (self.getPutSym, 2, "SELL", 2)]
+                # Every leg is priced before any is entered, one missing leg skips the whole batman
+                symbols = [getSym(self.timeData, baseSym, close5Min, expiry=self.Currentexpiry, otmFactor=otmFactor) for getSym, otmFactor, _, _ in legs]
+                prices = fetchLegs(self.fetchAndCacheFnoHistData, symbols, lastIndexTimeData, self.strategyLogger)
+                if prices is None:
+                    return
+
+                for (getSym, otmFactor, side, orders), sym, data in zip(legs, symbols, prices):
+                    for _ in range(orders):
+                        self.book.entry(self.timeData, data["c"], sym, lotSize, side, {"Expiry": expiryEpoch})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,39 @@
+from backtestUtils.chunkRunner import runChunked
+from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
+from datetime import datetime, timedelta
+from main import algoLogic
+
+
+if __name__ == "__main__":
+    startTime = datetime.now()
+
+    devName = "NA"
+    strategyName = "coveredCallEveryMonth"
+    version = "v1"
+
+    startDate = datetime(2022, 1, 1, 9, 15)
+    endDate = datetime(2025, 4, 30, 15, 30)
+
+    baseSym = "NIFTY"
+    indexName = "NIFTY 50"
+
+    # Set once to also make a serial run and compare; chunks rebuild indicators from their own
+    # warm-up, so trades near chunk starts can differ from it
+    verify = False
+
+    # Split at the session after each expiry and run the chunks in parallel
+    closedPnl, fileDir, matchesSerial = runChunked(algoLogic, startDate, endDate, baseSym, indexName,
+                                                   processes=8, verify=verify, devName=devName,
+                                                   strategyName=strategyName, version=version, strikeBand=10)
+    if verify:
+        print(f"Stitched result matches serial run: {matchesSerial}")
+
+    print("Calculating Daily Pnl")
+    dr = calculateDailyReport(closedPnl, fileDir, timeFrame=timedelta(minutes=5), mtm=True)
+
+    limitCapital(closedPnl, fileDir, maxCapitalAmount=1000)
+
+    generateReportFile(dr, fileDir)
+
+    endTime = datetime.now()
+    print(f"Done. Ended in {endTime-startTime}")
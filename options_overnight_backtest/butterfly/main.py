@@ -1,158 +1,91 @@
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
-from backtestTools.algoLogic import optOverNightAlgoLogic
-from backtestTools.histData import getFnoBacktestData
+from backtestUtils.multiStrategy import streamAlgoLogic
+from backtestUtils.checkpoint import runCheckpointed
+from backtestUtils.positionBook import PositionBook, fetchLegs
 from datetime import datetime, time, timedelta
 from backtestTools.expiry import getExpiryData
 import talib as ta
 import numpy as np
 
-class algoLogic(optOverNightAlgoLogic):
+class algoLogic(streamAlgoLogic):
 
-    def run(self, startDate, endDate, baseSym, indexSym):
+    stateAttrs = ("CurrentExpiry", "expiryDatetime", "expiryEpoch", "lotSize")
+
+    def onStart(self, stream):
 
         col = ["Target", "Stoploss", "Expiry"]
         self.addColumnsToOpenPnlDf(col)
+        self.book = PositionBook(col + ["time"], engine=self)
 
-        startEpoch = startDate.timestamp()
-        endEpoch = endDate.timestamp()
-
-        try:
-            df = getFnoBacktestData(indexSym, startEpoch, endEpoch, "1Min")
-            df_5min = getFnoBacktestData(indexSym, startEpoch-886400, endEpoch, "5Min")
-        except Exception as e:
-            self.strategyLogger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}")
-            raise Exception(e)
-
+        df_5min = stream.frames["5Min"].copy()
         df_5min['rsi'] = ta.RSI(df_5min["c"], timeperiod=14)
         df_5min["rsiCross60"] = np.where((df_5min["rsi"] > 60) & (df_5min["rsi"].shift(1) <= 60), "rsiCross60", 0)
         df_5min["rsiCross40"] = np.where((df_5min["rsi"] < 40) & (df_5min["rsi"].shift(1) >= 40), "rsiCross40", 0)
+        self.df_5min = df_5min
 
-        df.dropna(inplace=True)
-        df_5min.dropna(inplace=True)
-
-        df_5min = df_5min[df_5min.index > startEpoch]
-        df.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexName}_1Min.csv")
-        df_5min.to_csv(f"{self.fileDir['backtestResultsCandleData']}{indexName}_5Min.csv")
-   
-        lastIndexTimeData = [0, 0]
-        last5MinIndexTimeData = [0, 0]
-
-        CurrentExpiry = getExpiryData(startEpoch, baseSym)['CurrentExpiry']
-        expiryDatetime = datetime.strptime(CurrentExpiry, "%d%b%y").replace(hour=15, minute=20)
-        expiryEpoch= expiryDatetime.timestamp()
-        lotSize = int(getExpiryData(self.timeData, baseSym)["LotSize"])
-
-        for timeData in df.index: 
-
-            self.timeData = float(timeData)
-            self.humanTime = datetime.fromtimestamp(timeData)
-            print(self.humanTime)
-
-            if (self.humanTime.time() < time(9, 16)) | (self.humanTime.time() > time(15, 30)):
-                continue
-
-            lastIndexTimeData.pop(0)
-            lastIndexTimeData.append(timeData-60)
-            if (timeData-300) in df_5min.index:
-                last5MinIndexTimeData.pop(0)
-                last5MinIndexTimeData.append(timeData-300)
-
-            if (self.humanTime.time() < time(9, 16)) | (self.humanTime.time() > time(15, 25)):
-                continue
-
-            if not self.openPnl.empty:
-                for index, row in self.openPnl.iterrows():
-                    try:
-                        data = self.fetchAndCacheFnoHistData(row["Symbol"], lastIndexTimeData[1])
-                        self.openPnl.at[index, "CurrentPrice"] = data["c"]
-                    except Exception as e:
-                        self.strategyLogger.info(e)
-            self.pnlCalculator()
-
-            if self.humanTime.date() >= expiryDatetime.date() :
-                CurrentExpiry = getExpiryData(self.timeData+86400, baseSym)['CurrentExpiry']
-                expiryDatetime = datetime.strptime(CurrentExpiry, "%d%b%y").replace(hour=15, minute=20)
-                expiryEpoch= expiryDatetime.timestamp()
-
-            if not self.openPnl.empty:
-                for index, row in self.openPnl.iterrows():
-
-                    symSide = row["Symbol"]
-                    symSide = symSide[len(symSide) - 2:]
-
-                    if self.timeData > row["Expiry"]:
-                        exitType = f"ExpiryExit, {row['time']}"
-                        self.exitOrder(index, exitType)
-
-            if ((timeData-300) in df_5min.index) and (self.openPnl.empty):
+        stream.df.to_csv(f"{self.fileDir['backtestResultsCandleData']}{stream.indexSym}_1Min.csv")
+        df_5min[df_5min.index > stream.startEpoch].dropna().to_csv(f"{self.fileDir['backtestResultsCandleData']}{stream.indexSym}_5Min.csv")
 
-                if df_5min.at[last5MinIndexTimeData[1], "rsiCross60"] == "rsiCross60":
+        self.CurrentExpiry = getExpiryData(stream.startEpoch, stream.baseSym)['CurrentExpiry']
+        self.expiryDatetime = datetime.strptime(self.CurrentExpiry, "%d%b%y").replace(hour=15, minute=20)
+        self.expiryEpoch = self.expiryDatetime.timestamp()
+        self.lotSize = int(getExpiryData(stream.startEpoch, stream.baseSym)["LotSize"])
 
-                    putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry)
+    def onBar(self, stream, i):
 
-                    try:
-                        data = self.fetchAndCacheFnoHistData(putSym, lastIndexTimeData[1])
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {putSym}: {e}")
-                        
+        timeData = stream.minutes[i]
+        baseSym = stream.baseSym
+        df = stream.df
+        df_5min = self.df_5min
+        lastIndexTimeData = timeData - 60
+        pos5Min = stream.tfPos["5Min"][i]
+        new5MinBar = stream.newBar["5Min"][i] and pos5Min >= 0
 
-                    self.entryOrder(data["c"], putSym, (lotSize*2), "SELL", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"]})
+        # 09:16 to 15:25 of a trading session only
+        if not stream.window(time(9, 16), time(15, 25))[i]:
+            return
 
-                    putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry, -1)
-
-                    try:
-                        data = self.fetchAndCacheFnoHistData(putSym, lastIndexTimeData[1])
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {putSym}: {e}")
-
-                    self.entryOrder(data["c"], putSym, lotSize, "BUY", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"]})
-
-                    putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry, 1)
-
-                    try:
-                        data = self.fetchAndCacheFnoHistData(putSym, lastIndexTimeData[1])
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {putSym}: {e}")
-
-                    self.entryOrder(data["c"], putSym, lotSize, "BUY", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"]})
-
-
-                elif df_5min.at[last5MinIndexTimeData[1], "rsiCross40"] == "rsiCross40":
-
-                    callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry, -1)
-
-                    try:
-                        data = self.fetchAndCacheFnoHistData(callSym, lastIndexTimeData[1])
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {callSym}: {e}")
-
-                    self.entryOrder(data["c"], callSym, lotSize, "BUY", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"]})
-
-
-                    callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry, 1)
-
-                    try:
-                        data = self.fetchAndCacheFnoHistData(callSym, lastIndexTimeData[1])
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {callSym}: {e}")
+        if not self.book.empty:
+            self.book.refresh(lastIndexTimeData, self.fetchAndCacheFnoHistData, self.strategyLogger)
+        self.pnlCalculator()
 
-                    self.entryOrder(data["c"], callSym, lotSize, "BUY", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"]})
+        if self.humanTime.date() >= self.expiryDatetime.date() :
+            self.CurrentExpiry = getExpiryData(self.timeData+86400, baseSym)['CurrentExpiry']
+            self.expiryDatetime = datetime.strptime(self.CurrentExpiry, "%d%b%y").replace(hour=15, minute=20)
+            self.expiryEpoch = self.expiryDatetime.timestamp()
 
+        if not self.book.empty:
+            n = self.book.size
+            for slot in np.flatnonzero((self.timeData > self.book.expiry[:n]) & self.book.isOpen[:n]):
+                self.book.exit([slot], self.timeData, f"ExpiryExit, {self.book.extras['time'][slot]}")
 
-                    callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry)
+        if new5MinBar and self.book.empty:
 
-                    try:
-                        data = self.fetchAndCacheFnoHistData(callSym, lastIndexTimeData[1])
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {callSym}: {e}")
+            CurrentExpiry = self.CurrentExpiry
+            expiryEpoch = self.expiryEpoch
+            lotSize = self.lotSize
+            close5Min = df_5min["c"].values[pos5Min]
+            entryTime = df.at[lastIndexTimeData, "datetime"] if lastIndexTimeData in df.index else self.humanTime
 
-                    self.entryOrder(data["c"], callSym, (lotSize*2), "BUY", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"]})
+            legs = None
+            if df_5min["rsiCross60"].values[pos5Min] == "rsiCross60":
+                getSym = self.getPutSym
+                legs = [(0, lotSize * 2, "SELL"), (-1, lotSize, "BUY"), (1, lotSize, "BUY")]
 
-        self.pnlCalculator()
-        self.combinePnlCsv()
+            elif df_5min["rsiCross40"].values[pos5Min] == "rsiCross40":
+                getSym = self.getCallSym
+                legs = [(-1, lotSize, "BUY"), (1, lotSize, "BUY"), (0, lotSize * 2, "BUY")]
 
-        return self.closedPnl, self.fileDir["backtestResultsStrategyUid"]
+            if legs is not None:
+                # Every leg is priced before any is entered, one missing leg skips the whole butterfly
+                symbols = [getSym(self.timeData, baseSym, close5Min, CurrentExpiry, otmFactor) for otmFactor, _, _ in legs]
+                prices = fetchLegs(self.fetchAndCacheFnoHistData, symbols, lastIndexTimeData, self.strategyLogger)
+                if prices is None:
+                    self.strategyLogger.info(f"Skipping entry for time {self.humanTime} due to missing data.")
+                    return
 
+                for (otmFactor, qty, side), sym, data in zip(legs, symbols, prices):
+                    self.book.entry(self.timeData, data["c"], sym, qty, side, {"Expiry": expiryEpoch, "time": entryTime})
 
 if __name__ == "__main__":
     startTime = datetime.now()
@@ -169,7 +102,8 @@ if __name__ == "__main__":
     baseSym = "NIFTY"
     indexName = "NIFTY 50"
 
-    closedPnl, fileDir = algo.run(startDate, endDate, baseSym, indexName)
+    # Days already covered by an earlier run of the same code and params are read from checkpoints
+    closedPnl, fileDir = runCheckpointed(algo, startDate, endDate, baseSym, indexName, strikeBand=10)
 
     print("Calculating Daily Pnl")
     dr = calculateDailyReport(closedPnl, fileDir, timeFrame=timedelta(minutes=5), mtm=True)
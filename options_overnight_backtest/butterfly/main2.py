@@ -1,6 +1,8 @@
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
 from backtestTools.algoLogic import optOverNightAlgoLogic
-from backtestTools.histData import getFnoBacktestData
+from backtestUtils.resample import getFnoBacktestData
+from backtestUtils.lookback import getFnoLookbackData
+from backtestUtils.positionBook import PositionBook, fetchLegs
 from datetime import datetime, time, timedelta
 from backtestTools.expiry import getExpiryData
 import talib as ta
@@ -12,13 +14,14 @@ class algoLogic(optOverNightAlgoLogic):
 
         col = ["Target", "Stoploss", "Expiry"]
         self.addColumnsToOpenPnlDf(col)
+        self.book = PositionBook(col + ["time", "entrytype"], engine=self)
 
         startEpoch = startDate.timestamp()
         endEpoch = endDate.timestamp()
 
         try:
             df = getFnoBacktestData(indexSym, startEpoch, endEpoch, "1Min")
-            df_5min = getFnoBacktestData(indexSym, startEpoch-886400, endEpoch, "5Min")
+            df_5min = getFnoLookbackData(indexSym, startEpoch, endEpoch, "5Min", warmupBars=500)
         except Exception as e:
             self.strategyLogger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}")
             raise Exception(e)
@@ -63,13 +66,8 @@ class algoLogic(optOverNightAlgoLogic):
             if (self.humanTime.time() < time(9, 16)) | (self.humanTime.time() > time(15, 25)):
                 continue
 
-            if not self.openPnl.empty:
-                for index, row in self.openPnl.iterrows():
-                    try:
-                        data = self.fetchAndCacheFnoHistData(row["Symbol"], lastIndexTimeData[1])
-                        self.openPnl.at[index, "CurrentPrice"] = data["c"]
-                    except Exception as e:
-                        self.strategyLogger.info(e)
+            if not self.book.empty:
+                self.book.refresh(lastIndexTimeData[1], self.fetchAndCacheFnoHistData, self.strategyLogger)
             self.pnlCalculator()
 
             if self.humanTime.date() >= expiryDatetime.date() :
@@ -78,114 +76,47 @@ class algoLogic(optOverNightAlgoLogic):
                 expiryEpoch= expiryDatetime.timestamp()
             
 
-            if not self.openPnl.empty:
-                for index, row in self.openPnl.iterrows():
-
-                    symSide = row["Symbol"]
-                    symSide = symSide[len(symSide) - 2:]
-
-                    if self.timeData > row["Expiry"]:
-                        exitType = f"ExpiryExit, {row['time']}"
-                        self.exitOrder(index, exitType)
-                    
-                    elif row["CurrentPrice"] <= row["Target"]:
+            if not self.book.empty:
+                n = self.book.size
+                isOpen = self.book.isOpen[:n]
+                price = self.book.currentPrice[:n]
+                expired = (self.timeData > self.book.expiry[:n]) & isOpen
+                with np.errstate(invalid="ignore"):
+                    targetHit = (price <= self.book.target[:n]) & isOpen
+                    stoplossHit = (price >= self.book.stoploss[:n]) & isOpen
+
+                for slot in np.flatnonzero(expired | targetHit | stoplossHit):
+                    if expired[slot]:
+                        exitType = f"ExpiryExit, {self.book.extras['time'][slot]}"
+                    elif targetHit[slot]:
                         exitType = "Target Hit"
-                        self.exitOrder(index, exitType, row["CurrentPrice"])
-
-                    elif row["CurrentPrice"] >= row["Stoploss"]:
+                    else:
                         exitType = "Stoploss Hit"
-                        self.exitOrder(index, exitType, row["CurrentPrice"])
+                    self.book.exit([slot], self.timeData, exitType)
 
-            if ((timeData - 300) in df_5min.index) and (self.openPnl.empty):
+            if ((timeData - 300) in df_5min.index) and (self.book.empty):
 
-                skipEntry = False  # Flag to determine if entries should be skipped
+                close5Min = df_5min.at[last5MinIndexTimeData[1], "c"]
+                entryTime = df.at[lastIndexTimeData[1], "datetime"]
+                legs = None
 
                 if df_5min.at[last5MinIndexTimeData[1], "rsiCross60"] == "rsiCross60":
-
-                    # First Put Entry
-                    putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry)
-                    try:
-                        data = self.fetchAndCacheFnoHistData(putSym, lastIndexTimeData[1])
-                        if data is None:
-                            raise Exception(f"No data found for {putSym}")
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {putSym}: {e}")
-                        skipEntry = True
-
-                    if not skipEntry:
-                        self.entryOrder(data["c"], putSym, (lotSize * 2), "SELL", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"], "entrytype": "one"})
-
-                    # Second Put Entry
-                    putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry, -2)
-                    try:
-                        data = self.fetchAndCacheFnoHistData(putSym, lastIndexTimeData[1])
-                        if data is None:
-                            raise Exception(f"No data found for {putSym}")
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {putSym}: {e}")
-                        skipEntry = True
-
-                    if not skipEntry:
-                        self.entryOrder(data["c"], putSym, lotSize, "BUY", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"], "entrytype": "one"})
-
-                    # Third Put Entry
-                    putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry, 1)
-                    try:
-                        data = self.fetchAndCacheFnoHistData(putSym, lastIndexTimeData[1])
-                        if data is None:
-                            raise Exception(f"No data found for {putSym}")
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {putSym}: {e}")
-                        skipEntry = True
-
-                    if not skipEntry:
-                        self.entryOrder(data["c"], putSym, lotSize, "BUY", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"],"entrytype": "one" })
+                    getSym, entryType = self.getPutSym, "one"
+                    legs = [(0, lotSize * 2, "SELL"), (-2, lotSize, "BUY"), (1, lotSize, "BUY")]
 
                 elif df_5min.at[last5MinIndexTimeData[1], "rsiCross40"] == "rsiCross40":
-
-                    # First Call Entry
-                    callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry, -2)
-                    try:
-                        data = self.fetchAndCacheFnoHistData(callSym, lastIndexTimeData[1])
-                        if data is None:
-                            raise Exception(f"No data found for {callSym}")
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {callSym}: {e}")
-                        skipEntry = True
-
-                    if not skipEntry:
-                        self.entryOrder(data["c"], callSym, lotSize, "BUY", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"],"entrytype": "two"})
-
-                    # Second Call Entry
-                    callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry, 1)
-                    try:
-                        data = self.fetchAndCacheFnoHistData(callSym, lastIndexTimeData[1])
-                        if data is None:
-                            raise Exception(f"No data found for {callSym}")
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {callSym}: {e}")
-                        skipEntry = True
-
-                    if not skipEntry:
-                        self.entryOrder(data["c"], callSym, lotSize, "BUY", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"], "entrytype": "two"})
-
-                    # Third Call Entry
-                    callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"], CurrentExpiry)
-                    try:
-                        data = self.fetchAndCacheFnoHistData(callSym, lastIndexTimeData[1])
-                        if data is None:
-                            raise Exception(f"No data found for {callSym}")
-                    except Exception as e:
-                        self.strategyLogger.info(f"Error fetching data for {callSym}: {e}")
-                        skipEntry = True
-
-                    if not skipEntry:
-                        self.entryOrder(data["c"], callSym, (lotSize * 2), "BUY", {"Expiry": expiryEpoch, "time": df.at[lastIndexTimeData[1], "datetime"],"entrytype": "two"})
-                    
-                # Skip all entries for this time period if any data fetch failed
-                if skipEntry:
-                    self.strategyLogger.info(f"Skipping all entries for time {self.humanTime} due to missing data.")
-                    return
+                    getSym, entryType = self.getCallSym, "two"
+                    legs = [(-2, lotSize, "BUY"), (1, lotSize, "BUY"), (0, lotSize * 2, "BUY")]
+
+                if legs is not None:
+                    # Every leg is priced before any is entered, one missing leg skips the whole butterfly
+                    symbols = [getSym(self.timeData, baseSym, close5Min, CurrentExpiry, otmFactor) for otmFactor, _, _ in legs]
+                    prices = fetchLegs(self.fetchAndCacheFnoHistData, symbols, lastIndexTimeData[1], self.strategyLogger)
+                    if prices is None:
+                        self.strategyLogger.info(f"Skipping all entries for time {self.humanTime} due to missing data.")
+                    else:
+                        for (otmFactor, qty, side), sym, data in zip(legs, symbols, prices):
+                            self.book.entry(self.timeData, data["c"], sym, qty, side, {"Expiry": expiryEpoch, "time": entryTime, "entrytype": entryType})
 
             # if not self.openPnl.empty:
             #     for index, row in self.openPnl.iterrows():
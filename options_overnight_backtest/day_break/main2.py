@@ -2,10 +2,13 @@ import numpy as np
 import talib as ta
 from datetime import datetime, time, timedelta, date
 from backtestTools.algoLogic import optOverNightAlgoLogic
-from backtestTools.histData import getFnoBacktestData
+from backtestUtils.resample import getFnoBacktestData
+from backtestUtils.lookback import getFnoLookbackData
 from backtestTools.expiry import getExpiryData
 import pandas_ta as pta
 from backtestTools.util import setup_logger
+from backtestUtils.timeframeAlign import alignTimeframes, newBarMask
+from backtestUtils.eventClock import EventClock
 
 
 class Break(optOverNightAlgoLogic):
@@ -22,17 +25,13 @@ class Break(optOverNightAlgoLogic):
         
 
         try:
-            df_1d = getFnoBacktestData(indexSym, startepoch-(86400 * 30), endepoch, '1D')
+            df_1d = getFnoLookbackData(indexSym, startepoch, endepoch, '1D', warmupBars=20, dailyAtOpen=True)
             df_1h=getFnoBacktestData(indexSym,startepoch,endepoch,'1H')
             df_1m=getFnoBacktestData(indexSym,startepoch,endepoch,'1Min')
         except Exception as e:
             daily_strategy_logger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}")
             raise Exception(e)
         
-        #Alligning Index
-        df_1d.index = df_1d.index + 33300
-        df_1d.ti = df_1d.ti + 33300
-
         #DataCleaning
         df_1d = df_1d[df_1d.index >= startepoch-86400]
         df_1d.dropna(inplace=True)
@@ -55,8 +54,14 @@ class Break(optOverNightAlgoLogic):
         self.addColumnsToOpenPnlDf(col)
         
         lastindextimeData1m=[0,0]
-        lastindextimeData1h=[0,0]
-        lastindextimeData1d=[0,0] 
+
+        # Latest completed 1H / 1D bar for every 1-min bar. The partial 15:15 1H bar
+        # only ends at 16:15, so it is never read, as with the (timeData-3600) lookup
+        tfPos = alignTimeframes(df_1m, {"1H": df_1h, "1D": df_1d}, sessionEnd=15 * 3600 + 30 * 60)
+        new1hBar = newBarMask(tfPos["1H"])
+        close1h = df_1h['c'].values
+        high1d = df_1d['h'].values
+        low1d = df_1d['l'].values
 
         daily_high = None                                  # Remove variable/ Entry on expiry 
         daily_low = None
@@ -66,36 +71,28 @@ class Break(optOverNightAlgoLogic):
         putTradeCounter = 0
 
         last_breakout = {"CE": None, "PE": None}  
+        close_price = None
+        retryEntry = False
 
+        # While flat, entries can only change at a new 1H close or a new day's levels; a failed
+        # option fetch keeps the clock on every minute so the entry is retried on the next bar
+        clock = EventClock(df_1m.index, time(9, 15), time(15, 30))
+        clock.addEpochs(df_1m.index[new1hBar & (tfPos["1H"] >= 0)], exact=True)
+        clock.addTimeOfDay(time(9, 15))
 
-        for timeData in df_1m.index:
+        for timeData in clock.run(lambda: self.openPnl.empty and not retryEntry):
+            i = clock.pos
             self.timeData = float(timeData)
             self.humanTime = datetime.fromtimestamp(timeData)
             current_day = self.humanTime.date()
+            retryEntry = False
 
-            # Skip time periods outside trading hours
-            if (self.humanTime.time() < time(9, 15)) or (self.humanTime.time() > time(15, 30)):
-                continue
-            
             lastindextimeData1m.pop(0)
             lastindextimeData1m.append(timeData-60)
 
-            if (timeData-3600) in df_1h.index:
-                lastindextimeData1h.pop(0)
-                lastindextimeData1h.append(timeData - 3600)
+            pos1h = tfPos["1H"][i]
+            pos1d = tfPos["1D"][i]
 
-            
-            #Updating daily Index
-            previous_day = timeData - 86400         # defining previous day by Subtract 1 day 
-            if timeData in df_1d.index and df_1d.index.get_loc(timeData) > 1: 
-                # Check if previous day exists
-                while previous_day not in df_1d.index:  
-                    previous_day -= 86400
-
-            if previous_day in df_1d.index:
-                lastindextimeData1d.pop(0)
-                lastindextimeData1d.append(previous_day)
-            
 
             # Expiry for entry
             if self.humanTime.date() == currentExpiryDt.date():
@@ -115,9 +112,9 @@ class Break(optOverNightAlgoLogic):
             #Storing Daily High and Low
             if current_day != prev_day:
                 prev_day = current_day
-                if (lastindextimeData1d[1] in df_1d.index):
-                    daily_high = df_1d.at[lastindextimeData1d[1],'h'] 
-                    daily_low = df_1d.at[lastindextimeData1d[1],'l']
+                if pos1d >= 0:
+                    daily_high = high1d[pos1d]
+                    daily_low = low1d[pos1d]
                     last_breakout = {"CE": None, "PE": None}
                     daily_strategy_logger.info(f"Captured Daily High: {daily_high}\tDaily Low: {daily_low}")
                     
@@ -163,22 +160,23 @@ class Break(optOverNightAlgoLogic):
             if (self.humanTime.time() < time(9, 15)) or (self.humanTime.time() > time(15, 14)):
                 continue
 
-            if timeData-3600 in lastindextimeData1h:                        
+            if new1hBar[i] and pos1h >= 0:
                 
-                close_price = df_1h.at[lastindextimeData1h[1], 'c']
+                close_price = close1h[pos1h]
                 self.strategyLogger.info(f"Close Price at {self.humanTime}: {close_price}")
 
-            if daily_high and daily_low is not None: 
+            if daily_high and daily_low is not None and close_price is not None: 
 
                 #Bullish
                 if putTradeCounter < 1:
                     if close_price > daily_high and last_breakout["PE"] != daily_high:
-                        putSym = self.getPutSym(self.timeData, baseSym, df_1h.at[lastindextimeData1h[1], "c"],expiry=currentExpiry)
+                        putSym = self.getPutSym(self.timeData, baseSym, close1h[pos1h],expiry=currentExpiry)
                         
                         try:
                             data = self.fetchAndCacheFnoHistData(putSym, timeData)
                         except Exception as e:
                                 self.strategyLogger.info(e)
+                                retryEntry = True
                                 continue
                         
                         self.entryOrder(data['c'], putSym, lotSize, "SELL", {
@@ -194,7 +192,7 @@ class Break(optOverNightAlgoLogic):
                 #Bearish
                 if callTradeCounter < 1:
                     if close_price < daily_low and last_breakout["CE"] != daily_low:
-                        callSym = self.getCallSym(self.timeData, baseSym,df_1h.at[lastindextimeData1h[1], 'c'],expiry=currentExpiry)
+                        callSym = self.getCallSym(self.timeData, baseSym,close1h[pos1h],expiry=currentExpiry)
                         # lotSize = int(getExpiryData(self.timeData, baseSym)["LotSize"])
                         # expiryEpoch = self.getCurrentExpiryEpoch(self.timeData, baseSym)
 
@@ -202,6 +200,7 @@ class Break(optOverNightAlgoLogic):
                             data = self.fetchAndCacheFnoHistData(callSym, timeData)
                         except Exception as e:
                             self.strategyLogger.info(e)
+                            retryEntry = True
                             continue
                         self.entryOrder(data['c'], callSym, lotSize, "SELL",{
                             "Target": 0.7 * data['c'],
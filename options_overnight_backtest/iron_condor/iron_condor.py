@@ -1,6 +1,9 @@
 from backtestTools.util import calculateDailyReport, limitCapital, generateReportFile
 from backtestTools.algoLogic import optOverNightAlgoLogic
-from backtestTools.histData import getFnoBacktestData
+from backtestUtils.resample import getFnoBacktestData
+from backtestUtils.lookback import getFnoLookbackData
+from backtestUtils.positionBook import PositionBook
+from backtestUtils.eventClock import EventClock
 import numpy as np
 import talib as ta
 import pandas_ta as taa
@@ -13,13 +16,14 @@ class algoLogic(optOverNightAlgoLogic):
 
         col = ["Target", "Stoploss", "Expiry"]
         self.addColumnsToOpenPnlDf(col)
+        self.book = PositionBook(col, engine=self)
 
         startEpoch = startDate.timestamp()
         endEpoch = endDate.timestamp()
 
         try:
             df = getFnoBacktestData(indexSym, startEpoch, endEpoch, "1Min")
-            df_5min = getFnoBacktestData(indexSym, startEpoch-886400, endEpoch, "5Min")
+            df_5min = getFnoLookbackData(indexSym, startEpoch, endEpoch, "5Min", warmupBars=500)
         except Exception as e:
             self.strategyLogger.info(f"Data not found for {baseSym} in range {startDate} to {endDate}")
             raise Exception(e)
@@ -42,34 +46,27 @@ class algoLogic(optOverNightAlgoLogic):
         expiryEpoch= expiryDatetime.timestamp()
         lotSize = int(getExpiryData(self.timeData, baseSym)["LotSize"])
 
-        for timeData in df.index: 
+        # While flat only the 10:15 entry bar matters; the expiry roll happens on the first bar visited after expiry
+        clock = EventClock(df.index, time(9, 16), time(15, 25))
+        clock.addTimeOfDay(time(10, 15))
+
+        for timeData in clock.run(lambda: self.book.empty): 
 
             self.timeData = float(timeData)
             self.humanTime = datetime.fromtimestamp(timeData)
-            print(self.humanTime)
-
-            if (self.humanTime.time() < time(9, 16)) | (self.humanTime.time() > time(15, 30)):
-                continue
 
+            # The clock only stops inside 09:16-15:25, no per-bar time check needed
             lastIndexTimeData.pop(0)
             lastIndexTimeData.append(timeData-60)
             if (timeData-300) in df_5min.index:
                 last5MinIndexTimeData.pop(0)
                 last5MinIndexTimeData.append(timeData-300)
 
-            if (self.humanTime.time() < time(9, 16)) | (self.humanTime.time() > time(15, 25)):
-                continue
-
             if (timeData-300) in df_5min.index:
                 self.strategyLogger.info(f"Datetime: {self.humanTime}\tClose: {df.at[lastIndexTimeData[1],'c']}")
 
-            if not self.openPnl.empty:
-                for index, row in self.openPnl.iterrows():
-                    try:
-                        data = self.fetchAndCacheFnoHistData(row["Symbol"], lastIndexTimeData[1])
-                        self.openPnl.at[index, "CurrentPrice"] = data["c"]
-                    except Exception as e:
-                        self.strategyLogger.info(e)
+            if not self.book.empty:
+                self.book.refresh(lastIndexTimeData[1], self.fetchAndCacheFnoHistData, self.strategyLogger)
 
             self.pnlCalculator()
 
@@ -79,18 +76,14 @@ class algoLogic(optOverNightAlgoLogic):
                 expiryEpoch= expiryDatetime.timestamp()
                 entry= True
                 
-            if not self.openPnl.empty:
-                for index, row in self.openPnl.iterrows():
-
-                    if self.timeData >= row["Expiry"]:
-                        exitType = "Expiry Exit"
-                        self.exitOrder(index, exitType)
+            if not self.book.empty:
+                self.book.exit(self.book.expiryMask(self.timeData), self.timeData, "Expiry Exit")
 
             # tradecount = self.openPnl['Symbol'].str[-2:].value_counts()
             # callCounter= tradecount.get('CE',0)
             # putCounter= tradecount.get('PE',0)
 
-            if ((timeData-300) in df_5min.index) and self.openPnl.empty:
+            if ((timeData-300) in df_5min.index) and self.book.empty:
                 if entry == True and self.humanTime.time() == time(10, 15):    
                 
                     #Call Entry
@@ -101,7 +94,7 @@ class algoLogic(optOverNightAlgoLogic):
                     except Exception as e:
                         self.strategyLogger.info(e)
 
-                    self.entryOrder(data["c"], callSym, lotSize, "BUY", {"Expiry": expiryEpoch},)
+                    self.book.entry(self.timeData, data["c"], callSym, lotSize, "BUY", {"Expiry": expiryEpoch})
 
                     #callHedge Entry
                     callSym = self.getCallSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"],expiry= Currentexpiry, otmFactor=2)
@@ -111,7 +104,7 @@ class algoLogic(optOverNightAlgoLogic):
                     except Exception as e:
                         self.strategyLogger.info(e)
 
-                    self.entryOrder(data["c"], callSym, lotSize, "SELL", {"Expiry": expiryEpoch},)
+                    self.book.entry(self.timeData, data["c"], callSym, lotSize, "SELL", {"Expiry": expiryEpoch})
 
                     #Put Entry
                     putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"],expiry= Currentexpiry, otmFactor=4)
@@ -121,7 +114,7 @@ class algoLogic(optOverNightAlgoLogic):
                     except Exception as e:
                         self.strategyLogger.info(e)
 
-                    self.entryOrder(data["c"], putSym, lotSize, "BUY", {"Expiry": expiryEpoch},)
+                    self.book.entry(self.timeData, data["c"], putSym, lotSize, "BUY", {"Expiry": expiryEpoch})
 
                     #Put Hedge Entry
                     putSym = self.getPutSym(self.timeData, baseSym, df_5min.at[last5MinIndexTimeData[1], "c"],expiry= Currentexpiry,otmFactor=2)
@@ -131,7 +124,7 @@ class algoLogic(optOverNightAlgoLogic):
                     except Exception as e:
                         self.strategyLogger.info(e)
 
-                    self.entryOrder(data["c"], putSym, lotSize, "SELL", {"Expiry": expiryEpoch},)
+                    self.book.entry(self.timeData, data["c"], putSym, lotSize, "SELL", {"Expiry": expiryEpoch})
                     entry=False
 
         self.pnlCalculator()
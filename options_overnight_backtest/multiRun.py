@@ -0,0 +1,42 @@
+import os
+import importlib.util
+from datetime import datetime
+from backtestUtils.multiStrategy import MarketStream, runStrategies
+
+
+def loadStrategy(relPath):
+    # Each strategy lives in its own main.py, so load them by path under distinct module names
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), relPath)
+    name = relPath.replace("/", "_").replace(".py", "")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.algoLogic
+
+
+if __name__ == "__main__":
+    startTime = datetime.now()
+
+    devName = "Aniket"
+    version = "v1"
+
+    startDate = datetime(2024, 1, 1, 9, 15)
+    endDate = datetime(2024, 12, 31, 15, 30)
+
+    baseSym = "NIFTY"
+    indexName = "NIFTY 50"
+
+    # Strategies written on streamAlgoLogic, stepped together over one data stream
+    strategies = [
+        loadStrategy("butterfly/main.py")(devName, "Butterfly", version),
+        loadStrategy("batman/main.py")(devName, "Batman", version),
+    ]
+
+    stream = MarketStream(baseSym, indexName, startDate, endDate, intervals=("1Min", "5Min"), strikeBand=10)
+    closedPnls = runStrategies(strategies, stream)
+
+    for strategy, closedPnl in zip(strategies, closedPnls):
+        print(f"{strategy.fileDir['backtestResultsStrategyUid']}: {len(closedPnl)} trades, Pnl {closedPnl['Pnl'].sum() if not closedPnl.empty else 0}")
+
+    endTime = datetime.now()
+    print(f"Done. Ended in {endTime-startTime}")
@@ -1,7 +1,7 @@
 import pandas as pd
 from datetime import datetime, time
 from backtestTools.algoLogic import optOverNightAlgoLogic
-from backtestTools.histData import getFnoBacktestData
+from backtestUtils.resample import getFnoBacktestData
 from backtestTools.expiry import getExpiryData
 
 class algoLogic(optOverNightAlgoLogic):
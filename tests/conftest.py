@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+import pytest
+
+# backtestUtils is imported from the repo root, the same way the strategy scripts do (see cmd.md)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Naive datetimes are IST throughout, and the caches must never touch ~/backtestCache
+os.environ["TZ"] = "Asia/Kolkata"
+time.tzset()
+os.environ["BACKTEST_CACHE_ROOT"] = tempfile.mkdtemp(prefix="backtestCache")
+
+istOffset = 19800
+
+
+def sessionMinutes(startDate, days):
+    """1-min bar epochs of 09:15-15:29 IST on the weekdays from startDate on."""
+    minutes = []
+    day = pd.Timestamp(startDate).normalize()
+    while len(minutes) < days:
+        if day.weekday() < 5:
+            sessionOpen = int((day - pd.Timestamp("1970-01-01")).total_seconds()) - istOffset + 9 * 3600 + 15 * 60
+            minutes.append(sessionOpen + 60 * np.arange(375))
+        day += pd.Timedelta(days=1)
+    return np.concatenate(minutes).astype(np.int64)
+
+
+def candleFrame(index, seed=0, start=100.0):
+    """histData-shaped candles (o, h, l, c, v, oi, ti, datetime) on a random walk over index."""
+    rng = np.random.default_rng(seed)
+    c = start + np.cumsum(rng.normal(0, 1, len(index)))
+    o = np.concatenate([[start], c[:-1]])
+    df = pd.DataFrame({
+        "o": o,
+        "h": np.maximum(o, c) + rng.uniform(0, 1, len(index)),
+        "l": np.minimum(o, c) - rng.uniform(0, 1, len(index)),
+        "c": c,
+        "v": rng.integers(1, 1000, len(index)).astype(np.float64),
+        "oi": rng.integers(1, 1000, len(index)).astype(np.float64),
+        "ti": index,
+    }, index=index)
+    df["datetime"] = pd.to_datetime(index + istOffset, unit="s")
+    return df
+
+
+@pytest.fixture
+def minuteCandles():
+    def make(startDate="2024-01-01", days=5, seed=0, start=100.0):
+        return candleFrame(sessionMinutes(startDate, days), seed, start)
+    return make
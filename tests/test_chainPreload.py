@@ -0,0 +1,76 @@
+from datetime import datetime
+import numpy as np
+import pytest
+
+histData = pytest.importorskip("backtestTools.histData")
+
+from conftest import candleFrame, sessionMinutes
+from backtestUtils import histStore
+from backtestUtils.chainPreload import ChainBlock, sides
+
+strikes = np.arange(21000, 21301, 50)
+
+
+@pytest.fixture
+def source(monkeypatch, tmp_path):
+    minutes = sessionMinutes("2024-01-29", 4)
+    frames = {}
+    for strikeIdx, strike in enumerate(strikes):
+        for sideIdx, side in enumerate(sides):
+            if (strikeIdx, sideIdx) == (3, 1):
+                continue  # a strike that never traded
+            df = candleFrame(minutes, seed=strikeIdx * 2 + sideIdx, start=100.0 + strikeIdx)
+            # Thinly traded contracts miss bars
+            frames[f"CHAINTEST01FEB24{strike}{side}"] = df.iloc[::strikeIdx + 1]
+    fetched = []
+
+    def fetch(symbol, startEpoch, endEpoch, interval):
+        fetched.append(symbol)
+        if symbol not in frames:
+            return None
+        df = frames[symbol]
+        return df[(df.index >= startEpoch) & (df.index <= endEpoch)]
+
+    monkeypatch.setattr(histData, "getFnoBacktestData", fetch)
+    monkeypatch.setattr(histStore, "storeRoot", str(tmp_path))
+    return minutes, fetch, fetched
+
+
+def perSymbolLookup(fetch, block, startEpoch, endEpoch):
+    # The loader ChainBlock.load replaced: one read per contract, a dict lookup per minute
+    out = {}
+    for strikeIdx in range(len(block.strikes)):
+        for sideIdx in range(len(sides)):
+            df = fetch(block.symbol(strikeIdx, sideIdx), startEpoch, endEpoch, "1Min")
+            rows = {} if df is None else {ti: tuple(row) for ti, row in zip(df.index, df[list("ohlc")].values)}
+            out[strikeIdx, sideIdx] = [rows.get(minute) for minute in block.minutes]
+    return out
+
+
+def assertBlockMatches(block, expected):
+    for (strikeIdx, sideIdx), rows in expected.items():
+        for minute, row in zip(block.minutes, rows):
+            data = block.lookup(strikeIdx, sideIdx, minute)
+            assert (None if data is None else tuple(data[col] for col in "ohlc")) == row
+
+
+def test_bulk_load_matches_per_symbol_reads(source):
+    minutes, fetch, fetched = source
+    block = ChainBlock("CHAINTEST", "01FEB24", strikes, minutes[100:1200])
+    block.load(minutes[100], minutes[1199])
+    assert len(fetched) == len(strikes) * len(sides)
+    assertBlockMatches(block, perSymbolLookup(fetch, block, minutes[100], minutes[1199]))
+
+
+def test_stored_contracts_are_read_locally(source):
+    minutes, fetch, fetched = source
+    stored = [f"CHAINTEST01FEB24{strike}CE" for strike in strikes[:3]]
+    histStore.importSymbols(stored, datetime(2024, 1, 1), datetime(2024, 2, 29))
+    fetched.clear()
+
+    block = ChainBlock("CHAINTEST", "01FEB24", strikes, minutes)
+    block.load(minutes[0], minutes[-1])
+    # Only the contracts missing from the store went to histData
+    assert sorted(fetched) == sorted(block.symbol(k, s) for k in range(len(strikes)) for s in range(len(sides))
+                                     if block.symbol(k, s) not in stored)
+    assertBlockMatches(block, perSymbolLookup(fetch, block, minutes[0], minutes[-1]))
@@ -0,0 +1,119 @@
+from datetime import datetime
+import numpy as np
+import pytest
+
+histData = pytest.importorskip("backtestTools.histData")
+
+from conftest import candleFrame, sessionMinutes
+from backtestUtils import continuousFutures, expiryCalendar, histCache
+from backtestUtils.continuousFutures import ContinuousFutures, getContinuousFutures
+from backtestUtils.tradingCalendar import nseCalendar
+
+expiries = ["25JAN24", "29FEB24", "28MAR24", "25APR24"]
+startDate, endDate = datetime(2024, 1, 15, 9, 15), datetime(2024, 3, 8, 15, 29)
+
+
+def monthlyExpiry(date, baseSym):
+    # Near-month future, the front one until the end of its expiry day
+    if not isinstance(date, datetime):
+        date = datetime.fromtimestamp(date)
+    for expiry in expiries:
+        if datetime.strptime(expiry, "%d%b%y").date() >= date.date():
+            return {"CurrentExpiry": expiry, "CurrentFutureExpiry": expiry, "LotSize": 25}
+
+
+@pytest.fixture
+def source(monkeypatch, tmp_path):
+    minutes = sessionMinutes("2024-01-15", 40)
+    frames = {"FUTTEST INDEX": candleFrame(minutes, seed=0, start=21000.0)}
+    for n, expiry in enumerate(expiries):
+        df = candleFrame(minutes, seed=n + 1, start=21000.0 + 100 * (n + 1))
+        # Thin trading in the far month, so contracts have gaps the index does not
+        frames[f"FUTTEST{expiry}"] = df.iloc[::2] if n == 2 else df
+    fetched = []
+
+    def fetch(symbol, startEpoch, endEpoch, interval):
+        fetched.append(symbol)
+        df = frames[symbol]
+        return df[(df.index >= startEpoch) & (df.index <= endEpoch)]
+
+    monkeypatch.setattr(histData, "getFnoBacktestData", fetch)
+    monkeypatch.setattr(expiryCalendar, "fetchExpiryData", monthlyExpiry)
+    monkeypatch.setattr(expiryCalendar, "calendars", {})
+    monkeypatch.setattr(histCache, "histCache", histCache.HistCache(path=str(tmp_path / "hist")))
+    monkeypatch.setattr(continuousFutures, "cacheRoot", str(tmp_path))
+    return frames, fetched
+
+
+def stitched(frames, front):
+    # The per-minute loop: ask which contract is front, take its bar if it has one.
+    # Both rules roll between days, so front is asked once a day.
+    index = frames["FUTTEST INDEX"]
+    index = index[(index.index >= startDate.timestamp()) & (index.index <= endDate.timestamp())]
+    bars = {expiry: frames[f"FUTTEST{expiry}"][list("ohlc")].reindex(index.index).values for expiry in expiries}
+    fronts, rows = {}, []
+    for n, minute in enumerate(index.index):
+        day = (minute + 19800) // 86400
+        if day not in fronts:
+            fronts[day] = front(minute)
+        rows.append(bars[fronts[day]][n])
+    return index.index.values, np.array(rows, dtype=np.float64)
+
+
+def daysBeforeFront(rollDays):
+    # Front until the open of the rollDays-th trading day before its expiry day
+    def front(minute):
+        day = (minute + 19800) // 86400
+        for expiry in expiries:
+            expiryDay = int(datetime.strptime(expiry, "%d%b%y").timestamp() + 19800) // 86400
+            tradingDays = [d for d in range(expiryDay - 20, expiryDay) if nseCalendar.isTradingDay(d)]
+            if day < tradingDays[-rollDays]:
+                return expiry
+    return front
+
+
+@pytest.mark.parametrize("roll, rollDays, front", [
+    ("expiry", 1, lambda minute: monthlyExpiry(minute, "FUTTEST")["CurrentFutureExpiry"]),
+    ("daysBefore", 1, daysBeforeFront(1)),
+    ("daysBefore", 3, daysBeforeFront(3)),
+])
+def test_matches_per_minute_stitching(source, roll, rollDays, front):
+    frames, _ = source
+    df = ContinuousFutures("FUTTEST", "FUTTEST INDEX", roll, rollDays).build(startDate, endDate)
+    minutes, expected = stitched(frames, front)
+    assert (df.index.values == minutes).all()
+    np.testing.assert_array_equal(df[list("ohlc")].values, expected)
+    assert list(df["symbol"].cat.categories) == [f"FUTTEST{expiry}" for expiry in expiries]
+
+
+@pytest.mark.parametrize("adjust", ["difference", "ratio"])
+def test_back_adjustment_collects_every_later_gap(source, adjust):
+    frames, _ = source
+    raw = ContinuousFutures("FUTTEST", "FUTTEST INDEX").build(startDate, endDate)
+    adjusted = ContinuousFutures("FUTTEST", "FUTTEST INDEX", adjust=adjust).build(startDate, endDate)
+
+    # Gap on the last minute before each roll that both contracts traded
+    gaps = []
+    for k in range(raw["contract"].max()):
+        front, nxt = frames[f"FUTTEST{expiries[k]}"], frames[f"FUTTEST{expiries[k + 1]}"]
+        both = front.index[(front.index < raw.index[raw["contract"] == k + 1][0]) & front.index.isin(nxt.index)]
+        gaps.append((front.loc[both[-1], "c"], nxt.loc[both[-1], "c"]))
+
+    for k in range(len(gaps) + 1):
+        rows = raw["contract"].values == k
+        later = gaps[k:]
+        if adjust == "difference":
+            shift = sum(nxt - front for front, nxt in later)
+            np.testing.assert_allclose(adjusted[list("ohlc")].values[rows], raw[list("ohlc")].values[rows] + shift)
+        else:
+            scale = np.prod([nxt / front for front, nxt in later])
+            np.testing.assert_allclose(adjusted[list("ohlc")].values[rows], raw[list("ohlc")].values[rows] * scale)
+
+
+def test_built_series_is_read_back_from_disk(source):
+    frames, fetched = source
+    built = getContinuousFutures("FUTTEST", "FUTTEST INDEX", startDate, endDate, roll="oi")
+    fetched.clear()
+    loaded = getContinuousFutures("FUTTEST", "FUTTEST INDEX", startDate, endDate, roll="oi")
+    assert fetched == []
+    assert loaded.equals(built) and loaded.attrs == built.attrs
@@ -0,0 +1,54 @@
+from datetime import datetime, time
+from backtestUtils.eventClock import EventClock, minuteOfDay
+
+
+def runToy(bars, state):
+    """Enter at 10:15, exit 30 bars later or at 15:15; returns the trades and the bars visited."""
+    trades = []
+    visited = []
+    for timeData in bars:
+        visited.append(timeData)
+        now = datetime.fromtimestamp(timeData).time()
+        if state["open"] is not None and (timeData - state["open"] >= 30 * 60 or now == time(15, 15)):
+            trades.append((state["open"], timeData))
+            state["open"] = None
+        if state["open"] is None and now == time(10, 15):
+            state["open"] = timeData
+    return trades, visited
+
+
+def test_clock_matches_minute_loop(minuteCandles):
+    minutes = minuteCandles(days=5).index.values
+
+    # The loop the clock replaces: every bar, with the 09:16-15:25 check inside
+    session = (minuteOfDay(minutes) >= 9 * 60 + 16) & (minuteOfDay(minutes) <= 15 * 60 + 25)
+    expected, loopVisited = runToy(minutes[session], {"open": None})
+
+    clock = EventClock(minutes, time(9, 16), time(15, 25))
+    clock.addTimeOfDay(time(10, 15))
+    clock.addTimeOfDay(time(15, 15))
+    state = {"open": None}
+    trades, visited = runToy(clock.run(lambda: state["open"] is None), state)
+
+    assert trades == expected and len(trades) == 5
+    # Each day costs the 10:15 and 15:15 events plus the minutes a position is held
+    assert len(visited) == 5 * (30 + 1 + 1)
+    assert len(visited) < len(loopVisited) / 10
+
+
+def test_pos_tracks_the_yielded_bar(minuteCandles):
+    minutes = minuteCandles(days=2).index.values
+    clock = EventClock(minutes, time(9, 16), time(15, 25))
+    clock.addTimeOfDay(time(12, 0))
+    for timeData in clock.run(lambda: False):
+        assert minutes[clock.pos] == timeData
+
+
+def test_signal_bars_complete_one_interval_later(minuteCandles):
+    minutes = minuteCandles(days=1).index.values
+    clock = EventClock(minutes)
+    clock.addSignalBars(minutes[::5], 300)
+    visited = list(clock.run(lambda: True))
+    # Every 5-min bar is tradable on the minute it closes, the day's last one never is
+    assert visited == list(minutes[5::5])
+    assert clock.eventCount() == len(visited)
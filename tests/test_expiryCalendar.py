@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+
+pytest.importorskip("backtestTools")
+
+from backtestUtils import expiryCalendar
+
+
+def weeklyExpiry(date, baseSym):
+    # Thursday expiries, rolling on the expiry day itself after 15:30
+    if not isinstance(date, datetime):
+        date = datetime.fromtimestamp(date)
+    expiry = date + timedelta(days=(3 - date.weekday()) % 7)
+    if expiry.date() == date.date() and date.hour * 60 + date.minute > 15 * 60 + 30:
+        expiry += timedelta(days=7)
+    return {"CurrentExpiry": expiry.strftime("%d%b%y").upper(), "LotSize": 75 if date < datetime(2024, 1, 20) else 25}
+
+
+@pytest.fixture
+def calendarSource(monkeypatch):
+    calls = []
+
+    def fetch(date, baseSym):
+        calls.append(date)
+        return weeklyExpiry(date, baseSym)
+
+    monkeypatch.setattr(expiryCalendar, "fetchExpiryData", fetch)
+    monkeypatch.setattr(expiryCalendar, "calendars", {})
+    return calls
+
+
+def test_matches_getExpiryData_through_the_session(calendarSource):
+    start = datetime(2024, 1, 1, 9, 15)
+    for n in range(0, 40 * 24 * 60, 37):
+        date = start + timedelta(minutes=n)
+        if not (9 * 60 + 15 <= date.hour * 60 + date.minute <= 15 * 60 + 30):
+            continue
+        assert expiryCalendar.getExpiryData(date, "CALTEST") == weeklyExpiry(date, "CALTEST")
+    # Each day is asked once, in a few extendDays chunks, not once per lookup
+    assert len(calendarSource) < 120
+
+
+def test_vectorized_lookups(calendarSource):
+    calendar = expiryCalendar.ExpiryCalendar("CALVEC")
+    calendar.load(datetime(2024, 1, 1), datetime(2024, 2, 1))
+    epochs = np.array([datetime(2024, 1, d, 10).timestamp() for d in range(1, 31)])
+    expected = [weeklyExpiry(epoch, "CALVEC") for epoch in epochs]
+    assert list(calendar.lookup(epochs)) == [row["CurrentExpiry"] for row in expected]
+    assert list(calendar.lotSizes(epochs)) == [row["LotSize"] for row in expected]
+    assert calendar.expiries(datetime(2024, 1, 1), datetime(2024, 1, 31))[:2] == ["04JAN24", "11JAN24"]
+
+    # The pickled table comes back with the same values and types
+    reloaded = expiryCalendar.ExpiryCalendar("CALVEC")
+    assert reloaded.getExpiryData(epochs[3]) == expected[3]
+
+
+def test_failed_day_is_answered_live(monkeypatch, calendarSource):
+    failing = {datetime(2024, 1, 12).date()}
+
+    def flaky(date, baseSym):
+        day = (date if isinstance(date, datetime) else datetime.fromtimestamp(date)).date()
+        if day in failing:
+            raise ConnectionError("expiry service down")
+        return weeklyExpiry(date, baseSym)
+
+    monkeypatch.setattr(expiryCalendar, "fetchExpiryData", flaky)
+    calendar = expiryCalendar.ExpiryCalendar("CALFAIL")
+    calendar.load(datetime(2024, 1, 8), datetime(2024, 1, 16))
+    assert calendar.missing.sum() == 1
+
+    # Once the service is back the missing day gets its own answer, not the 11 Jan expiry day's
+    failing.clear()
+    day = datetime(2024, 1, 12, 10)
+    assert weeklyExpiry(day, "CALFAIL") != weeklyExpiry(datetime(2024, 1, 11, 9, 15), "CALFAIL")
+    assert calendar.getExpiryData(day) == weeklyExpiry(day, "CALFAIL")
+    assert calendar.lookup([day.timestamp()])[0] == weeklyExpiry(day, "CALFAIL")["CurrentExpiry"]
+    # Missing rows are not persisted
+    assert datetime(2024, 1, 12).date() not in {
+        datetime.fromtimestamp(d * 86400 - 19800).date() for d in expiryCalendar.ExpiryCalendar("CALFAIL").days}
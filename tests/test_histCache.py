@@ -0,0 +1,89 @@
+import os
+import threading
+import numpy as np
+import pytest
+
+histData = pytest.importorskip("backtestTools.histData")
+
+from backtestUtils.histCache import HistCache, missingRanges, mergeRanges
+
+
+@pytest.fixture
+def source(monkeypatch, minuteCandles):
+    frames = {sym: minuteCandles("2024-01-01", days=15, seed=n) for n, sym in enumerate(("A", "B", "C"))}
+    calls = []
+
+    def fetch(symbol, startEpoch, endEpoch, interval):
+        calls.append((symbol, startEpoch, endEpoch))
+        df = frames[symbol]
+        return df[(df.index >= startEpoch) & (df.index <= endEpoch)].copy()
+
+    monkeypatch.setattr(histData, "getFnoBacktestData", fetch)
+    return frames, calls, fetch
+
+
+def test_ranges():
+    assert mergeRanges([(5, 9), (0, 3), (4, 4), (20, 30)]) == [(0, 9), (20, 30)]
+    assert missingRanges([(0, 9), (20, 30)], 5, 25) == [(10, 19)]
+    assert missingRanges([], 5, 25) == [(5, 25)]
+
+
+def test_answers_match_source_from_threads(tmp_path, source):
+    frames, calls, fetch = source
+    cache = HistCache(path=str(tmp_path))
+    cache.compactAfter = 4
+    rng = np.random.default_rng(0)
+    minutes = frames["A"].index.values
+    queries = [(sym, int(a), int(a) + int(rng.integers(60, 3 * 86400)))
+               for sym, a in zip(rng.choice(list(frames), 160), rng.choice(minutes, 160))]
+    failures = []
+
+    def work(chunk):
+        for sym, start, end in chunk:
+            if not cache.get("fno", sym, start, end, "1Min").equals(fetch(sym, start, end, "1Min")):
+                failures.append((sym, start, end))
+
+    threads = [threading.Thread(target=work, args=(queries[n::8],)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert failures == []
+    assert cache.stats["memoryHits"] + cache.stats["partialHits"] > 0
+
+    # A fresh cache answers from the files alone
+    fresh = HistCache(path=str(tmp_path))
+    calls.clear()
+    for sym, start, end in queries[:20]:
+        fresh.get("fno", sym, start, end, "1Min")
+    assert calls == [] and fresh.stats["diskHits"] == len({sym for sym, _, _ in queries[:20]})
+
+
+def test_misses_only_fetch_and_append_new_ranges(tmp_path, source):
+    frames, calls, _ = source
+    cache = HistCache(path=str(tmp_path))
+    minutes = frames["A"].index.values
+    cache.get("fno", "A", minutes[0], minutes[999], "1Min")
+    size = os.path.getsize(cache._file(("fno", "A", "1Min")))
+    cache.get("fno", "A", minutes[500], minutes[1499], "1Min")
+    assert calls[-1] == ("A", int(minutes[999]) + 1, int(minutes[1499]))
+    # The second write appends the 500 new bars, it does not rewrite the first 1000
+    grown = os.path.getsize(cache._file(("fno", "A", "1Min"))) - size
+    assert 0 < grown < size
+
+
+def test_truncated_append_is_dropped(tmp_path, source):
+    frames, calls, fetch = source
+    minutes = frames["B"].index.values
+    cache = HistCache(path=str(tmp_path))
+    cache.get("fno", "B", minutes[0], minutes[99], "1Min")
+    cache.get("fno", "B", minutes[200], minutes[299], "1Min")
+    diskFile = cache._file(("fno", "B", "1Min"))
+    with open(diskFile, "r+b") as f:
+        f.truncate(os.path.getsize(diskFile) - 10)
+
+    fresh = HistCache(path=str(tmp_path))
+    calls.clear()
+    assert fresh.get("fno", "B", minutes[0], minutes[299], "1Min").equals(fetch("B", minutes[0], minutes[299], "1Min"))
+    # The first record survived, the cut one is fetched again
+    assert calls[0][1] > minutes[99]
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime
+
+histData = pytest.importorskip("backtestTools.histData")
+
+from backtestUtils import histStore
+
+
+@pytest.fixture
+def source(monkeypatch, minuteCandles):
+    frames = {"STORETEST": minuteCandles("2024-01-25", days=10, seed=3)}
+
+    def fetch(symbol, startEpoch, endEpoch, interval):
+        df = frames[symbol]
+        return df[(df.index >= startEpoch) & (df.index <= endEpoch)].copy()
+
+    monkeypatch.setattr(histData, "getFnoBacktestData", fetch)
+    return frames
+
+
+def test_store_reads_what_histData_returned(source):
+    histStore.importSymbols(["STORETEST"], datetime(2024, 1, 1), datetime(2024, 2, 29))
+    df = source["STORETEST"]
+
+    # Inside one month, across the month end, and the whole range
+    for start, end in ((df.index[10], df.index[300]), (df.index[1000], df.index[-500]), (df.index[0], df.index[-1])):
+        expected = df[(df.index >= start) & (df.index <= end)]
+        got = histStore.getFnoBacktestData("STORETEST", start, end, "1Min")
+        assert list(got.columns) == list(expected.columns)
+        np.testing.assert_array_equal(got.index.values, expected.index.values)
+        np.testing.assert_array_equal(got[["o", "h", "l", "c", "v", "oi", "ti"]].values,
+                                      expected[["o", "h", "l", "c", "v", "oi", "ti"]].values)
+        assert (got["datetime"].values == expected["datetime"].values).all()
+
+
+def test_writes_to_a_read_frame_stay_private(source):
+    histStore.importSymbols(["STORETEST"], datetime(2024, 1, 1), datetime(2024, 2, 29))
+    start, end = source["STORETEST"].index[[0, 100]]
+    df = histStore.getFnoBacktestData("STORETEST", start, end, "1Min")
+    df.loc[df.index[0], "c"] = -1
+    assert histStore.getFnoBacktestData("STORETEST", start, end, "1Min")["c"].iloc[0] != -1
+
+
+def test_non_numeric_columns_are_refused():
+    store = histStore.SymbolStore("fno", "STOREBAD", "1Min")
+    df = pd.DataFrame({"c": [1.0], "symbol": ["X"]}, index=[1704080700])
+    with pytest.raises(ValueError):
+        store.writeMonth(histStore.monthOf(1704080700), df)
+    assert not store.exists
@@ -0,0 +1,55 @@
+from datetime import datetime
+import numpy as np
+import pytest
+
+pytest.importorskip("backtestTools")
+
+from conftest import candleFrame
+from backtestUtils.lookback import fetchLookback
+from backtestUtils.resample import resampleBars
+from backtestUtils.tradingCalendar import nseCalendar
+
+startEpoch = int(datetime(2024, 1, 23, 9, 15).timestamp())
+endEpoch = int(datetime(2024, 1, 25, 15, 29).timestamp())
+
+
+@pytest.fixture
+def source():
+    epochs = np.arange(int(datetime(2023, 6, 1).timestamp()), endEpoch + 60, 60, dtype=np.int64)
+    oneMinute = candleFrame(epochs[nseCalendar.sessionMask(epochs)], seed=5)
+    calls = []
+
+    def fetch(symbol, fetchStart, fetchEnd, interval, dropDays=()):
+        calls.append((fetchStart, fetchEnd))
+        df = oneMinute if interval == "1Min" else resampleBars(oneMinute, interval)
+        days = (df.index.values + 19800) // 86400
+        return df[(df.index >= fetchStart) & (df.index <= fetchEnd) & ~np.isin(days, dropDays)]
+
+    return fetch, calls
+
+
+@pytest.mark.parametrize("interval", ["1Min", "5Min", "1H", "1D"])
+@pytest.mark.parametrize("warmupBars", [1, 30, 120])
+def test_exact_warmup_in_one_query(source, interval, warmupBars):
+    fetch, calls = source
+    df = fetchLookback(fetch, "NIFTY", startEpoch, endEpoch, interval, warmupBars)
+    assert len(calls) == 1
+    everything = fetch("NIFTY", 0, endEpoch, interval)
+    # The last warmupBars bars before the start, then the backtest range itself
+    before = everything[everything.index < startEpoch]
+    if interval == "1D":
+        before = before.iloc[:-1] if before.index[-1] + 86400 > startEpoch else before
+    expected = everything.loc[before.index[-warmupBars]:]
+    assert df.equals(expected)
+    assert df.attrs["warmupBars"] == warmupBars
+
+
+def test_missing_day_is_read_again_further_back(source):
+    fetch, calls = source
+    # The 2024-01-20 Saturday session is absent from the data though the calendar expects it
+    dropDays = [(int(datetime(2024, 1, 20).timestamp()) + 19800) // 86400]
+    df = fetchLookback(fetch, "NIFTY", startEpoch, endEpoch, "5Min", 100, dropDays=dropDays)
+    assert df.attrs["warmupBars"] == 100
+    assert (df.index < startEpoch).sum() == 100
+    # One more read, of the 75 bars ahead of what the first one got
+    assert calls[1:] == [(int(datetime(2024, 1, 18, 13, 25).timestamp()), int(datetime(2024, 1, 19, 13, 24, 59).timestamp()))]
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("backtestTools")
+
+from backtestTools.algoLogic import optOverNightAlgoLogic
+from backtestUtils import optionCache
+from backtestUtils.optionCache import OptionCache, budgetOptOverNightAlgoLogic
+
+symbols = ["NIFTY04JAN2421500CE", "NIFTY04JAN2421500PE", "NIFTY11JAN2421500CE", "NIFTY11JAN2421600PE"]
+
+
+@pytest.fixture
+def source(monkeypatch, minuteCandles):
+    # Prices off the 0.05 tick, so any rounding or float32 storage would show
+    frames = {sym: minuteCandles("2024-01-01", days=9, seed=n, start=100 / 3) for n, sym in enumerate(symbols)}
+    calls = []
+
+    def fetch(symbol, startEpoch, endEpoch, interval):
+        calls.append(symbol)
+        df = frames[symbol]
+        return df[(df.index >= startEpoch) & (df.index <= endEpoch)]
+
+    monkeypatch.setattr(optionCache, "getFnoBacktestData", fetch)
+    return frames, calls
+
+
+def test_rows_match_source_exactly(source):
+    frames, calls = source
+    cache = OptionCache()
+    for timestamp in frames[symbols[0]].index[::7]:
+        for sym in symbols:
+            if timestamp > optionCache.instruments.expiryEpoch[optionCache.instruments.idOf(sym)] + 600:
+                continue
+            row = frames[sym].loc[timestamp]
+            data = cache.get(sym, float(timestamp))
+            assert [data[col] for col in "ohlc"] == [row[col] for col in "ohlc"]
+            assert (data["v"], data["oi"]) == (int(row["v"]), int(row["oi"]))
+    assert sorted(calls) == sorted(symbols)
+
+
+def test_expired_contracts_go_first(source):
+    frames, calls = source
+    minutes = frames[symbols[0]].index
+    cache = OptionCache()
+    for sym in symbols[:3]:
+        cache.get(sym, float(minutes[0]))
+    # The next load after 04JAN expiry drops both 04JAN contracts, whatever their recency
+    cache.get(symbols[0], float(minutes[0]))
+    cache.get(symbols[3], float(minutes[-1]))
+    assert cache.stats["expiredDrops"] == 2
+    assert list(cache.contracts) == [optionCache.instruments.idOf(sym) for sym in symbols[2:]]
+
+
+def test_budget_evicts_least_recent(source):
+    frames, calls = source
+    timestamp = float(frames[symbols[0]].index[10])
+    cache = OptionCache(budgetBytes=1)
+    for sym in symbols:
+        cache.get(sym, timestamp)
+    assert list(cache.contracts) == [optionCache.instruments.idOf(symbols[-1])]
+    assert cache.stats["lruEvictions"] == 3
+    cache.get(symbols[0], timestamp)
+    assert calls == symbols + symbols[:1]
+
+
+def test_extra_arguments_go_to_the_engine(monkeypatch, source):
+    frames, calls = source
+    forwarded = []
+    monkeypatch.setattr(optOverNightAlgoLogic, "fetchAndCacheFnoHistData",
+                        lambda self, *args, **kwargs: forwarded.append((args, kwargs)))
+    algo = budgetOptOverNightAlgoLogic.__new__(budgetOptOverNightAlgoLogic)
+    timestamp = frames[symbols[2]].index[100]
+
+    assert algo.fetchAndCacheFnoHistData(symbols[2], timestamp)["c"] == frames[symbols[2]].loc[timestamp, "c"]
+    algo.fetchAndCacheFnoHistData(symbols[2], timestamp, maxCacheSize=50)
+    algo.fetchAndCacheFnoHistData(symbols[2], timestamp, 50)
+    assert forwarded == [((symbols[2], timestamp), {"maxCacheSize": 50}), ((symbols[2], timestamp, 50), {})]
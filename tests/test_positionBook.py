@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("backtestTools")
+
+from backtestUtils.positionBook import PositionBook, fetchLegs
+
+symbols = ["NIFTY11JAN2421500CE", "NIFTY11JAN2421500PE", "NIFTY11JAN2421600CE", "NIFTY11JAN2421400PE"]
+
+
+def iterrowsExits(openPnl, prices, timeData):
+    """The per-row loop PositionBook replaced: refresh, then Target, Stoploss, Expiry in that order."""
+    closed = []
+    for index, row in openPnl.iterrows():
+        openPnl.at[index, "CurrentPrice"] = prices[row["Symbol"]]
+    for index, row in openPnl.iterrows():
+        buy = row["PositionStatus"] == 1
+        if (row["CurrentPrice"] >= row["Target"]) if buy else (row["CurrentPrice"] <= row["Target"]):
+            exitType = "TargetHit"
+        elif (row["CurrentPrice"] <= row["Stoploss"]) if buy else (row["CurrentPrice"] >= row["Stoploss"]):
+            exitType = "StoplossHit"
+        elif timeData >= row["Expiry"]:
+            exitType = "ExpiryExit"
+        else:
+            continue
+        pnl = (row["CurrentPrice"] - row["EntryPrice"]) * row["Quantity"] * row["PositionStatus"]
+        closed.append((row["Symbol"], timeData, row["CurrentPrice"], exitType, pnl))
+        openPnl.drop(index, inplace=True)
+    return closed
+
+
+def test_exits_match_iterrows_loop():
+    rng = np.random.default_rng(7)
+    times = 1704425400 + 60 * np.arange(300)
+    paths = {sym: 100 + np.cumsum(rng.normal(0, 2, len(times))) for sym in symbols}
+
+    book = PositionBook(["Target", "Stoploss", "Expiry"])
+    openPnl = pd.DataFrame(columns=["Symbol", "EntryPrice", "CurrentPrice", "Quantity", "PositionStatus", "Target", "Stoploss", "Expiry"])
+    expected = []
+    for t, timeData in enumerate(times):
+        prices = {sym: paths[sym][t] for sym in symbols}
+        expected += iterrowsExits(openPnl, prices, timeData)
+        book.refresh(timeData, lambda sym, _: {"c": prices[sym]})
+        book.checkExits(timeData)
+
+        if t % 25 == 0:
+            for n, sym in enumerate(symbols):
+                side = "BUY" if n % 2 else "SELL"
+                price = prices[sym]
+                levels = {"Target": price * (1.2 if side == "BUY" else 0.8),
+                          "Stoploss": price * (0.9 if side == "BUY" else 1.1),
+                          "Expiry": float(times[0] + 60 * 250)}
+                book.entry(timeData, price, sym, 50, side, levels)
+                openPnl.loc[len(openPnl) + len(expected) + 1000 * t + n] = [
+                    sym, price, price, 50, 1 if side == "BUY" else -1, levels["Target"], levels["Stoploss"], levels["Expiry"]]
+
+    closed = book.closedPnlDf()
+    expected = pd.DataFrame(expected, columns=["Symbol", "ExitTime", "ExitPrice", "ExitType", "Pnl"])
+    assert len(expected) > 20 and set(expected["ExitType"]) == {"TargetHit", "StoplossHit", "ExpiryExit"}
+
+    key = ["ExitTime", "Symbol", "ExitPrice"]
+    expected = expected.sort_values(key).reset_index(drop=True)
+    closed = closed.assign(ExitTime=[ts.to_pydatetime().timestamp() for ts in closed["ExitTime"]]).sort_values(key).reset_index(drop=True)
+    assert closed["Symbol"].tolist() == expected["Symbol"].tolist()
+    assert closed["ExitType"].tolist() == expected["ExitType"].tolist()
+    np.testing.assert_allclose(closed["ExitTime"], expected["ExitTime"].astype(float))
+    np.testing.assert_allclose(closed["Pnl"], expected["Pnl"].astype(float))
+    assert len(book.openIdx()) == len(openPnl)
+
+
+def test_book_grows_past_capacity():
+    book = PositionBook(["Expiry", "time"], capacity=2)
+    for n in range(5):
+        book.entry(1704425400 + n, 100 + n, symbols[n % 4], 50, "SELL", {"Expiry": 1704450000.0, "time": n})
+    assert book.size == 5 and len(book.openIdx()) == 5
+    assert list(book.extras["time"][:5]) == [0, 1, 2, 3, 4]
+    book.exitAll(1704430000, "TimeUp")
+    assert book.empty
+
+
+def test_fetchLegs_is_all_or_nothing():
+    prices = {symbols[0]: {"c": 10.0}, symbols[1]: {"c": 12.0}}
+
+    def fetch(symbol, timestamp):
+        return prices[symbol]
+
+    assert fetchLegs(fetch, symbols[:2], 0) == [{"c": 10.0}, {"c": 12.0}]
+    # A KeyError on the third leg, as a failed fetch would raise
+    assert fetchLegs(fetch, symbols[:3], 0) is None
+    assert fetchLegs(lambda symbol, timestamp: None, symbols[:1], 0) is None
@@ -0,0 +1,198 @@
+import os
+import importlib.util
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import candleFrame, sessionMinutes
+
+# Intraday_Backtest/Renko is a script folder, not a package; load its indicators module by path
+spec = importlib.util.spec_from_file_location(
+    "renkoIndicators", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    "Intraday_Backtest", "Renko", "indicators.py"))
+indicators = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(indicators)
+
+
+@pytest.fixture
+def minutes():
+    df = candleFrame(sessionMinutes("2024-01-01", 10), seed=4, start=21500.0)
+    return df.rename(columns={"o": "open", "h": "high", "l": "low", "c": "close", "datetime": "date"})
+
+
+def renkoLoop(df, brick_size):
+    # The row-by-row period_close_bricks loop extend_bricks replaced
+    close_p1 = df["close"].iloc[0] // brick_size * brick_size
+    rows = [(df["date"].iloc[1], close_p1 - brick_size, close_p1, close_p1 - brick_size, close_p1, True)]
+    uptrend = True
+    for date, close in zip(df["date"], df["close"]):
+        bricks = int((close - close_p1) / brick_size)
+        if uptrend and bricks <= -2 or not uptrend and bricks >= 2:
+            uptrend = not uptrend
+            bricks += 1 if bricks < 0 else -1
+            close_p1 += brick_size if uptrend else -brick_size
+        elif not (uptrend and bricks >= 1 or not uptrend and bricks <= -1):
+            continue
+        for _ in range(abs(bricks)):
+            if uptrend:
+                rows.append((date, close_p1, close_p1 + brick_size, close_p1, close_p1 + brick_size, uptrend))
+                close_p1 += brick_size
+            else:
+                rows.append((date, close_p1, close_p1, close_p1 - brick_size, close_p1 - brick_size, uptrend))
+                close_p1 -= brick_size
+    return rows
+
+
+def chartRows(cdf):
+    return list(cdf[["date", "open", "high", "low", "close", "uptrend"]].itertuples(index=False, name=None))
+
+
+@pytest.mark.parametrize("brick_size", [2, 5, 7.5, 0.3])
+def test_renko_matches_row_loop(minutes, brick_size):
+    renko = indicators.Renko(minutes)
+    renko.brick_size = brick_size
+    bricks = chartRows(renko.get_ohlc_data())
+    assert len(bricks) > 10
+    # Exact equality: the prices are summed brick by brick like the loop did
+    assert bricks == renkoLoop(minutes, brick_size)
+
+
+def test_renko_in_pieces(minutes):
+    whole = indicators.Renko(minutes)
+    whole.brick_size = 5
+    whole.get_ohlc_data()
+    pieces = indicators.Renko(minutes.iloc[:400])
+    pieces.brick_size = 5
+    pieces.get_ohlc_data()
+    for start in range(400, len(minutes), 333):
+        pieces.extend_bricks(minutes.iloc[start:start + 333])
+    assert chartRows(pieces.cdf) == chartRows(whole.cdf)
+
+
+def lineBreakLoop(df, line_number=3):
+    # The row-by-row LineBreak.get_ohlc_data loop, reversals checked against the last line_number lines
+    rows = [(date, o, h, l, c, True) for date, o, h, l, c in
+            df[["date", "open", "high", "low", "close"]].iloc[:line_number].itertuples(index=False, name=None)]
+    for date, close in zip(df["date"], df["close"]):
+        _, open_p1, _, _, close_p1, uptrend = rows[-1]
+        if uptrend and close > close_p1:
+            r = (close_p1, close, close_p1, close)
+        elif uptrend and close < min(row[3] for row in rows[-line_number:]):
+            uptrend = not uptrend
+            r = (open_p1, open_p1, close, close)
+        elif not uptrend and close < close_p1:
+            r = (close_p1, close_p1, close, close)
+        elif not uptrend and close > max(row[2] for row in rows[-line_number:]):
+            uptrend = not uptrend
+            r = (open_p1, close, open_p1, close)
+        else:
+            continue
+        rows.append((date,) + r + (uptrend,))
+    return rows
+
+
+def pnfLoop(df, box_size, source):
+    # The row-by-row PnF.get_ohlc_data loop
+    chart = indicators.PnF(df)
+    chart.box_size = box_size
+    if source == "close":
+        rows = [(0, 0, 0, 0, chart.roundit(df["open"].iloc[0], base=box_size), True)]
+    else:
+        low = chart.roundit(df["low"].iloc[0], base=box_size)
+        rows = [(0, 0, low, low, low, True)]
+    uptrend = True
+    for date, high, low, close in df[["date", "high", "low", "close"]].itertuples(index=False, name=None):
+        _, _, high_p1, low_p1, close_p1, _ = rows[-1]
+        if source == "close":
+            bricks = int((close - close_p1) / box_size)
+        else:
+            bricks = int(((high - high_p1) if uptrend else (low - low_p1)) / box_size)
+        state = chart.get_state(uptrend, bricks)
+        if state is None:
+            continue
+        if state in (chart.UPTREND_REVERSAL, chart.DOWNTREND_REVERSAL):
+            uptrend = not uptrend
+            close_p1 += box_size if uptrend else -box_size
+            bricks += 1 if bricks < 0 else -1
+        for _ in range(abs(bricks)):
+            if uptrend:
+                rows.append((date, close_p1, close_p1 + box_size, close_p1, close_p1 + box_size, uptrend))
+                close_p1 += box_size
+            else:
+                rows.append((date, close_p1, close_p1, close_p1 - box_size, close_p1 - box_size, uptrend))
+                close_p1 -= box_size
+    return rows[1:]
+
+
+def test_line_break_matches_row_loop(minutes):
+    chart = indicators.LineBreak(minutes)
+    cdf = chart.get_ohlc_data()
+    expected = lineBreakLoop(minutes)
+    assert len(expected) > 50
+    assert chartRows(cdf) == expected
+    # Row numbers as the concat left them: the seed lines 0..2, every later line 0
+    assert list(cdf["index"]) == [0, 1, 2] + [0] * (len(cdf) - 3)
+
+
+@pytest.mark.parametrize("source, box_size", [("close", 2), ("close", 5), ("hl", 2), ("hl", 2.5)])
+def test_pnf_matches_row_loop(minutes, source, box_size):
+    chart = indicators.PnF(minutes)
+    chart.box_size = box_size
+    expected = pnfLoop(minutes, box_size, source)
+    assert len(expected) > 20
+    assert chartRows(chart.get_ohlc_data(source)) == expected
+
+
+def test_charts_in_pieces(minutes):
+    lineBreak = indicators.LineBreak(minutes)
+    lineBreak.get_ohlc_data()
+    pnf = indicators.PnF(minutes)
+    pnf.get_ohlc_data("hl")
+    whole = (chartRows(lineBreak.cdf), chartRows(pnf.cdf), pnf.brick_bars())
+
+    lineBreak = indicators.LineBreak(minutes.iloc[:375])
+    lineBreak.get_ohlc_data()
+    pnf = indicators.PnF(minutes.iloc[:375])
+    pnf.get_ohlc_data("hl")
+    for start in range(375, len(minutes), 375):
+        lineBreak.extend_lines(minutes.iloc[start:start + 375])
+        pnf.extend_bricks(minutes.iloc[start:start + 375])
+    assert chartRows(lineBreak.cdf) == whole[0]
+    assert chartRows(pnf.cdf) == whole[1]
+    assert pnf.brick_bars().equals(whole[2])
+
+
+def test_pnf_bars_match_pandas_pairing(minutes):
+    chart = indicators.PnF(minutes)
+    bars = chart.get_bar_ohlc_data()
+    # get_bar_ohlc_data's pandas version: the first box and the boxes either side of each trend change, paired
+    df = chart.cdf
+    change = df["uptrend"].ne(df["uptrend"].shift().bfill())
+    picked = pd.concat([df.iloc[:1], df[change | change.shift(-1, fill_value=False)]]).reset_index(drop=True)
+    opens, closes = picked.iloc[0::2].reset_index(drop=True), picked.iloc[1::2].reset_index(drop=True)
+    assert len(bars) == len(closes) > 5
+    assert (bars["date"].values == opens["date"].values[:len(closes)]).all()
+    assert (bars["open"].values == opens["open"].values[:len(closes)]).all()
+    assert (bars["close"].values == closes["close"].values).all()
+
+
+def test_renko_resumed_from_saved_state(minutes, tmp_path):
+    # One continuous chart against a chart saved at every session close and
+    # reloaded the next day, as Renko.py does between runs
+    whole = indicators.Renko(minutes)
+    whole.brick_size = 0.3
+    whole.get_ohlc_data()
+
+    days = (minutes.index.values + 19800) // 86400
+    sessions = [minutes[days == day] for day in np.unique(days)]
+    chart = indicators.Renko(sessions[0])
+    chart.brick_size = 0.3
+    added = chartRows(chart.get_ohlc_data())
+    for n, session in enumerate(sessions[1:]):
+        path = tmp_path / f"{n}.json"
+        chart.save_state(path, day=str(n))
+        chart = indicators.Renko(session)
+        assert chart.load_state(path)["day"] == str(n)
+        added += chartRows(chart.extend_bricks(session))
+
+    assert added == chartRows(whole.cdf)
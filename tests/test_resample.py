@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("backtestTools")
+
+from backtestUtils import histCache
+from backtestUtils.resample import barSeconds, getFnoBacktestData, resampleBars
+
+
+def pandasResample(df, interval, dailyAtOpen=False):
+    # The pandas resample the scripts used before: each session on its own,
+    # anchored at 09:15 IST, daily bars moved to 09:15 by hand
+    daily = barSeconds(interval) >= 86400
+    agg = {"o": "first", "h": "max", "l": "min", "c": "last", "v": "sum", "oi": "last"}
+    frame = df.set_index("datetime")
+    if daily:
+        bars = frame.resample("D").agg(agg)
+    else:
+        rule = f"{barSeconds(interval) // 60}min"
+        bars = pd.concat(day.resample(rule, origin="start_day", offset="9h15min").agg(agg)
+                         for _, day in frame.groupby(frame.index.date))
+    bars = bars.dropna(subset=["o"])
+    bars.index = bars.index.tz_localize("Asia/Kolkata").map(lambda ts: int(ts.timestamp()))
+    if dailyAtOpen:
+        bars.index = bars.index + 33300
+    return bars
+
+
+@pytest.fixture
+def oneMinute(minuteCandles):
+    df = minuteCandles("2024-02-05", days=6, seed=7)
+    # Holes in the tape, including a whole first bar of a session
+    return df.drop(df.index[np.r_[40:47, 375:380, 1000:1030]])
+
+
+@pytest.mark.parametrize("interval", ["3Min", "5Min", "15Min", "1H", "75Min", "1D"])
+def test_matches_pandas_resample(oneMinute, interval):
+    ours = resampleBars(oneMinute, interval)
+    ref = pandasResample(oneMinute, interval)
+    assert list(ours.index) == list(ref.index)
+    pd.testing.assert_frame_equal(ours[ref.columns], ref, check_dtype=False, check_names=False)
+    assert (ours["ti"].values == ours.index.values).all()
+    assert (ours["datetime"] == pd.to_datetime(ours.index + 19800, unit="s")).all()
+
+
+def test_daily_at_open(oneMinute):
+    ours = resampleBars(oneMinute, "1D", dailyAtOpen=True)
+    ref = pandasResample(oneMinute, "1D", dailyAtOpen=True)
+    assert list(ours.index) == list(ref.index)
+    assert list(ours.index - resampleBars(oneMinute, "D").index) == [33300] * len(ours)
+
+
+def test_reads_only_one_minute_bars(monkeypatch, oneMinute):
+    requested = []
+
+    def fetch(kind, symbol, startEpoch, endEpoch, interval):
+        requested.append(interval)
+        return oneMinute[(oneMinute.index >= startEpoch) & (oneMinute.index <= endEpoch)]
+
+    monkeypatch.setattr(histCache.histCache, "get", fetch)
+    start, end = int(oneMinute.index[0]), int(oneMinute.index[-1])
+    bars = getFnoBacktestData("NIFTY", start, end, "15Min")
+    assert requested == ["1Min"]
+    assert bars.equals(resampleBars(oneMinute, "15Min"))
@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+
+talib = pytest.importorskip("talib")
+
+from conftest import candleFrame, sessionMinutes
+from backtestUtils.streamIndicators import (ADX, ATR, EMA, MACD, RSI, VWAP, Bollinger, StochRSI, Supertrend,
+                                           linearRecurrence, supertrendFrame, supertrends)
+
+
+@pytest.fixture
+def bars():
+    df = candleFrame(sessionMinutes("2024-01-01", 4), seed=11)
+    # Leading NaNs, as a series fetched before the contract listed
+    df.iloc[:5, :4] = np.nan
+    return df
+
+
+def streamed(indicator, *columns):
+    # Bar by bar through update(), as a live strategy feeds it
+    return np.array([indicator.update(*row) for row in zip(*columns)], dtype=np.float64)
+
+
+def assertSame(actual, expected):
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_linear_recurrence():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=1000)
+    y, prev = np.empty(len(x)), 3.0
+    for t, value in enumerate(x):
+        prev = y[t] = 0.9 * prev + value
+    assertSame(linearRecurrence(x, 0.9, 3.0), y)
+
+
+@pytest.mark.parametrize("indicator, reference, inputs", [
+    (lambda: EMA(20), lambda h, l, c: talib.EMA(c, 20), "c"),
+    (lambda: RSI(14), lambda h, l, c: talib.RSI(c, 14), "c"),
+    (lambda: ATR(14), lambda h, l, c: talib.ATR(h, l, c, 14), "hlc"),
+    (lambda: ADX(14), lambda h, l, c: talib.ADX(h, l, c, 14), "hlc"),
+])
+def test_single_output_matches_talib(bars, indicator, reference, inputs):
+    expected = reference(bars["h"].values, bars["l"].values, bars["c"].values)
+    columns = [bars[col].values for col in inputs]
+    assertSame(indicator().batch(*columns), expected)
+    assertSame(streamed(indicator(), *columns), expected)
+
+
+def test_macd_matches_talib(bars):
+    expected = np.array(talib.MACD(bars["c"].values, 12, 26, 9))
+    assertSame(np.array(MACD(12, 26, 9).batch(bars["c"].values)), expected)
+    assertSame(streamed(MACD(12, 26, 9), bars["c"].values).T, expected)
+
+
+def test_bollinger_matches_talib(bars):
+    expected = np.array(talib.BBANDS(bars["c"].values, 20, 2.0, 2.0, 0))
+    assertSame(np.array(Bollinger(20, 2.0, 2.0).batch(bars["c"].values)), expected)
+    assertSame(streamed(Bollinger(20, 2.0, 2.0), bars["c"].values).T, expected)
+
+
+def test_stoch_rsi_k_matches_talib(bars):
+    _, fastd = talib.STOCHRSI(bars["c"].values, 14, 14, 3, 0)
+    k, d = StochRSI(14, 14, 3, 3).batch(bars["c"].values)
+    assertSame(k, fastd)
+    assertSame(streamed(StochRSI(14, 14, 3, 3), bars["c"].values).T, np.array([k, d]))
+
+
+def test_vwap_restarts_every_day(bars):
+    h, l, c, v = (bars[col].values for col in "hlcv")
+    expected = np.full(len(bars), np.nan)
+    for day in np.unique((bars.index.values + 19800) // 86400):
+        rows = np.flatnonzero((bars.index.values + 19800) // 86400 == day)
+        typical = np.nan_to_num((h[rows] + l[rows] + c[rows]) / 3 * v[rows])
+        volume = np.cumsum(np.where(np.isnan(c[rows]), 0.0, v[rows]))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            expected[rows] = np.where(volume != 0, np.cumsum(typical) / volume, np.nan)
+    assertSame(VWAP().batch(bars.index.values, h, l, c, v), expected)
+    assertSame(streamed(VWAP(), bars.index.values, h, l, c, v), expected)
+
+
+@pytest.mark.parametrize("indicator, inputs", [
+    (lambda: EMA(20), "c"), (lambda: RSI(14), "c"), (lambda: ATR(14), "hlc"), (lambda: ADX(14), "hlc"),
+    (lambda: MACD(), "c"), (lambda: Bollinger(), "c"), (lambda: StochRSI(), "c"),
+])
+def test_update_carries_on_after_batch(bars, indicator, inputs):
+    # Warm up in batch, then stream the rest: the same values as one long batch
+    columns = [bars[col].values for col in inputs]
+    whole = np.array(indicator().batch(*columns), dtype=np.float64).reshape(-1, len(bars))
+    warm = indicator()
+    warm.batch(*[col[:1000] for col in columns])
+    rest = streamed(warm, *[col[1000:] for col in columns]).reshape(len(bars) - 1000, -1).T
+    assertSame(rest, whole[:, 1000:])
+
+
+def supertrendLoop(close, upper, lower):
+    # pandas_ta supertrend's bar-by-bar loop, which stepSupertrend replaced
+    upper, lower = upper.copy(), lower.copy()
+    direction = np.ones(len(close), dtype=np.int8)
+    for i in range(1, len(close)):
+        if close[i] > upper[i - 1]:
+            direction[i] = 1
+        elif close[i] < lower[i - 1]:
+            direction[i] = -1
+        else:
+            direction[i] = direction[i - 1]
+            if direction[i] > 0 and lower[i] < lower[i - 1]:
+                lower[i] = lower[i - 1]
+            if direction[i] < 0 and upper[i] > upper[i - 1]:
+                upper[i] = upper[i - 1]
+    return np.where(direction > 0, lower, upper), direction, upper, lower
+
+
+@pytest.mark.parametrize("gaps", [False, True])
+def test_supertrend_kernel_matches_loop(bars, gaps):
+    multipliers = (0.5, 1.0, 2.0, 3.0)
+    h, l, c = (bars[col].values.copy() for col in "hlc")
+    if gaps:
+        # A hole after the warm-up sends the kernel down its bar-by-bar path
+        h[700:703] = l[700:703] = c[700:703] = np.nan
+    trend, direction, upper, lower = supertrends(h, l, c, 10, multipliers)
+    # The same ATR supertrends() uses, so only the stepping is compared
+    atr = ATR(10).batch(h, l, c)
+    for j, multiplier in enumerate(multipliers):
+        expected = supertrendLoop(c, (h + l) / 2 + multiplier * atr, (h + l) / 2 - multiplier * atr)
+        for actual, want in zip((trend, direction, upper, lower), expected):
+            np.testing.assert_array_equal(actual[:, j], want)
+        # Many flips, so the segment walk is exercised
+        assert (np.diff(direction[:, j]) != 0).sum() > 10
+
+
+def test_supertrend_stream_and_frame(bars):
+    h, l, c = (bars[col].values for col in "hlc")
+    trend, direction, _, _ = supertrends(h, l, c, 7, (1.5, 3.0))
+    frame = supertrendFrame(bars, 7, (1.5, 3.0))
+    for j, multiplier in enumerate((1.5, 3.0)):
+        assertSame(Supertrend(7, multiplier).batch(h, l, c)[0], trend[:, j])
+        assertSame(streamed(Supertrend(7, multiplier), h, l, c).T, np.array([trend[:, j], direction[:, j]]))
+        assertSame(frame[f"SUPERT_7_{multiplier}"].values, trend[:, j])
+        assert (frame[f"SUPERTd_7_{multiplier}"].values == direction[:, j]).all()
+
+
+def test_supertrend_matches_pandas_ta(bars):
+    ta = pytest.importorskip("pandas_ta")
+    df = bars.dropna(subset=["c"])
+    expected = ta.supertrend(df["h"], df["l"], df["c"], 7, 3.0)
+    frame = supertrendFrame(df, 7, (3.0,))
+    assert (frame["SUPERTd_7_3.0"].values[7:] == expected["SUPERTd_7_3.0"].values[7:]).all()
+    assertSame(frame["SUPERT_7_3.0"].values[7:], expected["SUPERT_7_3.0"].values[7:])
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from backtestUtils.timeframeAlign import alignTimeframes, newBarMask
+
+
+def lookupLoop(minutes, barIndex, barSeconds):
+    """The loop alignTimeframes replaced: remember timeData-barSeconds whenever it is a bar start."""
+    starts = set(barIndex.tolist())
+    position = {start: n for n, start in enumerate(barIndex)}
+    last = -1
+    out = []
+    for timeData in minutes:
+        if timeData - barSeconds in starts:
+            last = position[timeData - barSeconds]
+        out.append(last)
+    return np.array(out)
+
+
+def test_positions_match_index_lookups(minuteCandles):
+    df = minuteCandles(days=4)
+    minutes = df.index.values
+    frames = {
+        "5Min": pd.DataFrame(index=minutes[::5]),
+        # 09:15, 10:15 ... 15:15; the 15:15 bar is partial and ends after the close
+        "1H": pd.DataFrame(index=minutes[(np.arange(len(minutes)) % 375) % 60 == 0]),
+    }
+    expected = {"5Min": lookupLoop(minutes, frames["5Min"].index.values, 300),
+                "1H": lookupLoop(minutes, frames["1H"].index.values, 3600)}
+    assert (expected["1H"] >= 0).any()
+
+    # MarketStream aligns without sessionEnd, day_break with it
+    for sessionEnd in (None, 15 * 3600 + 30 * 60):
+        positions = alignTimeframes(df, frames, sessionEnd=sessionEnd)
+        for interval in frames:
+            np.testing.assert_array_equal(positions[interval], expected[interval])
+
+
+def test_new_bar_mask_marks_first_sight():
+    mask = newBarMask(np.array([-1, -1, 0, 0, 1, 1, 1, 2]))
+    assert mask.tolist() == [False, False, True, False, True, False, False, True]
@@ -0,0 +1,52 @@
+from datetime import datetime, time
+import numpy as np
+import pytest
+
+pytest.importorskip("backtestTools")
+
+from backtestUtils.resample import barStarts
+from backtestUtils.tradingCalendar import nseCalendar, nseHolidays, nseSpecialSessions
+
+# Covers the 2024-01-20 Saturday session, the 2024-01-22 and 01-26 holidays,
+# and the 2024-03-02 split DR session
+spans = [("2024-01-17", "2024-01-29"), ("2024-02-28", "2024-03-05")]
+
+
+def everyMinute(startDate, endDate):
+    start = int(datetime.fromisoformat(startDate).timestamp())
+    end = int(datetime.fromisoformat(endDate).timestamp())
+    return np.arange(start, end, 60, dtype=np.int64)
+
+
+def naiveInSession(epoch, start=None, end=None):
+    # The per-bar datetime check sessionMask replaced
+    dt = datetime.fromtimestamp(epoch)
+    date = dt.strftime("%Y-%m-%d")
+    if date in nseSpecialSessions:
+        windows = nseSpecialSessions[date]
+    elif dt.weekday() < 5 and date not in nseHolidays:
+        windows = ((time(9, 15), time(15, 30)),)
+    else:
+        return False
+    now = dt.time()
+    return (any(windowOpen <= now < windowClose for windowOpen, windowClose in windows)
+            and (start is None or now >= start) and (end is None or now <= end))
+
+
+@pytest.mark.parametrize("span", spans)
+@pytest.mark.parametrize("window", [(None, None), (time(9, 16), time(15, 25)), (time(11, 0), None)])
+def test_session_mask_matches_datetime_check(span, window):
+    epochs = everyMinute(*span)
+    expected = np.array([naiveInSession(epoch, *window) for epoch in epochs])
+    assert (nseCalendar.sessionMask(epochs, *window) == expected).all()
+
+
+@pytest.mark.parametrize("interval", ["1Min", "5Min", "1H", "75Min", "1D"])
+@pytest.mark.parametrize("nBars", [1, 7, 40])
+def test_lookback_start_counts_session_bars(interval, nBars):
+    epochs = everyMinute("2023-11-01", "2024-01-30")
+    minutes = epochs[nseCalendar.sessionMask(epochs)]
+    for endEpoch in (int(datetime(2024, 1, 23, 9, 15).timestamp()), int(datetime(2024, 1, 29, 11, 47).timestamp())):
+        # Labels of the bars that started trading before endEpoch, counted back by hand
+        labels = np.unique(barStarts(minutes[minutes < endEpoch], interval))
+        assert nseCalendar.lookbackStart(endEpoch, nBars, interval) == labels[-nBars]